@@ -0,0 +1,110 @@
+"""
+Stress benchmark of the Python side of the DOM pipeline on very large and very deep synthetic trees.
+
+Builds the node tree returned by buildDomNode.js in memory (no browser needed), with a long chain of
+nested containers to reach the requested depth and the remaining nodes spread as leaves along the chain,
+then times every traversal: parsing, id generation, conversion to `DomNode`, flatten, filtering, pruning and
+rendering.
+All of them use explicit stacks, so the depth is not bounded by `sys.getrecursionlimit()`.
+
+❯ `uv run python benchmarks/deep_dom.py --nodes 50000 --depth 2000`
+"""
+
+import argparse
+import sys
+import time
+from collections.abc import Callable
+from typing import Any
+
+from notte_browser.dom.id_generation import generate_sequential_ids
+from notte_browser.dom.parsing import DomTreeDict, ParseDomTreePipe
+from notte_browser.rendering.interaction_only import InteractionOnlyDomNodeRenderingPipe
+from notte_browser.rendering.json import JsonDomNodeRenderingPipe
+from notte_browser.rendering.markdown import MarkdownDomNodeRenderingPipe
+from notte_browser.rendering.pruning import prune_dom_tree
+from notte_core.browser.dom_tree import DomNode
+
+
+def synthetic_tree(nb_nodes: int, depth: int) -> DomTreeDict:
+    """Chain of `depth` nested divs, the remaining nodes are buttons and texts attached along the chain"""
+    bbox = {"x": 0.0, "y": 0.0, "width": 10.0, "height": 10.0, "scroll_x": 0.0, "scroll_y": 0.0}
+    bbox |= {"iframe_offset_x": 0.0, "iframe_offset_y": 0.0, "viewport_width": 1280.0, "viewport_height": 720.0}
+    highlight_index = 0
+
+    def element(tag: str, xpath: str, **kwargs: Any) -> dict[str, Any]:
+        return {
+            "tagName": tag,
+            "xpath": xpath,
+            "attributes": {"class": f"{tag}-node"},
+            "isVisible": True,
+            "isInteractive": False,
+            "isTopElement": True,
+            "isEditable": False,
+            "highlightIndex": None,
+            "shadowRoot": False,
+            "bbox": None,
+            "children": [],
+            **kwargs,
+        }
+
+    root = element("body", "/html/body")
+    chain = [root]
+    for _ in range(1, depth):
+        child = element("div", f"{chain[-1]['xpath']}/div")
+        chain[-1]["children"].append(child)
+        chain.append(child)
+
+    for i in range(max(nb_nodes - depth, 0)):
+        parent = chain[i % depth]
+        if i % 2 == 0:
+            button = element(
+                "button",
+                f"{parent['xpath']}/button[{i}]",
+                isInteractive=True,
+                highlightIndex=highlight_index,
+                bbox=bbox,
+                attributes={"aria-label": f"Action {i}"},
+            )
+            button["children"].append({"type": "TEXT_NODE", "text": f"Go {i}", "isVisible": True})
+            highlight_index += 1
+            parent["children"].append(button)
+        else:
+            parent["children"].append({"type": "TEXT_NODE", "text": f"Some text {i}", "isVisible": True})
+    return root  # pyright: ignore[reportReturnType]
+
+
+def timed(name: str, fn: Callable[[], Any]) -> Any:
+    start = time.perf_counter()
+    result = fn()
+    print(f"{name:>24} | {1000 * (time.perf_counter() - start):8.1f}ms")
+    return result
+
+
+def main(nb_nodes: int, depth: int) -> None:
+    print(f"nodes={nb_nodes} | depth={depth} | recursion limit={sys.getrecursionlimit()}")
+    tree = timed("build synthetic tree", lambda: synthetic_tree(nb_nodes, depth))
+    dom_tree = timed(
+        "parse",
+        lambda: ParseDomTreePipe._parse_node(  # pyright: ignore[reportPrivateUsage]
+            tree, parent=None, in_iframe=False, in_shadow_root=False, iframe_parent_css_paths=[], notte_selector=""
+        ),
+    )
+    assert dom_tree is not None
+    dom_tree = timed("generate ids", lambda: generate_sequential_ids(dom_tree))
+    node: DomNode = timed("to notte domnode", lambda: dom_tree.to_notte_domnode())
+    flat = timed("flatten", lambda: node.flatten())
+    interactions = timed("interaction nodes", lambda: node.interaction_nodes())
+    _ = timed("subtree filter", lambda: node.subtree_filter(lambda n: n.text != "Some text 1"))
+    _ = timed("prune", lambda: prune_dom_tree(node))
+    _ = timed("render interaction only", lambda: InteractionOnlyDomNodeRenderingPipe.forward(node))
+    _ = timed("render markdown", lambda: MarkdownDomNodeRenderingPipe.forward(node, include_ids=True))
+    _ = timed("render json", lambda: JsonDomNodeRenderingPipe.forward(node))
+    print(f"flattened {len(flat)} nodes, {len(interactions)} interaction nodes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--nodes", type=int, default=50_000)
+    _ = parser.add_argument("--depth", type=int, default=2_000)
+    args = parser.parse_args()
+    main(nb_nodes=args.nodes, depth=args.depth)
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark of the DOM extraction pipeline on synthetic pages.
+
+Compares the nested JSON node map returned by buildDomNode.js with the columnar payload
+(`columnar_dom_transfer = true`): time spent in the browser + transfer, payload size and
+time to rebuild the node tree in Python.
+
+❯ `uv run python benchmarks/dom_parsing.py --nodes 20000`
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any
+
+from notte_browser.dom.parsing import ParseDomTreePipe
+from notte_browser.playwright_async_api import Page, async_playwright
+from notte_core.common.config import config
+
+
+def synthetic_html(nb_nodes: int, fanout: int = 8) -> str:
+    """Balanced tree of nested containers, with links, buttons and text leaves"""
+    parts: list[str] = []
+    count = 0
+
+    def build(level: int) -> None:
+        nonlocal count
+        for i in range(fanout):
+            if count >= nb_nodes:
+                return
+            count += 1
+            if level >= 3:
+                kind = i % 3
+                if kind == 0:
+                    parts.append(f'<a href="/item/{count}" class="link item-{i}">Item {count}</a>')
+                elif kind == 1:
+                    parts.append(f'<button class="btn" aria-label="Action {count}">Go {count}</button>')
+                else:
+                    parts.append(f'<span class="text">Some text for node {count}</span>')
+            else:
+                parts.append(f'<div class="level-{level} container" data-index="{i}">')
+                build(level + 1)
+                parts.append("</div>")
+
+    while count < nb_nodes:
+        build(0)
+    return f"<html><body>{''.join(parts)}</body></html>"
+
+
+async def measure(page: Page, columnar: bool, repeat: int) -> dict[str, float]:
+    dom_config: dict[str, bool | int | str | None] = {
+        "highlight_elements": config.highlight_elements,
+        "focus_element": config.focus_element,
+        "viewport_expansion": -1,
+        "enable_pointer_elements": config.enable_pointer_elements,
+        "incremental": False,
+        "columnar": columnar,
+    }
+    evaluate_s, rebuild_s, payload_kb = 0.0, 0.0, 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        page_eval: dict[str, Any] | None = await ParseDomTreePipe.evaluate_dom_tree(page, dom_config)
+        evaluate_s += time.perf_counter() - start
+        assert page_eval is not None
+        payload_kb += len(json.dumps(page_eval)) / 1024
+
+        start = time.perf_counter()
+        if columnar:
+            _ = ParseDomTreePipe.decode_columnar_dom_tree(page_eval["columnar"], page_eval["rootId"])
+        else:
+            _ = await ParseDomTreePipe._reconstruct_dom_tree(page_eval)  # pyright: ignore[reportPrivateUsage]
+        rebuild_s += time.perf_counter() - start
+    return {
+        "evaluate_ms": 1000 * evaluate_s / repeat,
+        "rebuild_ms": 1000 * rebuild_s / repeat,
+        "payload_kb": payload_kb / repeat,
+    }
+
+
+async def main(nb_nodes: int, repeat: int) -> None:
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        page = await browser.new_page()
+        await page.set_content(synthetic_html(nb_nodes))
+        # warm up: installs the builder in the document
+        _ = await measure(page, columnar=False, repeat=1)
+        for columnar in (False, True):
+            stats = await measure(page, columnar=columnar, repeat=repeat)
+            name = "columnar" if columnar else "json"
+            print(
+                f"{name:>9} | nodes={nb_nodes} | evaluate={stats['evaluate_ms']:.1f}ms"
+                + f" | rebuild={stats['rebuild_ms']:.1f}ms | payload={stats['payload_kb']:.0f}KB"
+            )
+        await browser.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--nodes", type=int, default=20_000)
+    _ = parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(nb_nodes=args.nodes, repeat=args.repeat))
@@ -0,0 +1,77 @@
+"""
+Benchmark of the screenshot highlighting on pages with many interaction nodes.
+
+Renders a synthetic screenshot with `--bboxes` random bounding boxes (no browser needed) and times
+`ScreenshotHighlighter.forward` as well as repeated `Screenshot.bytes` calls, which reuse the
+rendered variants cached on the screenshot instead of highlighting the image again.
+
+❯ `uv run python benchmarks/highlighting.py --bboxes 800`
+"""
+
+import argparse
+import io
+import random
+import time
+from collections.abc import Callable
+from typing import Any
+
+from notte_core.browser.highlighter import BoundingBox, ScreenshotHighlighter
+from notte_core.browser.observation import Screenshot, ScreenshotOptions
+from notte_core.common.config import ScreenshotFormat
+from PIL import Image
+
+
+def synthetic_screenshot(nb_bboxes: int, width: int, height: int) -> Screenshot:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), color="white").save(output, format="PNG")
+    # screenshots are usually taken with a device scale factor of 2
+    viewport_width, viewport_height = width / 2, height / 2
+    bboxes = [
+        BoundingBox(
+            x=random.uniform(0, viewport_width - 50),
+            y=random.uniform(0, viewport_height - 20),
+            width=random.uniform(10, 200),
+            height=random.uniform(10, 60),
+            scroll_x=0,
+            scroll_y=0,
+            viewport_width=viewport_width,
+            viewport_height=viewport_height,
+            notte_id=f"{random.choice('LBIFOM')}{i}",
+        )
+        for i in range(nb_bboxes)
+    ]
+    return Screenshot(raw=output.getvalue(), bboxes=bboxes, last_action_id=bboxes[0].notte_id)
+
+
+def timed(name: str, fn: Callable[[], Any], repeat: int = 1) -> Any:
+    start = time.perf_counter()
+    result = None
+    for _ in range(repeat):
+        result = fn()
+    print(f"{name:>28} | {1000 * (time.perf_counter() - start) / repeat:8.1f}ms")
+    return result
+
+
+def main(nb_bboxes: int, width: int, height: int, repeat: int) -> None:
+    random.seed(0)
+    screenshot = synthetic_screenshot(nb_bboxes, width, height)
+    print(f"bboxes={nb_bboxes} | screenshot={width}x{height} | repeat={repeat}")
+    _ = timed("highlighter forward", lambda: ScreenshotHighlighter.forward(screenshot.raw, screenshot.bboxes), repeat)
+    png = ScreenshotOptions()
+    _ = timed("bytes('full') first call", lambda: screenshot.bytes("full", png))
+    _ = timed("bytes('full') cached", lambda: screenshot.bytes("full", png), repeat)
+    _ = timed("bytes('last_action') first", lambda: screenshot.bytes("last_action", png))
+    jpeg = ScreenshotOptions(format=ScreenshotFormat.JPEG, max_width=1280)
+    data = timed("bytes('full', jpeg) first", lambda: screenshot.bytes("full", jpeg))
+    _ = timed("bytes('full', jpeg) cached", lambda: screenshot.bytes("full", jpeg), repeat)
+    print(f"full png: {len(screenshot.bytes('full', png)) / 1024:.0f}KB | full jpeg: {len(data) / 1024:.0f}KB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--bboxes", type=int, default=800)
+    _ = parser.add_argument("--width", type=int, default=2560)
+    _ = parser.add_argument("--height", type=int, default=1440)
+    _ = parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(nb_bboxes=args.bboxes, width=args.width, height=args.height, repeat=args.repeat)
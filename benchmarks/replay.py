@@ -0,0 +1,76 @@
+"""
+Benchmark of the session replay encoding on long trajectories with near-duplicate screenshots.
+
+Builds a synthetic trajectory of `--steps` screenshots (no browser needed) where a fraction of the steps
+don't change the page (waits, failed clicks, ...) and most others only change a small region, then
+compares the replay size and build time with and without frame deduplication / partial frames.
+
+❯ `uv run python benchmarks/replay.py --steps 200`
+"""
+
+import argparse
+import io
+import random
+import time
+from collections.abc import Callable
+from typing import Any
+
+from notte_core.utils.webp_replay import ReplayEncoder, ReplayStats
+from PIL import Image, ImageDraw
+
+
+def synthetic_trajectory(nb_steps: int, width: int, height: int, duplicate_rate: float) -> list[bytes]:
+    image = Image.new("RGB", (width, height), color="white")
+    draw = ImageDraw.Draw(image)
+    screenshots: list[bytes] = []
+    for step in range(nb_steps):
+        change = random.random()
+        if change < 0.1:
+            # navigation: the whole page changes
+            draw.rectangle((0, 0, width, height), fill=tuple(random.randint(128, 255) for _ in range(3)))
+            for line in range(0, height, 40):
+                draw.text((40, line), f"page {step} line {line} " * 8, fill="black")
+        elif change >= 0.1 + duplicate_rate:
+            # e.g. a form field being filled
+            x, y = random.randint(0, width - 300), random.randint(0, height - 40)
+            draw.rectangle((x, y, x + 300, y + 40), fill="lightgray")
+            draw.text((x + 10, y + 10), f"input {step}", fill="black")
+        output = io.BytesIO()
+        image.save(output, format="PNG")
+        screenshots.append(output.getvalue())
+    return screenshots
+
+
+def timed(name: str, fn: Callable[[], Any]) -> Any:
+    start = time.perf_counter()
+    result = fn()
+    print(f"{name:>16} | {1000 * (time.perf_counter() - start):8.1f}ms")
+    return result
+
+
+def summary(stats: ReplayStats) -> str:
+    return (
+        f"{stats.nb_frames} frames ({stats.nb_collapsed} collapsed, {stats.nb_partial} partial) | "
+        + f"{stats.output_bytes / 1024:.0f}KB | {stats.compression_ratio:.1f}x"
+    )
+
+
+def main(nb_steps: int, width: int, height: int, duplicate_rate: float) -> None:
+    random.seed(0)
+    screenshots = synthetic_trajectory(nb_steps, width, height, duplicate_rate)
+    print(f"steps={nb_steps} | screenshot={width}x{height} | screenshots={sum(map(len, screenshots)) / 1024:.0f}KB")
+    full = ReplayEncoder(duplicate_max_pixels=None, max_partial_area=0)
+    stats = timed("full frames", lambda: full.write(io.BytesIO(), screenshots))
+    print(summary(stats))
+    stats = timed("deduplicated", lambda: ReplayEncoder().write(io.BytesIO(), screenshots))
+    print(summary(stats))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--steps", type=int, default=200)
+    _ = parser.add_argument("--width", type=int, default=1280)
+    _ = parser.add_argument("--height", type=int, default=720)
+    _ = parser.add_argument("--duplicate-rate", type=float, default=0.3)
+    args = parser.parse_args()
+    main(nb_steps=args.steps, width=args.width, height=args.height, duplicate_rate=args.duplicate_rate)
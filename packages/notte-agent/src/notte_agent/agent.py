@@ -1,3 +1,4 @@
+import asyncio
 import datetime as dt
 import traceback
 import typing
@@ -71,6 +72,12 @@ class NotteAgent(BaseAgent):
         self.validator: CompletionValidator = CompletionValidator(
             llm=self.llm, perception=self.perception, use_vision=self.config.use_vision
         )
+        # conversation kept across steps: only the new trajectory elements are added at each step
+        self.conv: Conversation = Conversation(
+            convert_tools_to_assistant=True, autosize=True, model=self.config.reasoning_model
+        )
+        self._conv_task: str | None = None
+        self._conv_trajectory_size: int = 0
 
         # ####################################
         # ########### Vault Setup ############
@@ -78,6 +85,8 @@ class NotteAgent(BaseAgent):
 
         # vaults are used to safely input credentials into the sessions without leaking them to the LLM (text + screenshots)
         self.vault: BaseVault | None = vault
+        # credentials replacement started while the LLM is still generating the rest of its completion
+        self._prefetched_action: tuple[BaseAction, asyncio.Task[BaseAction]] | None = None
         if self.vault is not None:
             # hide vault leaked credentials within llm inputs
             self.llm.structured_completion = self.vault.patch_structured_completion(0, self.vault.get_replacement_map)(  # pyright: ignore [reportAttributeAccessIssue]
@@ -107,6 +116,27 @@ class NotteAgent(BaseAgent):
                 )
         return action
 
+    def on_completion_field(self, name: str, value: typing.Any) -> None:
+        """Called while the completion is streamed, as soon as each of its top-level fields is complete"""
+        if name != "action" or self.vault is None or not self.vault.contains_credentials(value):
+            return
+        # the previous completion attempt might have been aborted and retried
+        self.cancel_prefetched_action()
+        self._prefetched_action = (value, asyncio.create_task(self.action_with_credentials(value)))
+
+    def cancel_prefetched_action(self) -> None:
+        if self._prefetched_action is not None:
+            _ = self._prefetched_action[1].cancel()
+            self._prefetched_action = None
+
+    async def prefetched_action_with_credentials(self, action: BaseAction) -> BaseAction:
+        if self._prefetched_action is not None and self._prefetched_action[0] == action:
+            task = self._prefetched_action[1]
+            self._prefetched_action = None
+            return await task
+        self.cancel_prefetched_action()
+        return await self.action_with_credentials(action)
+
     async def output(self, task: str, answer: str, success: bool) -> AgentResponse:
         return AgentResponse(
             created_at=self.created_at,
@@ -119,6 +149,8 @@ class NotteAgent(BaseAgent):
         )
 
     async def observe_and_completion(self, request: AgentRunRequest) -> AgentCompletion:
+        # left over by a step that did not execute its action
+        self.cancel_prefetched_action()
         _ = await self.session.aobserve(perception_type=self.perception.perception_type)
 
         # Get messages with the current observation included
@@ -126,7 +158,11 @@ class NotteAgent(BaseAgent):
 
         with ErrorConfig.message_mode("developer"):
             response: AgentCompletion = await self.llm.structured_completion(
-                messages, response_format=AgentCompletion, use_strict_response_format=False
+                messages,
+                response_format=AgentCompletion,
+                use_strict_response_format=False,
+                stream=self.config.llm_stream_structured_output,
+                on_field=self.on_completion_field,
             )
 
         self.trajectory.append(response, force=True)
@@ -205,7 +241,7 @@ class NotteAgent(BaseAgent):
                 return None
             case _:
                 # The action is a regular action => execute it (default case)
-                action = await self.action_with_credentials(response.action)
+                action = await self.prefetched_action_with_credentials(response.action)
                 result = await self.session.aexecute(action, raise_exception_on_failure=False)
                 if result.success:
                     self.consecutive_failures = 0
@@ -231,7 +267,8 @@ class NotteAgent(BaseAgent):
         """
         Formats a trajectory into a list of messages for the LLM, including the current observation.
 
-        For every resonning model step, the conversation is reset.
+        The setup and trajectory messages are kept across steps (only the new trajectory elements are added),
+        the current perception messages are replaced at every step.
         The conversation follows the following format:
 
         ### Setup messages
@@ -246,17 +283,18 @@ class NotteAgent(BaseAgent):
 
         /!\\ If `use_vision` is enabled, the DOM perception message will contain a screenshot of the page.
         """
-        conv: Conversation = Conversation(
-            convert_tools_to_assistant=True, autosize=True, model=self.config.reasoning_model
-        )
-        system_msg, task_msg = self.prompt.system(), self.prompt.task(task)
-        if self.vault is not None:
-            system_msg += "\n" + self.vault.instructions()
-        conv.add_system_message(content=system_msg)
-        conv.add_user_message(content=task_msg)
-
-        # otherwise, add all past trajectorysteps to the conversation
-        for step in self.trajectory:
+        conv = self.conv
+        if task != self._conv_task or len(self.trajectory) < self._conv_trajectory_size:
+            conv.reset()
+            system_msg, task_msg = self.prompt.system(), self.prompt.task(task)
+            if self.vault is not None:
+                system_msg += "\n" + self.vault.instructions()
+            conv.add_system_message(content=system_msg)
+            conv.add_user_message(content=task_msg)
+            self._conv_task, self._conv_trajectory_size = task, 0
+
+        # add the trajectory steps that are not in the conversation yet
+        for step in self.trajectory.elements_from(self._conv_trajectory_size):
             match step:
                 case AgentCompletion():
                     # TODO: choose if we want this to be an assistant message or a tool message
@@ -272,22 +310,25 @@ class NotteAgent(BaseAgent):
                 case Observation():
                     # TODO: add partial info for previous?
                     pass
+        self._conv_trajectory_size = len(self.trajectory)
+
+        # the messages that change at every step come last: the prefix is reused by provider prompt caching
+        with conv.temporary_messages():
+            # Add current observation (only if it's not empty)
+            last_obs = self.trajectory.last_observation
+            if last_obs is not None and last_obs is not Observation.empty():
+                conv.add_user_message(
+                    content=self.perception.perceive(obs=last_obs, progress=self.progress),
+                    image=(last_obs.screenshot.bytes() if self.config.use_vision else None),
+                )
+                conv.add_user_message(self.prompt.select_action())
 
-        # Add current observation (only if it's not empty)
-        last_obs = self.trajectory.last_observation
-        if last_obs is not None and last_obs is not Observation.empty():
-            conv.add_user_message(
-                content=self.perception.perceive(obs=last_obs, progress=self.progress),
-                image=(last_obs.screenshot.bytes() if self.config.use_vision else None),
-            )
-            conv.add_user_message(self.prompt.select_action())
-
-        # if no action execution in trajectory, add the start trajectory message
-        last_exec = self.trajectory.last_result
-        if last_exec is None:
-            conv.add_user_message(content=self.prompt.empty_trajectory())
+            # if no action execution in trajectory, add the start trajectory message
+            last_exec = self.trajectory.last_result
+            if last_exec is None:
+                conv.add_user_message(content=self.prompt.empty_trajectory())
 
-        return conv.messages()
+            return conv.messages()
 
     @profiler.profiled()
     @track_usage("local.agent.run")
@@ -2,6 +2,9 @@ from __future__ import annotations
 
 import base64
 import json
+from bisect import bisect_left
+from collections.abc import Generator
+from contextlib import contextmanager
 from dataclasses import dataclass
 from typing import Any, TypeVar
 
@@ -17,11 +20,12 @@ from litellm import (
     ModelResponse,  # type: ignore[reportPrivateImportUsage]
     OpenAIMessageContent,
 )
-from litellm.utils import token_counter  # type: ignore[reportUnknownVariableType]
 from loguru import logger
 from notte_core.common.config import LlmModel, config
 from notte_core.errors.llm import LLMParsingError
 from notte_core.llms.engine import StructuredContent
+from notte_core.llms.tokens import TokenCounter
+from notte_core.utils.image import image_mime_type
 from pydantic import BaseModel, Field, PrivateAttr
 from typing_extensions import override
 
@@ -41,7 +45,12 @@ T = TypeVar("T", bound=BaseModel)
 
 
 class Conversation(BaseModel):
-    """Manages conversation history and message extraction"""
+    """Manages conversation history and message extraction
+
+    Messages are only token counted once, when they are added. With `autosize`, the oldest messages (except the
+    initial system and task messages) are left out of `messages()` to fit in the context window: the window is found
+    by a binary search over the cumulative token counts, so conversations can keep growing across agent steps.
+    """
 
     history: list[CachedMessage] = Field(default_factory=list)
     json_extractor: StructuredContent = Field(default_factory=lambda: StructuredContent(inner_tag="json"))
@@ -51,6 +60,13 @@ class Conversation(BaseModel):
     conservative_factor: float = 0.8
 
     _total_tokens: int = PrivateAttr(default=0)
+    # cumulative token counts of `history` (`_prefix_tokens[i]` is the number of tokens of `history[:i]`)
+    _prefix_tokens: list[int] = PrivateAttr(default_factory=lambda: [0])
+    # leading system messages + first user message (task description), never trimmed
+    _nb_init: int = PrivateAttr(default=0)
+    _init_done: bool = PrivateAttr(default=False)
+    # index of the oldest non-init message that fits in the context window
+    _start: int = PrivateAttr(default=0)
     convert_tools_to_assistant: bool = False
 
     @override
@@ -72,60 +88,56 @@ class Conversation(BaseModel):
 
     def count_tokens(self, content: AllMessageValues) -> int:
         """Count the number of tokens in a list of messages"""
-        return token_counter(model=self.model, messages=[content])
+        return TokenCounter.for_model(self.model).count_messages([content])
 
     def total_tokens(self) -> int:
         """Get total tokens in conversation history"""
         return self._total_tokens
 
-    def trim_history_to_fit(self, new_content: AllMessageValues) -> None:
+    def trim_history_to_fit(self, new_content: AllMessageValues | None = None) -> None:
         """Trim history to make room for new content while preserving system messages"""
         if not self.autosize:
             return
-
-        # Always keep system messages
-        init_messages: list[CachedMessage] = []
-        other_messages: list[CachedMessage] = []
-        is_init_msg = True
-        for msg in self.history:
-            match is_init_msg, msg.message["role"]:
-                case True, "system":
-                    init_messages.append(msg)
-                case True, "user":
-                    # keep first user message as init message (need task description)
-                    is_init_msg = False
-                    init_messages.append(msg)
-                case _, _:
-                    other_messages.append(msg)
-
-        new_content_tokens = self.count_tokens(new_content)
-        init_tokens = sum(msg.token_count for msg in init_messages)
+        init_tokens = self._prefix_tokens[self._nb_init]
+        new_content_tokens = self.count_tokens(new_content) if new_content is not None else 0
         available_tokens = self.conservative_max_tokens - init_tokens - new_content_tokens
 
-        # Remove oldest non-system messages until we have room
-        current_tokens = sum(msg.token_count for msg in other_messages)
-        has_trimmed = 0
-        while other_messages and current_tokens > available_tokens:
-            removed = other_messages.pop(0)
-            current_tokens -= removed.token_count
-            has_trimmed += 1
-
-        if has_trimmed > 0:
+        # oldest non-system message such that the messages after it fit in the available tokens
+        total_tokens = self._prefix_tokens[-1]
+        start = bisect_left(self._prefix_tokens, total_tokens - available_tokens, lo=self._nb_init)
+        # the last message is always kept
+        start = min(max(start, self._start), max(len(self.history) - 1, self._nb_init))
+        if start > self._start:
             logger.info(
-                f"Trimmed {has_trimmed} message(s) to stay under max token limit (i.e {self.default_max_tokens // 1000}k)"
+                f"Trimmed {start - self._start} message(s) to stay under max token limit (i.e {self.default_max_tokens // 1000}k)"
             )
-
-        self.history = init_messages + other_messages
-        self._total_tokens = sum(msg.token_count for msg in self.history)
+        self._start = start
+        self._total_tokens = init_tokens + total_tokens - self._prefix_tokens[start]
 
     def _add_message(self, msg: AllMessageValues) -> None:
         """Internal helper to add a message with token counting"""
         token_count = self.count_tokens(msg)
-        if self.autosize:
-            self.trim_history_to_fit(msg)
         cached_msg = CachedMessage(message=msg, token_count=token_count)
         self.history.append(cached_msg)
+        self._prefix_tokens.append(self._prefix_tokens[-1] + token_count)
         self._total_tokens += token_count
+        if not self._init_done and msg["role"] in ("system", "user") and self._nb_init == len(self.history) - 1:
+            # keep leading system messages and the first user message (task description) as init messages
+            self._nb_init = self._start = len(self.history)
+            self._init_done = msg["role"] == "user"
+        elif self.autosize:
+            self.trim_history_to_fit()
+
+    @contextmanager
+    def temporary_messages(self) -> Generator[Conversation, None, None]:
+        """Messages added within this context are removed on exit (e.g. the observation of the current agent step)"""
+        size, start, total_tokens = len(self.history), self._start, self._total_tokens
+        try:
+            yield self
+        finally:
+            del self.history[size:]
+            del self._prefix_tokens[size + 1 :]
+            self._start, self._total_tokens = start, total_tokens
 
     def add_system_message(self, content: str) -> None:
         """Add a system message to the conversation"""
@@ -135,7 +147,7 @@ class Conversation(BaseModel):
         image_str = base64.b64encode(image).decode("utf-8")
         return ChatCompletionImageObject(
             type="image_url",
-            image_url={"url": f"data:image/png;base64,{image_str}"},
+            image_url={"url": f"data:{image_mime_type(image)};base64,{image_str}"},
         )
 
     def format_user_contents(self, contents: list[str | bytes]) -> OpenAIMessageContent:
@@ -243,9 +255,14 @@ class Conversation(BaseModel):
             This converts our internal message format to litellm's format.
             litellm only supports 'assistant' role, so we map all roles to that.
         """
-        return [msg.message for msg in self.history]
+        return [msg.message for msg in self.history[: self._nb_init]] + [
+            msg.message for msg in self.history[self._start :]
+        ]
 
     def reset(self) -> None:
         """Clear all messages from the conversation"""
         self.history.clear()
         self._total_tokens = 0
+        self._prefix_tokens = [0]
+        self._nb_init = self._start = 0
+        self._init_done = False
@@ -10,7 +10,7 @@ from notte_core.browser.observation import Screenshot
 from notte_core.common.config import ScreenshotType, config
 from notte_core.common.tracer import LlmUsageDictTracer
 from notte_core.trajectory import Trajectory
-from notte_core.utils.webp_replay import ScreenshotReplay, WebpReplay
+from notte_core.utils.webp_replay import ReplayEncoder, WebpReplay
 from pydantic import BaseModel, Field, computed_field
 from typing_extensions import override
 
@@ -63,10 +63,7 @@ class AgentResponse(BaseModel):
         if len(screenshots) == 0:
             raise ValueError("No screenshots found in agent trajectory")
 
-        if step_texts:
-            return ScreenshotReplay.from_bytes(screenshots).get(step_text=texts)  # pyright: ignore [reportArgumentType]
-        else:
-            return ScreenshotReplay.from_bytes(screenshots).get()
+        return WebpReplay(ReplayEncoder().encode(screenshots, step_text=texts if step_texts else None))
 
     def save_actions(self, file_path: str, id_type: Literal["selector", "id"] = "selector") -> None:
         if not file_path.endswith(".json"):
@@ -0,0 +1,94 @@
+// Columnar encoding of the node map returned by buildDomNode.js.
+// Keys and repeated strings (tag names, attribute names, classes, ...) are sent once in a string table,
+// everything else is packed into little-endian typed arrays shipped as base64 strings.
+// Must stay in sync with `decode_columnar_dom_tree` in parsing.py.
+({ rootId, map }) => {
+	const NODE_FIELDS = 10;
+	const BBOX_KEYS = [
+		"x", "y", "width", "height", "scroll_x", "scroll_y",
+		"iframe_offset_x", "iframe_offset_y", "viewport_width", "viewport_height",
+	];
+	const FLAGS = {
+		text: 1,
+		isVisible: 2,
+		isInteractive: 4,
+		isTopElement: 8,
+		shadowRoot: 16,
+		isEditable: 32,
+	};
+
+	const strings = [];
+	const stringIds = new Map();
+	function stringId(value) {
+		if (value === null || value === undefined) return -1;
+		let id = stringIds.get(value);
+		if (id === undefined) {
+			id = strings.length;
+			strings.push(value);
+			stringIds.set(value, id);
+		}
+		return id;
+	}
+
+	function toBase64(typedArray) {
+		const bytes = new Uint8Array(typedArray.buffer, typedArray.byteOffset, typedArray.byteLength);
+		const CHUNK = 0x8000;
+		let binary = "";
+		for (let i = 0; i < bytes.length; i += CHUNK) {
+			binary += String.fromCharCode.apply(null, bytes.subarray(i, i + CHUNK));
+		}
+		return btoa(binary);
+	}
+
+	// ids are allocated sequentially by buildDomNode.js, so they can be used as row indices
+	const count = Object.keys(map).length;
+	const nodes = new Int32Array(count * NODE_FIELDS);
+	const links = [];
+	const bboxes = [];
+
+	for (let index = 0; index < count; index++) {
+		const node = map[`${index}`];
+		const row = index * NODE_FIELDS;
+		if (!node) {
+			nodes.fill(-1, row, row + NODE_FIELDS);
+			continue;
+		}
+		let flags = 0;
+		for (const [key, bit] of Object.entries(FLAGS)) {
+			if (key === "text" ? node.type === "TEXT_NODE" : node[key]) flags |= bit;
+		}
+		nodes[row] = flags;
+		nodes[row + 1] = stringId(node.tagName);
+		nodes[row + 2] = stringId(node.xpath);
+		nodes[row + 3] = stringId(node.text);
+		nodes[row + 4] = node.highlightIndex ?? -1;
+
+		const children = node.children || [];
+		nodes[row + 5] = links.length;
+		nodes[row + 6] = children.length;
+		for (const childId of children) links.push(Number(childId));
+
+		const attributes = Object.entries(node.attributes || {});
+		nodes[row + 7] = links.length;
+		nodes[row + 8] = attributes.length;
+		for (const [name, value] of attributes) links.push(stringId(name), stringId(value));
+
+		if (node.bbox) {
+			nodes[row + 9] = bboxes.length / BBOX_KEYS.length;
+			for (const key of BBOX_KEYS) bboxes.push(node.bbox[key] ?? 0);
+		} else {
+			nodes[row + 9] = -1;
+		}
+	}
+
+	return {
+		rootId,
+		columnar: {
+			count,
+			strings,
+			nodes: toBase64(nodes),
+			links: toBase64(Int32Array.from(links)),
+			bboxes: toBase64(Float64Array.from(bboxes)),
+		},
+	};
+};
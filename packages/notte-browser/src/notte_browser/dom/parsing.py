@@ -1,5 +1,10 @@
+import base64
+import sys
+from array import array
+from functools import cache
 from pathlib import Path
 from typing import Any
+from weakref import WeakKeyDictionary
 
 from loguru import logger
 from notte_core.browser.dom_tree import DomErrorBuffer
@@ -15,6 +20,88 @@ from notte_browser.dom.types import DOMBaseNode, DOMElementNode, DOMTextNode
 from notte_browser.playwright_async_api import Page
 
 DOM_TREE_JS_PATH = Path(__file__).parent / "buildDomNode.js"
+DOM_TREE_ENCODER_JS_PATH = Path(__file__).parent / "encodeDomTree.js"
+DOM_TREE_JS_FUNCTION = "__notteBuildDomTree"
+DOM_TREE_JS_STATE = "__notteDomState"
+# calls the builder installed in the current document, or returns null if the document hasn't been set up yet
+DOM_TREE_JS_CALL = f"""(config) => window.{DOM_TREE_JS_STATE} !== undefined
+    ? window.{DOM_TREE_JS_STATE}.snapshot(config)
+    : null"""
+
+
+@cache
+def dom_tree_js_install_script() -> str:
+    """
+    Script that defines the DOM tree builder once per document (read from disk only once per process).
+
+    It also installs a MutationObserver so that incremental snapshots can tell whether the document changed
+    since the last build. When nothing changed (no mutation, same scroll position and layout size, no iframe
+    or shadow root whose mutations can't be observed), the builder answers `{unchanged: true}` with the id of
+    the previous build instead of walking the DOM again.
+    """
+    return f"""() => {{
+    window.{DOM_TREE_JS_FUNCTION} = {DOM_TREE_JS_PATH.read_text()}
+    const encodeColumnar = {DOM_TREE_ENCODER_JS_PATH.read_text()}
+    const layout = () => [
+        window.scrollX, window.scrollY, window.innerWidth, window.innerHeight,
+        document.documentElement.scrollWidth, document.documentElement.scrollHeight,
+    ].join(",");
+    const state = {{ buildId: null, dirty: true, reusable: false, layout: null }};
+    const observer = new MutationObserver(() => {{ state.dirty = true; }});
+    observer.observe(document, {{ subtree: true, childList: true, attributes: true, characterData: true }});
+    state.snapshot = (config) => {{
+        if (observer.takeRecords().length > 0) state.dirty = true;
+        if (
+            config.incremental && state.reusable && !state.dirty
+            && state.buildId === config.previous_build_id && state.layout === layout()
+        ) {{
+            return {{ rootId: null, unchanged: true, buildId: state.buildId }};
+        }}
+        state.dirty = false;
+        let result = window.{DOM_TREE_JS_FUNCTION}(config);
+        state.layout = layout();
+        state.buildId = `${{Date.now()}}-${{Math.random().toString(36).slice(2)}}`;
+        state.reusable = !Object.values(result.map).some((node) => node.tagName === "iframe" || node.shadowRoot);
+        if (config.columnar) result = encodeColumnar(result);
+        result.buildId = state.buildId;
+        return result;
+    }};
+    window.{DOM_TREE_JS_STATE} = state;
+}}"""
+
+
+# last DOM tree parsed for each page, along with the id of the in-page build it comes from
+_previous_dom_trees: WeakKeyDictionary[Page, tuple[str, DOMBaseNode]] = WeakKeyDictionary()
+
+
+# layout of the columnar payload produced by encodeDomTree.js
+COLUMNAR_NODE_FIELDS = 10
+COLUMNAR_BBOX_KEYS = (
+    "x",
+    "y",
+    "width",
+    "height",
+    "scroll_x",
+    "scroll_y",
+    "iframe_offset_x",
+    "iframe_offset_y",
+    "viewport_width",
+    "viewport_height",
+)
+COLUMNAR_FLAG_TEXT = 1
+COLUMNAR_FLAG_VISIBLE = 2
+COLUMNAR_FLAG_INTERACTIVE = 4
+COLUMNAR_FLAG_TOP_ELEMENT = 8
+COLUMNAR_FLAG_SHADOW_ROOT = 16
+COLUMNAR_FLAG_EDITABLE = 32
+
+
+def _decode_array(typecode: str, data: str) -> "array[Any]":
+    values = array(typecode, base64.b64decode(data))
+    if sys.byteorder == "big":
+        # typed arrays are encoded in little-endian order by the browser
+        values.byteswap()
+    return values
 
 
 class DomTreeDict(TypedDict):
@@ -43,24 +130,46 @@ class ParseDomTreePipe:
         DomErrorBuffer.flush()
         return notte_dom_tree
 
+    @profiler.profiled()
+    @staticmethod
+    async def evaluate_dom_tree(page: Page, dom_config: dict[str, bool | int | str | None]) -> dict[str, Any] | None:
+        """Run the DOM tree builder, only shipping the script to the page once per document"""
+        page_eval: dict[str, Any] | None = await page.evaluate(DOM_TREE_JS_CALL, dom_config)
+        if page_eval is None:
+            # new document (navigation, reload, new tab): install the builder and retry
+            await page.evaluate(dom_tree_js_install_script())
+            page_eval = await page.evaluate(DOM_TREE_JS_CALL, dom_config)
+        return page_eval
+
     @profiler.profiled()
     @staticmethod
     async def parse_dom_tree(page: Page) -> DOMBaseNode:
-        js_code = DOM_TREE_JS_PATH.read_text()
-        dom_config: dict[str, bool | int] = {
+        previous = _previous_dom_trees.get(page) if config.incremental_snapshots else None
+        dom_config: dict[str, bool | int | str | None] = {
             "highlight_elements": config.highlight_elements,
             "focus_element": config.focus_element,
             "viewport_expansion": config.viewport_expansion,
             "enable_pointer_elements": config.enable_pointer_elements,
+            "incremental": config.incremental_snapshots,
+            "columnar": config.columnar_dom_transfer,
+            "previous_build_id": previous[0] if previous is not None else None,
         }
         if config.verbose:
             logger.trace(f"Parsing DOM tree for {page.url} with config: {dom_config}")
-        page_eval: dict[str, Any] | None = await profiler.profiled()(page.evaluate)(js_code, dom_config)
+        page_eval = await ParseDomTreePipe.evaluate_dom_tree(page, dom_config)
+
+        if page_eval is not None and page_eval.get("unchanged") and previous is not None:
+            if config.verbose:
+                logger.trace(f"DOM unchanged since last snapshot for {page.url}, reusing previous tree")
+            return previous[1]
 
         if page_eval is None or page_eval["rootId"] is None:
             raise SnapshotProcessingError(page.url, "Failed to parse HTML to dictionary")
 
-        node = await ParseDomTreePipe._reconstruct_dom_tree(page_eval)
+        if "columnar" in page_eval:
+            node = ParseDomTreePipe.decode_columnar_dom_tree(page_eval["columnar"], page_eval["rootId"])
+        else:
+            node = await ParseDomTreePipe._reconstruct_dom_tree(page_eval)
         parsed = ParseDomTreePipe._parse_node(
             node,
             parent=None,
@@ -71,6 +180,8 @@ class ParseDomTreePipe:
         )
         if parsed is None:
             raise SnapshotProcessingError(page.url, f"Failed to parse DOM tree. Dom Tree is empty. {node}")
+        if config.incremental_snapshots and page_eval.get("buildId") is not None:
+            _previous_dom_trees[page] = (page_eval["buildId"], parsed)
         return parsed
 
     @staticmethod
@@ -81,6 +192,47 @@ class ParseDomTreePipe:
         in_shadow_root: bool,
         iframe_parent_css_paths: list[str],
         notte_selector: str,
+    ) -> DOMBaseNode | None:
+        """Parse the node tree using an explicit stack (deep DOMs would otherwise hit the recursion limit)"""
+        root = ParseDomTreePipe._parse_single_node(
+            node, parent, in_iframe, in_shadow_root, iframe_parent_css_paths, notte_selector
+        )
+        stack: list[tuple[DomTreeDict, DOMBaseNode]] = [(node, root)] if root is not None else []
+        while stack:
+            node_dict, element_node = stack.pop()
+            if not isinstance(element_node, DOMElementNode):
+                continue
+            _iframe_parent_css_paths = element_node.iframe_parent_css_selectors
+            if element_node.tag_name.lower() == "iframe":
+                _iframe_parent_css_paths = _iframe_parent_css_paths + [element_node.css_path]
+
+            children: list[tuple[DomTreeDict, DOMBaseNode]] = []
+            for child in node_dict.get("children", []):
+                if child is not None:
+                    child_node = ParseDomTreePipe._parse_single_node(
+                        node=child,
+                        parent=element_node,
+                        in_iframe=element_node.in_iframe,
+                        iframe_parent_css_paths=_iframe_parent_css_paths,
+                        notte_selector=element_node.notte_selector,
+                        in_shadow_root=element_node.in_shadow_root,
+                    )
+                    if child_node is not None:
+                        children.append((child, child_node))
+
+            element_node.children = [child_node for _, child_node in children]
+            # depth-first, in document order
+            stack.extend(reversed(children))
+        return root
+
+    @staticmethod
+    def _parse_single_node(
+        node: DomTreeDict,
+        parent: "DOMElementNode | None",
+        in_iframe: bool,
+        in_shadow_root: bool,
+        iframe_parent_css_paths: list[str],
+        notte_selector: str,
     ) -> DOMBaseNode | None:
         if node.get("type") == "TEXT_NODE":
             text_node = DOMTextNode(
@@ -110,7 +262,6 @@ class ParseDomTreePipe:
             attributes=attrs,
             highlight_index=highlight_index,
         )
-        _iframe_parent_css_paths = iframe_parent_css_paths
         notte_selector = ":".join([notte_selector, str(hash(xpath)), str(hash(css_path))])
 
         if shadow_root:
@@ -118,7 +269,6 @@ class ParseDomTreePipe:
 
         if tag_name.lower() == "iframe":
             in_iframe = True
-            _iframe_parent_css_paths = _iframe_parent_css_paths + [css_path]
 
         element_node = DOMElementNode(
             tag_name=tag_name,
@@ -140,24 +290,65 @@ class ParseDomTreePipe:
             playwright_selector=node.get("playwright_selector"),
             python_selector=node.get("python_selector"),
         )
+        return element_node
 
-        children: list[DOMBaseNode] = []
-        for child in node.get("children", []):
-            if child is not None:
-                child_node = ParseDomTreePipe._parse_node(
-                    node=child,
-                    parent=element_node,
-                    in_iframe=in_iframe,
-                    iframe_parent_css_paths=_iframe_parent_css_paths,
-                    notte_selector=notte_selector,
-                    in_shadow_root=in_shadow_root,
-                )
-                if child_node is not None:
-                    children.append(child_node)
+    @profiler.profiled()
+    @staticmethod
+    def decode_columnar_dom_tree(columnar: dict[str, Any], root_id: str) -> DomTreeDict:
+        """Build the node tree from the payload of encodeDomTree.js, without recursion"""
+        strings: list[str] = columnar["strings"]
+        nodes: array[int] = _decode_array("i", columnar["nodes"])
+        links: array[int] = _decode_array("i", columnar["links"])
+        bboxes: array[float] = _decode_array("d", columnar["bboxes"])
+        nb_bbox_keys = len(COLUMNAR_BBOX_KEYS)
 
-        element_node.children = children
+        def string(index: int) -> str | None:
+            return strings[index] if index >= 0 else None
 
-        return element_node
+        # nodes are kept untyped: text nodes only carry a subset of the DomTreeDict keys
+        decoded: list[Any] = []
+        for row in range(0, columnar["count"] * COLUMNAR_NODE_FIELDS, COLUMNAR_NODE_FIELDS):
+            flags, tag, xpath, text, highlight, _, _, attr_start, attr_count, bbox = nodes[
+                row : row + COLUMNAR_NODE_FIELDS
+            ]
+            if flags < 0:
+                decoded.append(None)
+                continue
+            if flags & COLUMNAR_FLAG_TEXT:
+                decoded.append(
+                    {"type": "TEXT_NODE", "text": string(text), "isVisible": bool(flags & COLUMNAR_FLAG_VISIBLE)}
+                )
+                continue
+            attributes: dict[str, str | None] = {
+                strings[links[i]]: string(links[i + 1]) for i in range(attr_start, attr_start + 2 * attr_count, 2)
+            }
+            decoded.append(
+                {
+                    "tagName": string(tag),
+                    "xpath": string(xpath),
+                    "attributes": attributes,
+                    "isVisible": bool(flags & COLUMNAR_FLAG_VISIBLE),
+                    "isInteractive": bool(flags & COLUMNAR_FLAG_INTERACTIVE),
+                    "isTopElement": bool(flags & COLUMNAR_FLAG_TOP_ELEMENT),
+                    "isEditable": bool(flags & COLUMNAR_FLAG_EDITABLE),
+                    "shadowRoot": bool(flags & COLUMNAR_FLAG_SHADOW_ROOT),
+                    "highlightIndex": highlight if highlight >= 0 else None,
+                    "bbox": dict(zip(COLUMNAR_BBOX_KEYS, bboxes[bbox * nb_bbox_keys : (bbox + 1) * nb_bbox_keys]))
+                    if bbox >= 0
+                    else None,
+                    "children": [],
+                }
+            )
+
+        # second pass: link children now that every node exists
+        for row, node in zip(range(0, len(nodes), COLUMNAR_NODE_FIELDS), decoded):
+            if node is None or "children" not in node:
+                continue
+            child_start, child_count = nodes[row + 5], nodes[row + 6]
+            node["children"] = [
+                child for child in (decoded[i] for i in links[child_start : child_start + child_count]) if child
+            ]
+        return decoded[int(root_id)]
 
     @staticmethod
     async def _reconstruct_dom_tree(
@@ -166,16 +357,14 @@ class ParseDomTreePipe:
         js_node_map = eval_page["map"]
         js_root_id = eval_page["rootId"]
 
-        def rebuild_dom_tree(node_data: dict[str, Any]):
+        root = js_node_map[js_root_id]
+        stack: list[dict[str, Any]] = [root]
+        while stack:
+            node_data = stack.pop()
             children_ids = node_data.get("children", [])
             children = [js_node_map[child_id] for child_id in children_ids if child_id in js_node_map]
             node_data["children"] = children
-
-            for child in children:
-                _ = rebuild_dom_tree(child)
-
-        root = js_node_map[js_root_id]
-        rebuild_dom_tree(root)
+            stack.extend(children)
 
         return root
 
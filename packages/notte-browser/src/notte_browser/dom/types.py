@@ -51,8 +51,25 @@ class DOMBaseNode:
     def to_dict(self) -> dict[str, str]:
         raise NotImplementedError("to_dict method not implemented for DOMBaseNode")
 
+    def _build_notte_domnode(self, children: list[NotteDomNode]) -> NotteDomNode:  # pyright: ignore[reportUnusedParameter]
+        raise NotImplementedError("_build_notte_domnode method not implemented for DOMBaseNode")
+
     def to_notte_domnode(self) -> NotteDomNode:
-        raise NotImplementedError("to_notte_domnode method not implemented for DOMBaseNode")
+        # post-order traversal with an explicit stack: pages can be deeper than the recursion limit
+        converted: dict[int, NotteDomNode] = {}
+        stack: list[tuple[DOMBaseNode, bool]] = [(self, False)]
+        while stack:
+            dom_node, expanded = stack.pop()
+            if not expanded:
+                stack.append((dom_node, True))
+                stack.extend((child, False) for child in dom_node.children)
+                continue
+            node = dom_node._build_notte_domnode([converted[id(child)] for child in dom_node.children])
+            # second path to set the parent
+            for child in node.children:
+                child.set_parent(node)
+            converted[id(dom_node)] = node
+        return converted[id(self)]
 
     @property
     def name(self) -> str:
@@ -96,7 +113,7 @@ class DOMTextNode(DOMBaseNode):
         return self.text
 
     @override
-    def to_notte_domnode(self) -> NotteDomNode:
+    def _build_notte_domnode(self, children: list[NotteDomNode]) -> NotteDomNode:
         return NotteDomNode(
             id=self.notte_id,
             role=NodeRole.from_value(self.role),
@@ -416,17 +433,17 @@ class DOMElementNode(DOMBaseNode):
         return ""
 
     def _get_text_content(self) -> str:
-        """Recursively get text content from child text nodes."""
-
-        def extract_text(node: DOMBaseNode) -> str:
+        """Get text content from all descendant text nodes, in document order."""
+        texts: list[str] = []
+        stack: list[DOMBaseNode] = [self]
+        while stack:
+            node = stack.pop()
             if isinstance(node, DOMTextNode):
-                return node.text if node.is_visible else ""
+                if node.is_visible:
+                    texts.append(node.text)
             else:
-                children_text = "".join(extract_text(child) for child in node.children)
-                return children_text
-
-        result = extract_text(self)
-        return result
+                stack.extend(reversed(node.children))
+        return "".join(texts)
 
     @override
     def to_dict(self) -> dict[str, Any]:
@@ -439,15 +456,15 @@ class DOMElementNode(DOMBaseNode):
         return base
 
     @override
-    def to_notte_domnode(self) -> NotteDomNode:
+    def _build_notte_domnode(self, children: list[NotteDomNode]) -> NotteDomNode:
         if self.highlight_index is not None and config.highlight_elements:
             assert self.bbox is not None, "Bbox is required for highlighted elements"
-        node = NotteDomNode(
+        return NotteDomNode(
             id=self.notte_id,
             type=NodeType.INTERACTION if (self.is_interactive and self.highlight_index is not None) else NodeType.OTHER,
             role=NodeRole.from_value(self.role),
             text=self.name,
-            children=[child.to_notte_domnode() for child in self.children],
+            children=children,
             attributes=DomAttributes.safe_init(
                 tag_name=self.tag_name,
                 **self.attributes,
@@ -472,7 +489,3 @@ class DOMElementNode(DOMBaseNode):
             ),
             bbox=BoundingBox.model_validate(self.bbox) if self.bbox else None,
         )
-        # second path to set the parent
-        for child in node.children:
-            child.set_parent(node)
-        return node
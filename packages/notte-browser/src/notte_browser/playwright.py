@@ -1,4 +1,6 @@
 import asyncio
+import time
+import weakref
 from abc import ABC, abstractmethod
 from typing import ClassVar
 
@@ -7,7 +9,7 @@ from notte_core.common.config import BrowserType
 from notte_core.common.resource import AsyncResource
 from notte_sdk.types import SessionStartRequest
 from openai import BaseModel
-from pydantic import PrivateAttr
+from pydantic import Field, PrivateAttr
 from typing_extensions import override
 
 from notte_browser.errors import BrowserNotStartedError, CdpConnectionError, FirefoxNotAvailableError
@@ -60,6 +62,16 @@ class PlaywrightManager(BaseModel, BaseWindowManager):
     def set_playwright(self, playwright: Playwright) -> None:
         self._playwright = playwright
 
+    @staticmethod
+    def launch_key(options: BrowserWindowOptions) -> tuple[object, ...]:
+        """Options that require a separate browser process (as opposed to a separate context)"""
+        return (
+            options.browser_type,
+            options.headless,
+            str(options.proxy),
+            tuple(options.get_chrome_args()),
+        )
+
     async def connect_cdp_browser(self, options: BrowserWindowOptions) -> Browser:
         if options.cdp_url is None:
             raise ValueError("CDP URL is required to connect to a browser over CDP")
@@ -172,3 +184,336 @@ class PlaywrightManager(BaseModel, BaseWindowManager):
             resource=resource,
             on_close=on_close,
         )
+
+
+class BrowserPoolStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    warm_context_hits: int = 0
+    launch_latencies: list[float] = Field(default_factory=list)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    @property
+    def avg_launch_latency(self) -> float:
+        if len(self.launch_latencies) == 0:
+            return 0.0
+        return sum(self.launch_latencies) / len(self.launch_latencies)
+
+
+class PooledBrowser(BaseModel):
+    model_config = {  # pyright: ignore[reportUnannotatedClassAttribute]
+        "arbitrary_types_allowed": True
+    }
+    browser: Browser
+    warm_resource: BrowserResource | None = None
+
+
+class PooledPlaywrightManager(PlaywrightManager):
+    """
+    Window manager that keeps `pool_size` pre-launched browsers around.
+
+    Each window gets its own fresh `BrowserContext` on a pooled browser. When the window is closed,
+    the context is discarded and the browser goes back to the pool with a newly pre-warmed context.
+    Windows whose options cannot be served by the pool (CDP, different launch args, empty pool)
+    fall back to a dedicated browser, exactly like `PlaywrightManager`.
+    """
+
+    pool_size: int = 2
+    warm_contexts: bool = True
+    options: BrowserWindowOptions = Field(
+        default_factory=lambda: BrowserWindowOptions.from_request(SessionStartRequest())
+    )
+    stats: BrowserPoolStats = Field(default_factory=BrowserPoolStats)
+    _idle: asyncio.Queue[PooledBrowser] | None = PrivateAttr(default=None)
+    _pooled: list[PooledBrowser] = PrivateAttr(default_factory=list)
+    # serializes starting, filling and stopping the pool: concurrent calls would each launch the missing browsers
+    _lock: asyncio.Lock | None = PrivateAttr(default=None)
+
+    @staticmethod
+    def context_key(options: BrowserWindowOptions) -> tuple[object, ...]:
+        return (
+            options.viewport_width,
+            options.viewport_height,
+            options.user_agent,
+            str(options.proxy),
+        )
+
+    def is_poolable(self, options: BrowserWindowOptions) -> bool:
+        return options.cdp_url is None and self.launch_key(options) == self.launch_key(self.options)
+
+    async def launch_browser(self, options: BrowserWindowOptions) -> Browser:
+        start_time = time.perf_counter()
+        browser = await self.create_playwright_browser(options)
+        self.stats.launch_latencies.append(time.perf_counter() - start_time)
+        return browser
+
+    async def warm_up(self, pooled: PooledBrowser) -> None:
+        if self.warm_contexts and pooled.warm_resource is None:
+            pooled.warm_resource = await self.get_browser_resource(self.options, pooled.browser)
+
+    async def fill_pool(self) -> None:
+        async with self.lock:
+            await self._fill_pool()
+
+    async def _fill_pool(self) -> None:
+        async def _new_pooled_browser() -> PooledBrowser:
+            pooled = PooledBrowser(browser=await self.launch_browser(self.options))
+            await self.warm_up(pooled)
+            return pooled
+
+        missing = self.pool_size - len(self._pooled)
+        if missing <= 0:
+            return
+        pooled_browsers = await asyncio.gather(*[_new_pooled_browser() for _ in range(missing)])
+        for pooled in pooled_browsers:
+            self._pooled.append(pooled)
+            self.idle.put_nowait(pooled)
+        if self.verbose:
+            logger.info(
+                f"🪟 [Browser Pool] {len(self._pooled)} browsers ready (avg launch {self.stats.avg_launch_latency:.2f}s)"
+            )
+
+    @property
+    def idle(self) -> asyncio.Queue[PooledBrowser]:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+        return self._idle
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    @override
+    async def astart(self) -> None:
+        async with self.lock:
+            await super().astart()
+            await self._fill_pool()
+
+    @override
+    async def astop(self) -> None:
+        async with self.lock:
+            for pooled in self._pooled:
+                try:
+                    async with asyncio.timeout(self.BROWSER_OPERATION_TIMEOUT_SECONDS):
+                        await pooled.browser.close()
+                except Exception as e:
+                    logger.error(f"Failed to close pooled browser: {e}")
+            self._pooled = []
+            self._idle = None
+            await super().astop()
+
+    async def recycle(self, pooled: PooledBrowser, resource: BrowserResource) -> None:
+        try:
+            async with asyncio.timeout(self.BROWSER_OPERATION_TIMEOUT_SECONDS):
+                await resource.page.context.close()
+            if not pooled.browser.is_connected():
+                raise BrowserNotStartedError()
+            await self.warm_up(pooled)
+            self.idle.put_nowait(pooled)
+        except Exception as e:
+            logger.error(f"🪟 [Browser Pool] Dropping browser from pool after failed recycle: {e}")
+            if pooled in self._pooled:
+                self._pooled.remove(pooled)
+            if self.is_started():
+                await self.fill_pool()
+
+    async def acquire(self, options: BrowserWindowOptions) -> PooledBrowser | None:
+        if not self.is_poolable(options):
+            return None
+        try:
+            pooled = self.idle.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+        if not pooled.browser.is_connected():
+            self._pooled.remove(pooled)
+            await self.fill_pool()
+            return await self.acquire(options)
+        return pooled
+
+    @override
+    async def new_window(self, options: BrowserWindowOptions | None = None) -> BrowserWindow:
+        # no-op once started, but waits for a concurrent start to finish filling the pool
+        await self.astart()
+        options = options or self.options
+        pooled = await self.acquire(options)
+        if pooled is None:
+            self.stats.misses += 1
+            if self.verbose:
+                logger.info("🪟 [Browser Pool] No pooled browser available, launching a dedicated one")
+            browser = await self.launch_browser(options)
+            resource = await self.get_browser_resource(options, browser)
+
+            async def on_close_dedicated() -> None:
+                try:
+                    async with asyncio.timeout(self.BROWSER_OPERATION_TIMEOUT_SECONDS):
+                        await browser.close()
+                except Exception as e:
+                    logger.error(f"Failed to close window: {e}")
+
+            return BrowserWindow(resource=resource, on_close=on_close_dedicated)
+
+        self.stats.hits += 1
+        resource = pooled.warm_resource
+        pooled.warm_resource = None
+        if resource is not None and self.context_key(resource.options) == self.context_key(options):
+            self.stats.warm_context_hits += 1
+            resource.options = options
+        else:
+            if resource is not None:
+                await resource.page.context.close()
+            resource = await self.get_browser_resource(options, pooled.browser)
+        pooled_resource = resource
+
+        async def on_close() -> None:
+            await self.recycle(pooled, pooled_resource)
+
+        return BrowserWindow(resource=resource, on_close=on_close)
+
+
+class SharedPlaywrightDriver(BaseModel):
+    model_config = {  # pyright: ignore[reportUnannotatedClassAttribute]
+        "arbitrary_types_allowed": True
+    }
+    playwright: Playwright
+    refs: int = 0
+    browsers: dict[tuple[object, ...], Browser] = Field(default_factory=dict)
+
+
+class SharedPlaywrightManager(PlaywrightManager):
+    """
+    Window manager that multiplexes many sessions over a single Playwright driver per event loop.
+
+    All instances running on the same event loop share one driver subprocess and, if `share_browser` is set,
+    one browser process per launch configuration (see `launch_key`). Each window still gets its own
+    `BrowserContext`, so cookies, storage and permissions stay isolated between sessions.
+    `max_concurrent_windows` bounds the number of windows opened through this manager at the same time:
+    extra `new_window` calls wait until a window is closed.
+
+    ```python
+    async with SharedPlaywrightManager(max_concurrent_windows=20) as manager:
+        sessions = [NotteSession(window_manager=manager) for _ in range(20)]
+    ```
+    """
+
+    share_browser: bool = True
+    max_concurrent_windows: int | None = None
+    _drivers: ClassVar[weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, SharedPlaywrightDriver]] = (
+        weakref.WeakKeyDictionary()
+    )
+    _locks: ClassVar[weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]] = weakref.WeakKeyDictionary()
+    # set to the driver's playwright instance while attached
+    _playwright: Playwright | None = PrivateAttr(default=None)
+    _driver: SharedPlaywrightDriver | None = PrivateAttr(default=None)
+    _slots: asyncio.Semaphore | None = PrivateAttr(default=None)
+
+    @staticmethod
+    def lock() -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if loop not in SharedPlaywrightManager._locks:
+            SharedPlaywrightManager._locks[loop] = asyncio.Lock()
+        return SharedPlaywrightManager._locks[loop]
+
+    @property
+    def driver(self) -> SharedPlaywrightDriver:
+        if self._driver is None:
+            raise BrowserNotStartedError()
+        return self._driver
+
+    @property
+    def slots(self) -> asyncio.Semaphore | None:
+        if self.max_concurrent_windows is not None and self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent_windows)
+        return self._slots
+
+    @override
+    async def astart(self) -> None:
+        """Attach to the shared playwright driver of the running event loop, starting it if needed"""
+        if self._driver is not None:
+            return
+        loop = asyncio.get_running_loop()
+        async with self.lock():
+            driver = self._drivers.get(loop)
+            if driver is None:
+                driver = SharedPlaywrightDriver(playwright=await async_playwright().start())
+                self._drivers[loop] = driver
+                if self.verbose:
+                    logger.info("🪟 [Shared Playwright] Started shared playwright driver")
+            driver.refs += 1
+        self._driver = driver
+        self.set_playwright(driver.playwright)
+
+    @override
+    async def astop(self) -> None:
+        """Detach from the shared playwright driver. The last manager to detach stops it"""
+        if self._driver is None:
+            return
+        driver = self._driver
+        self._driver = None
+        self._playwright = None
+        async with self.lock():
+            driver.refs -= 1
+            if driver.refs > 0:
+                return
+            _ = self._drivers.pop(asyncio.get_running_loop(), None)
+            for browser in driver.browsers.values():
+                try:
+                    async with asyncio.timeout(self.BROWSER_OPERATION_TIMEOUT_SECONDS):
+                        await browser.close()
+                except Exception as e:
+                    logger.error(f"Failed to close shared browser: {e}")
+            driver.browsers.clear()
+            await driver.playwright.stop()
+            if self.verbose:
+                logger.info("🪟 [Shared Playwright] Stopped shared playwright driver")
+
+    async def shared_browser(self, options: BrowserWindowOptions) -> Browser:
+        key = self.launch_key(options)
+        async with self.lock():
+            browser = self.driver.browsers.get(key)
+            if browser is None or not browser.is_connected():
+                browser = await self.create_playwright_browser(options)
+                self.driver.browsers[key] = browser
+        return browser
+
+    @override
+    async def new_window(self, options: BrowserWindowOptions | None = None) -> BrowserWindow:
+        if not self.is_started():
+            _ = await self.astart()
+        options = options or BrowserWindowOptions.from_request(SessionStartRequest())
+        slots = self.slots
+        if slots is not None:
+            _ = await slots.acquire()
+        try:
+            owns_browser = not self.share_browser or options.cdp_url is not None
+            browser = (
+                await self.create_playwright_browser(options) if owns_browser else await self.shared_browser(options)
+            )
+            resource = await self.get_browser_resource(options, browser)
+        except Exception:
+            if slots is not None:
+                slots.release()
+            raise
+
+        async def on_close() -> None:
+            try:
+                async with asyncio.timeout(self.BROWSER_OPERATION_TIMEOUT_SECONDS):
+                    if owns_browser:
+                        await browser.close()
+                    else:
+                        await resource.page.context.close()
+            except Exception as e:
+                logger.error(f"Failed to close window: {e}")
+            finally:
+                if slots is not None:
+                    slots.release()
+
+        return BrowserWindow(
+            resource=resource,
+            on_close=on_close,
+        )
@@ -57,17 +57,22 @@ class InteractionOnlyDomNodeRenderingPipe:
         max_len_per_attribute: int | None,
         is_parent_interaction: bool = False,
     ) -> list[str]:
-        if node.type.value == NodeType.TEXT.value:
-            if len(node.children) > 0:
-                raise InvalidInternalCheckError(
-                    check="Text node should not have children",
-                    url=node.get_url(),
-                    dev_advice="This should never happen.",
-                )
-            # Add text only if it doesn't have a highlighted parent
-            if not is_parent_interaction and len(node.text.strip()) > 0:
-                node_texts.append(f"_[:]{node.text.strip()}")
-        else:
+        _ = depth  # unused, kept for backward compatibility
+        # pre-order traversal with an explicit stack: pages can be deeper than the recursion limit
+        stack: list[tuple[DomNode, bool]] = [(node, is_parent_interaction)]
+        while stack:
+            node, is_parent_interaction = stack.pop()
+            if node.type.value == NodeType.TEXT.value:
+                if len(node.children) > 0:
+                    raise InvalidInternalCheckError(
+                        check="Text node should not have children",
+                        url=node.get_url(),
+                        dev_advice="This should never happen.",
+                    )
+                # Add text only if it doesn't have a highlighted parent
+                if not is_parent_interaction and len(node.text.strip()) > 0:
+                    node_texts.append(f"_[:]{node.text.strip()}")
+                continue
             # Add element with highlight_index
             if node.id is not None:
                 is_parent_interaction = True
@@ -75,35 +80,26 @@ class InteractionOnlyDomNodeRenderingPipe:
                 node_texts.append(f"{node.id}[:]{html_description}")
 
             # Process children regardless
-            for child in node.children:
-                _ = InteractionOnlyDomNodeRenderingPipe.format(
-                    node=child,
-                    depth=depth + 1,
-                    node_texts=node_texts,
-                    max_len_per_attribute=max_len_per_attribute,
-                    is_parent_interaction=is_parent_interaction,
-                )
+            stack.extend((child, is_parent_interaction) for child in reversed(node.children))
         return node_texts
 
     @staticmethod
     def children_texts(root_node: DomNode, max_depth: int = -1) -> list[str]:
         texts: list[str] = []
-
-        def collect_text(node: DomNode, current_depth: int) -> None:
+        stack: list[tuple[DomNode, int]] = [(root_node, 0)]
+        while stack:
+            node, current_depth = stack.pop()
             if max_depth != -1 and current_depth > max_depth:
-                return
+                continue
 
             # Skip this branch if we hit a highlighted element (except for the current node)
             if node.id is not None and node.id != root_node.id:
-                return
+                continue
 
             if node.get_role_str() == "text" and len(node.text.strip()) > 0:
                 texts.append(node.text.strip())
             else:
-                for child in node.children:
-                    collect_text(child, current_depth + 1)
-
-        collect_text(root_node, 0)
+                stack.extend((child, current_depth + 1) for child in reversed(node.children))
         return texts
 
     @staticmethod
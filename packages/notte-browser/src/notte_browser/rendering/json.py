@@ -11,6 +11,7 @@ class JsonDomNodeRenderingPipe:
         include_ids: bool,
         include_links: bool,
     ) -> A11yNode:
+        """Dict of a single node, without its children"""
         _dict: A11yNode = {
             "role": node.get_role_str(),
             "name": node.text,
@@ -23,11 +24,6 @@ class JsonDomNodeRenderingPipe:
             if not include_links and "href" in relevant_attrs:
                 del relevant_attrs["href"]
             _dict.update(relevant_attrs)  # type: ignore[arg-type]
-        # add children
-        if len(node.children) > 0:
-            _dict["children"] = [
-                JsonDomNodeRenderingPipe._dom_node_to_dict(child, include_ids, include_links) for child in node.children
-            ]
         return _dict
 
     @staticmethod
@@ -37,11 +33,26 @@ class JsonDomNodeRenderingPipe:
         include_links: bool = False,
         verbose: bool = False,
     ) -> str:
-        dict_node = JsonDomNodeRenderingPipe._dom_node_to_dict(
-            node,
-            include_ids=include_ids,
-            include_links=include_links,
-        )
+        # `json.dumps` of the nested dicts is bounded by the recursion limit: serialize the tree node by node instead,
+        # with the children of each node in a trailing "children" list (same output as dumping the nested dicts)
+        parts: list[str] = []
+        stack: list[DomNode | str] = [node]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                parts.append(item)
+                continue
+            dumped = json.dumps(JsonDomNodeRenderingPipe._dom_node_to_dict(item, include_ids, include_links))
+            if len(item.children) == 0:
+                parts.append(dumped)
+                continue
+            parts.append(dumped[:-1] + ', "children": [')
+            stack.append("]}")
+            for i, child in enumerate(reversed(item.children)):
+                stack.append(child)
+                if i < len(item.children) - 1:
+                    stack.append(", ")
+        rendered = "".join(parts)
         if verbose:
-            logger.trace(f"🔍 JSON rendering:\n{dict_node}")
-        return json.dumps(dict_node)
+            logger.trace(f"🔍 JSON rendering:\n{rendered}")
+        return rendered
@@ -25,47 +25,52 @@ class MarkdownDomNodeRenderingPipe:
         include_ids: bool = True,
         expand_non_interaction_subtree: bool = False,
     ) -> str:
-        indent = " " * indent_level
+        # pre-order traversal with an explicit stack (pages can be deeper than the recursion limit):
+        # items are either nodes to format at an indent level or text to emit as is
+        parts: list[str] = []
+        stack: list[tuple[DomNode, int] | str] = [(node, indent_level)]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                parts.append(item)
+                continue
+            node, indent_level = item
+            indent = " " * indent_level
 
-        # Start with role and optional text
-        id_str = ""
-        if node.id is not None and include_ids:
-            id_str = f" {node.id}"
+            # Start with role and optional text
+            id_str = ""
+            if node.id is not None and include_ids:
+                id_str = f" {node.id}"
 
-        result = f"{indent}{node.get_role_str()}{id_str}"
-        if len(node.text.strip()) > 0:
-            result += f' "{node.text}"'
+            result = f"{indent}{node.get_role_str()}{id_str}"
+            if len(node.text.strip()) > 0:
+                result += f' "{node.text}"'
 
-        # iterate dom attributes
-        if node.attributes is not None:
-            dom_attrs = [
-                f"{key}={value}"
-                for key, value in node.attributes.relevant_attrs().items()
-                if str(value) not in node.text
-            ]
+            # iterate dom attributes
+            if node.attributes is not None:
+                dom_attrs = [
+                    f"{key}={value}"
+                    for key, value in node.attributes.relevant_attrs().items()
+                    if str(value) not in node.text
+                ]
 
-            if dom_attrs:
-                # TODO: prompt engineering to select the most readable format
-                # for the LLM to understand this information
-                result += " " + " ".join(dom_attrs)
+                if dom_attrs:
+                    # TODO: prompt engineering to select the most readable format
+                    # for the LLM to understand this information
+                    result += " " + " ".join(dom_attrs)
 
-        # Recursively format children
-        if len(node.children) > 0:
-            result += " {\n"
-            for child in node.children:
+            if len(node.children) == 0:
+                parts.append(result + "\n")
+                continue
+            parts.append(result + " {\n")
+            # format children (pushed in reverse order, before the closing bracket)
+            stack.append(indent + "}\n")
+            for child in reversed(node.children):
                 if len(child.subtree_ids) == 0 and not expand_non_interaction_subtree:
                     inner_text = child.inner_text().strip()
                     if len(inner_text) > 0:
-                        result += f"{indent} inner_text: {inner_text}\n"
+                        stack.append(f"{indent} inner_text: {inner_text}\n")
                 else:
-                    result += MarkdownDomNodeRenderingPipe.format(
-                        child,
-                        indent_level + 1,
-                        include_ids=include_ids,
-                        expand_non_interaction_subtree=expand_non_interaction_subtree,
-                    )
-            result += indent + "}\n"
-        else:
-            result += "\n"
+                    stack.append((child, indent_level + 1))
 
-        return result
+        return "".join(parts)
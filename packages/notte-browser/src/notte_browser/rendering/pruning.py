@@ -89,10 +89,9 @@ def _fold_single_child(parent: DomNode, child: DomNode) -> DomNode:
             return parent
 
 
-def fold_single_childs(node: DomNode) -> DomNode:
+def _fold_children(node: DomNode, pruned_children: list[DomNode]) -> DomNode:
     if len(node.children) == 0:
         return node
-    pruned_children = [fold_single_childs(child) for child in node.children]
     if len(pruned_children) == 1:
         return _fold_single_child(node, pruned_children[0])
     return DomNode(
@@ -106,6 +105,21 @@ def fold_single_childs(node: DomNode) -> DomNode:
     )
 
 
+def fold_single_childs(node: DomNode) -> DomNode:
+    # post-order traversal with an explicit stack: pages can be deeper than the recursion limit
+    folded: dict[int, DomNode] = {}
+    stack: list[tuple[DomNode, bool]] = [(node, False)]
+    while stack:
+        current, expanded = stack.pop()
+        if not expanded:
+            stack.append((current, True))
+            stack.extend((child, False) for child in current.children)
+            continue
+        pruned_children = [folded[id(child)] for child in current.children]
+        folded[id(current)] = _fold_children(current, pruned_children)
+    return folded[id(node)]
+
+
 def prune_hidden_nodes(node: DomNode) -> bool:
     if node.attributes is None:
         return True
@@ -34,8 +34,8 @@ class NodeResolutionPipe:
         if not isinstance(action, InteractionAction):
             raise InvalidActionError("unknown", f"action is not an interaction action: {action.type}")
         # resolve selector
-        selector_map: dict[str, InteractionDomNode] = {inode.id: inode for inode in snapshot.interaction_nodes()}
-        is_id_resolved = action.id in selector_map
+        node = snapshot.interaction_node(action.id)
+        is_id_resolved = node is not None
         if action.selector is not None:
             # skip resolution if selector is provided
             if not is_id_resolved and len(action.id) > 0:
@@ -44,9 +44,8 @@ class NodeResolutionPipe:
                 )
             return action
 
-        if not is_id_resolved:
+        if node is None:
             raise InvalidActionError(action_id=action.id, reason=f"action '{action.id}' not found in page context.")
-        node = selector_map[action.id]
         action.selector = NodeResolutionPipe.resolve_selectors(node, verbose)
         action.text_label = node.text
         return action
@@ -1,9 +1,13 @@
+import asyncio
+from typing import ClassVar
+
 from loguru import logger
 from notte_core.browser.dom_tree import DomNode, InteractionDomNode
 from notte_core.browser.node_type import NodeType
 from notte_core.browser.snapshot import BrowserSnapshot
 from notte_core.data.space import ImageCategory, ImageData
 from notte_core.utils.image import construct_image_url
+from typing_extensions import TypedDict
 
 from notte_browser.dom.locate import locate_element
 from notte_browser.playwright_async_api import Locator, Page
@@ -11,60 +15,108 @@ from notte_browser.resolution import NodeResolutionPipe
 from notte_browser.window import BrowserWindow
 
 
-async def classify_image_element(node: DomNode, locator: Locator | None = None) -> ImageCategory | None:
-    """Classify an image or SVG element.
-
-    Args:
-        locator: Playwright locator for the image/svg element
+class ImageMetadata(TypedDict):
+    tag_name: str
+    role: str | None
+    aria_hidden: str | None
+    aria_label: str | None
+    alt: str | None
+    classes: str
+    src: str | None
+    width: float | None
+    height: float | None
+    svg_content: str | None
+
+
+# everything needed to classify and resolve an image element, collected in a single evaluation
+IMAGE_METADATA_JS = """(el) => {
+    const tagName = el.tagName.toLowerCase();
+    const isSvg = tagName === "svg";
+    let width = null;
+    let height = null;
+    if (isSvg) {
+        try {
+            const bbox = el.getBBox();
+            width = bbox.width;
+            height = bbox.height;
+        } catch (e) {}
+    } else {
+        width = (el.naturalWidth || el.width) ?? null;
+        height = (el.naturalHeight || el.height) ?? null;
+    }
+    return {
+        tag_name: tagName,
+        role: el.getAttribute("role"),
+        aria_hidden: el.getAttribute("aria-hidden"),
+        aria_label: el.getAttribute("aria-label"),
+        alt: el.getAttribute("alt"),
+        // svg elements `className` is not a string
+        classes: el.getAttribute("class") || "",
+        src: el.getAttribute("src") || el.getAttribute("data-src") || el.getAttribute("srcset")
+            || el.currentSrc || el.src || null,
+        width: width,
+        height: height,
+        svg_content: isSvg ? el.outerHTML : null,
+    };
+}"""
+
+BATCH_IMAGE_METADATA_JS = f"""(xpaths) => {{
+    const metadata = {IMAGE_METADATA_JS};
+    return xpaths.map((xpath) => {{
+        if (!xpath) return null;
+        try {{
+            const el = document.evaluate(xpath, document, null,
+                XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            return el instanceof Element ? metadata(el) : null;
+        }} catch (e) {{
+            return null;
+        }}
+    }});
+}}"""
+
+
+async def image_metadata(locator: Locator) -> ImageMetadata:
+    return await locator.evaluate(IMAGE_METADATA_JS)
+
+
+async def batch_image_metadata(page: Page, image_nodes: list[DomNode]) -> list[ImageMetadata | None]:
+    """
+    Metadata of all the image nodes in a single `page.evaluate` call.
 
-    Returns:
-        tuple[ImageType, str | None]: Element classification and source/content
+    Nodes that can't be located by xpath from the main document (iframes, shadow roots) are `None`.
     """
-    if node.attributes is not None:
-        tag_name: str = node.attributes.tag_name
-    else:
-        if locator is None:
-            return None
-        # First check if it's an SVG
-        tag_name = await locator.evaluate("el => el.tagName.toLowerCase()")
+    xpaths: list[str | None] = []
+    for node in image_nodes:
+        selectors = node.computed_attributes.selectors
+        if selectors is None or selectors.in_iframe or selectors.in_shadow_root or not selectors.xpath_selector:
+            xpaths.append(None)
+        else:
+            xpaths.append(selectors.xpath_selector)
+    if all(xpath is None for xpath in xpaths):
+        return [None] * len(image_nodes)
+    try:
+        return await page.evaluate(BATCH_IMAGE_METADATA_JS, xpaths)
+    except Exception as e:
+        logger.debug(f"Failed to collect image metadata in batch: {e}")
+        return [None] * len(image_nodes)
+
 
+def classify_image_metadata(node: DomNode, metadata: ImageMetadata) -> ImageCategory:
+    tag_name = node.attributes.tag_name if node.attributes is not None else metadata["tag_name"]
     if tag_name == "svg":
-        if locator is None:
-            return None
-        return await classify_svg(locator)
-    else:
-        if locator is None:
-            return None
-        return await classify_raster_image(locator)
+        return classify_svg_metadata(metadata)
+    return classify_raster_image_metadata(metadata)
 
 
-async def classify_svg(
-    locator: Locator,
-    return_svg_content: bool = False,  # type: ignore[unused-argument]
-) -> ImageCategory:
-    """Classify an SVG element specifically."""
+def classify_svg_metadata(metadata: ImageMetadata) -> ImageCategory:
+    """Classify an SVG element from its metadata."""
     # Common SVG attributes that might indicate purpose
-    role = await locator.get_attribute("role")
-    # aria_hidden = await locator.get_attribute("aria-hidden")
-    aria_label = await locator.get_attribute("aria-label")
-    classes = (await locator.get_attribute("class") or "").lower()
-
-    # Get SVG dimensions
-    dimensions = await locator.evaluate(
-        """el => {
-        const bbox = el.getBBox();
-        return {
-            width: bbox.width,
-            height: bbox.height
-        }
-    }"""
-    )
-
-    # Get SVG content for debugging/identification
-    # svg_content = (await locator.evaluate("el => el.outerHTML")) if return_svg_content else None
+    role = metadata["role"]
+    aria_label = metadata["aria_label"]
+    classes = metadata["classes"].lower()
 
     # Classify SVG
-    width, height = dimensions["width"], dimensions["height"]
+    width, height = metadata["width"], metadata["height"]
     if width is None or height is None:
         return ImageCategory.SVG_CONTENT
     is_likely_icon = (
@@ -82,26 +134,16 @@ async def classify_svg(
         return ImageCategory.SVG_CONTENT
 
 
-async def classify_raster_image(locator: Locator) -> ImageCategory:
-    """Classify a regular image element."""
-    # Get element properties
-    role = await locator.get_attribute("role")
-    aria_hidden = await locator.get_attribute("aria-hidden")
-    aria_label = await locator.get_attribute("aria-label")
-    alt = await locator.get_attribute("alt")
-    classes = (await locator.get_attribute("class") or "").lower()
+def classify_raster_image_metadata(metadata: ImageMetadata) -> ImageCategory:
+    """Classify a regular image element from its metadata."""
+    role = metadata["role"]
+    aria_hidden = metadata["aria_hidden"]
+    aria_label = metadata["aria_label"]
+    alt = metadata["alt"]
+    classes = metadata["classes"].lower()
     presentation = role == "presentation"
 
-    # Try to get dimensions
-    dimensions: dict[str, int | None] = await locator.evaluate(
-        """el => {
-        return {
-            width: el.naturalWidth || el.width,
-            height: el.naturalHeight || el.height
-        }
-    }"""
-    )
-    width, height = dimensions["width"], dimensions["height"]
+    width, height = metadata["width"], metadata["height"]
     if width is None or height is None:
         return ImageCategory.SVG_CONTENT
 
@@ -147,39 +189,6 @@ async def resolve_image_conflict(page: Page, node: DomNode, image_node: Interact
     return None
 
 
-async def get_image_src(node: DomNode, locator: Locator | None = None) -> str | None:
-    # first check dom node
-    if node.attributes is not None:
-        resource_url = node.attributes.get_resource_url()
-        if resource_url is not None:
-            return resource_url
-
-    if locator is None:
-        return None
-    # Try different common image source attributes
-    for attr in ["src", "data-src", "srcset"]:
-        src: str | None = await locator.get_attribute(attr)
-        if src:
-            return src
-
-    # If still no success, try evaluating directly
-    src = await locator.evaluate(
-        """element => {
-        // Get computed src
-        return element.currentSrc || element.src || element.getAttribute('data-src');
-    }"""
-    )
-
-    return src
-
-
-async def get_svg_content(locator: Locator | None = None) -> str | None:
-    """Get the content of an SVG element."""
-    if locator is None:
-        return None
-    return await locator.evaluate("el => el.outerHTML")
-
-
 async def get_parent_inner_text(dom_node: DomNode, max_depth: int = 3) -> str | None:
     """Get the inner text of an element."""
     if max_depth <= 0:
@@ -194,11 +203,25 @@ async def get_parent_inner_text(dom_node: DomNode, max_depth: int = 3) -> str |
     return None
 
 
+def resolve_image_src(node: DomNode, metadata: ImageMetadata | None) -> str | None:
+    # first check dom node
+    if node.attributes is not None:
+        resource_url = node.attributes.get_resource_url()
+        if resource_url is not None:
+            return resource_url
+    if metadata is None:
+        return None
+    return metadata["src"]
+
+
 class ImageScrapingPipe:
     """
     Data scraping pipe that scrapes images from the page
     """
 
+    # maximum number of images resolved concurrently when they can't be found from the batched metadata
+    max_concurrent_images: ClassVar[int] = 16
+
     def __init__(self, verbose: bool = False) -> None:
         self.verbose: bool = verbose
 
@@ -212,9 +235,27 @@ class ImageScrapingPipe:
                 description=f"Favicon for {snapshot.clean_url}",
             )
         ]
-        from tqdm import tqdm
+        # one round-trip for all the images, then per-image work for the ones the batch couldn't locate
+        metadata = await batch_image_metadata(window.page, image_nodes)
+        semaphore = asyncio.Semaphore(self.max_concurrent_images)
+
+        async def scrape(i: int, node: DomNode, node_metadata: ImageMetadata | None) -> ImageData | None:
+            async with semaphore:
+                return await self.scrape_image(window, snapshot, i, node, node_metadata)
+
+        images = await asyncio.gather(*[scrape(i, node, m) for i, (node, m) in enumerate(zip(image_nodes, metadata))])
+        out_images.extend(image for image in images if image is not None)
+        return out_images
 
-        for i, node in tqdm(enumerate(image_nodes)):
+    async def scrape_image(
+        self,
+        window: BrowserWindow,
+        snapshot: BrowserSnapshot,
+        i: int,
+        node: DomNode,
+        metadata: ImageMetadata | None,
+    ) -> ImageData | None:
+        if metadata is None:
             locator = await resolve_image_conflict(
                 page=window.page,
                 node=snapshot.dom_node,
@@ -228,38 +269,34 @@ class ImageScrapingPipe:
                     computed_attributes=node.computed_attributes,
                 ),
             )
-            # if image_src is None:
-            #     logger.debug(f"No src attribute found for image node {node.id}")
-            #     continue
-            category = await classify_image_element(node, locator)
-            image_src = await get_image_src(node, locator)
-            if image_src is not None:
-                if len(image_src) > 0 and image_src != snapshot.metadata.url:
-                    original_url = image_src
-                    image_src = construct_image_url(
-                        base_page_url=snapshot.metadata.url,
-                        image_src=image_src,
-                    )
-                    if image_src == snapshot.metadata.url:
-                        raise ValueError(
-                            f"Image src is the same as the page url for image node {node.id} but original url is {original_url}"
-                        )
-                else:
-                    # manually reset the image_src to None if it's empty
-                    # or the same as the page url (likely just a href)
-                    image_src = None
-            if image_src is None and category is ImageCategory.SVG_CONTENT:
-                image_src = await get_svg_content(locator)
-
-            if locator is None and (category is None or image_src is None):
-                if self.verbose:
-                    logger.debug(f"No locator found for image node {node.id}")
-                continue
-            out_images.append(
-                ImageData(
-                    category=category,
-                    url=image_src,
-                    description=await get_parent_inner_text(node),
+            if locator is not None:
+                metadata = await image_metadata(locator)
+        category = classify_image_metadata(node, metadata) if metadata is not None else None
+        image_src = resolve_image_src(node, metadata)
+        if image_src is not None:
+            if len(image_src) > 0 and image_src != snapshot.metadata.url:
+                original_url = image_src
+                image_src = construct_image_url(
+                    base_page_url=snapshot.metadata.url,
+                    image_src=image_src,
                 )
-            )
-        return out_images
+                if image_src == snapshot.metadata.url:
+                    raise ValueError(
+                        f"Image src is the same as the page url for image node {node.id} but original url is {original_url}"
+                    )
+            else:
+                # manually reset the image_src to None if it's empty
+                # or the same as the page url (likely just a href)
+                image_src = None
+        if image_src is None and category is ImageCategory.SVG_CONTENT and metadata is not None:
+            image_src = metadata["svg_content"]
+
+        if metadata is None and (category is None or image_src is None):
+            if self.verbose:
+                logger.debug(f"No locator found for image node {node.id}")
+            return None
+        return ImageData(
+            category=category,
+            url=image_src,
+            description=await get_parent_inner_text(node),
+        )
@@ -1,8 +1,8 @@
-from typing import final
+from typing import ClassVar, final
 
 from html2text import config as html2text_config
 from loguru import logger
-from notte_core.browser.snapshot import BrowserSnapshot
+from notte_core.browser.snapshot import BrowserSnapshot, SnapshotCapturePlan
 from notte_core.common.config import ScrapingType, config
 from notte_core.data.space import DataSpace
 from notte_core.llms.service import LLMService
@@ -23,6 +23,9 @@ class DataScrapingPipe:
     Data scraping pipe that scrapes data from the page
     """
 
+    # markdown is extracted from the raw html and images from the DOM tree: screenshots are never used
+    capture: ClassVar[SnapshotCapturePlan] = SnapshotCapturePlan(html=True, screenshot=False)
+
     def __init__(
         self,
         llmserve: LLMService,
@@ -17,8 +17,8 @@ from notte_core.actions import (
     ScrapeAction,
     ToolAction,
 )
-from notte_core.browser.observation import ExecutionResult, Observation
-from notte_core.browser.snapshot import BrowserSnapshot
+from notte_core.browser.observation import ExecutionResult, Observation, ScreenshotOptions
+from notte_core.browser.snapshot import BrowserSnapshot, SnapshotCapturePlan
 from notte_core.common.config import PerceptionType, RaiseCondition, ScreenshotType, config
 from notte_core.common.logging import timeit
 from notte_core.common.resource import AsyncResource, SyncResource
@@ -32,7 +32,7 @@ from notte_core.profiling import profiler
 from notte_core.space import ActionSpace
 from notte_core.storage import BaseStorage
 from notte_core.trajectory import Trajectory
-from notte_core.utils.webp_replay import ScreenshotReplay, WebpReplay
+from notte_core.utils.webp_replay import ReplayEncoder, WebpReplay, most_common_size
 from notte_sdk.types import (
     CookieDict,
     ExecutionRequest,
@@ -59,7 +59,7 @@ from notte_browser.errors import (
     NoStorageObjectProvidedError,
     NoToolProvidedError,
 )
-from notte_browser.playwright import PlaywrightManager
+from notte_browser.playwright import BaseWindowManager, PlaywrightManager
 from notte_browser.playwright_async_api import Locator, Page
 from notte_browser.resolution import NodeResolutionPipe
 from notte_browser.scraping.pipe import DataScrapingPipe
@@ -74,6 +74,8 @@ enable_nest_asyncio()
 class NotteSession(AsyncResource, SyncResource):
     observe_max_retry_after_snapshot_update: ClassVar[int] = 2
     nb_seconds_between_snapshots_check: ClassVar[int] = 10
+    # observations are built from the DOM tree, the metadata and the screenshot: the raw html is never used
+    observe_capture: ClassVar[SnapshotCapturePlan] = SnapshotCapturePlan(html=False)
 
     @track_usage("local.session.create")
     def __init__(
@@ -84,12 +86,14 @@ class NotteSession(AsyncResource, SyncResource):
         storage: BaseStorage | None = None,
         tools: list[BaseTool] | None = None,
         window: BrowserWindow | None = None,
+        window_manager: BaseWindowManager | None = None,
         **data: Unpack[SessionStartRequestDict],
     ) -> None:
         self._request: SessionStartRequest = SessionStartRequest.model_validate(data)
         if self._request.solve_captchas and not CaptchaHandler.is_available:
             raise CaptchaSolverNotAvailableError()
         self._window: BrowserWindow | None = window
+        self._window_manager: BaseWindowManager | None = window_manager
         self.controller: BrowserController = BrowserController(verbose=config.verbose, storage=storage)
         self.storage: BaseStorage | None = storage
         llmserve = LLMService.from_config()
@@ -128,7 +132,7 @@ class NotteSession(AsyncResource, SyncResource):
     async def astart(self) -> None:
         if self._window is not None:
             return
-        manager = PlaywrightManager()
+        manager = self._window_manager or PlaywrightManager()
         options = BrowserWindowOptions.from_request(self._request)
         self._window = await manager.new_window(options)
 
@@ -181,14 +185,16 @@ class NotteSession(AsyncResource, SyncResource):
 
     @track_usage("local.session.replay")
     def replay(self, screenshot_type: ScreenshotType = config.screenshot_type) -> WebpReplay:
-        screenshots: list[bytes] = [
-            obs.screenshot.bytes(screenshot_type)
-            for obs in self.trajectory.observations()
-            # if obs is not EmptyObservation()
-        ]
-        if len(screenshots) == 0:
+        options = ScreenshotOptions.from_config()
+        # sized like the most common screenshot, not the first one (e.g. an empty observation on about:blank):
+        # highlighting doesn't change the size, read it from the raw screenshots headers
+        size = most_common_size(obs.screenshot.raw for obs in self.trajectory.observations())
+        # screenshots are rendered lazily and encoded one frame at a time
+        screenshots = (obs.screenshot.bytes(screenshot_type, options) for obs in self.trajectory.observations())
+        replay = ReplayEncoder().encode(screenshots, size=options.encoded_size(size) if size is not None else None)
+        if len(replay) == 0:
             raise ValueError("No screenshots found in agent trajectory")
-        return ScreenshotReplay.from_bytes(screenshots).get()
+        return WebpReplay(replay)
 
     # ---------------------------- observe, step functions ----------------------------
 
@@ -217,7 +223,7 @@ class NotteSession(AsyncResource, SyncResource):
                         "Check if page content has changed..."
                     )
                 )
-            check_snapshot = await self.window.snapshot(screenshot=False)
+            check_snapshot = await self.window.snapshot(capture=self.observe_capture)
             if not self.snapshot.compare_with(check_snapshot) and retry > 0:
                 if config.verbose:
                     logger.warning(
@@ -254,7 +260,7 @@ class NotteSession(AsyncResource, SyncResource):
             self.trajectory.append(obs)
             return obs
 
-        self.snapshot = await self.window.snapshot()
+        self.snapshot = await self.window.snapshot(capture=self.observe_capture)
 
         if config.verbose:
             logger.debug(f"ℹ️ previous actions IDs: {[a.id for a in self.previous_interaction_actions or []]}")
@@ -521,7 +527,7 @@ class NotteSession(AsyncResource, SyncResource):
     async def _ascrape(self, **params: Unpack[ScrapeParamsDict]) -> DataSpace:
         return await self._data_scraping_pipe.forward(
             window=self.window,
-            snapshot=await self.window.snapshot(),
+            snapshot=await self.window.snapshot(capture=self._data_scraping_pipe.capture),
             params=ScrapeParams.model_validate(params),
         )
 
@@ -0,0 +1,70 @@
+import hashlib
+import json
+from functools import cache
+
+from loguru import logger
+from notte_core.browser.snapshot import BrowserSnapshot
+from notte_core.common.config import PerceptionType, config
+from notte_core.llms.cache import CompletionCache, LRUCompletionCache, SqliteCompletionCache, TieredCompletionCache
+from notte_core.space import ActionSpace
+from notte_sdk.types import PaginationParams
+from pydantic import ValidationError
+
+
+class ActionSpaceCache:
+    """
+    Action spaces keyed by page: (clean url, interaction nodes fingerprint, perception type, pagination).
+
+    Re-observing an unchanged page (e.g. after a failed action or a wait) returns the cached space without
+    any LLM call. Entries are stored as JSON in the same memory / SQLite tiers as the completion cache,
+    so that the disk tier can be shared across sessions and processes.
+    """
+
+    def __init__(self, store: CompletionCache) -> None:
+        self.store: CompletionCache = store
+
+    @staticmethod
+    def key(snapshot: BrowserSnapshot, perception_type: PerceptionType, pagination: PaginationParams) -> str:
+        payload = json.dumps(
+            {
+                "url": snapshot.clean_url,
+                "fingerprint": snapshot.dom_node.interaction_fingerprint,
+                "perception_type": perception_type.value,
+                "pagination": pagination.model_dump(),
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(
+        self, snapshot: BrowserSnapshot, perception_type: PerceptionType, pagination: PaginationParams
+    ) -> ActionSpace | None:
+        value = self.store.get(self.key(snapshot, perception_type, pagination))
+        if value is None:
+            return None
+        try:
+            return ActionSpace.model_validate_json(value)
+        except ValidationError as e:
+            # e.g. entries written by an older version of the action types
+            logger.debug(f"Ignoring invalid cached action space: {str(e)[:200]}")
+            return None
+
+    def set(
+        self,
+        snapshot: BrowserSnapshot,
+        perception_type: PerceptionType,
+        pagination: PaginationParams,
+        space: ActionSpace,
+    ) -> None:
+        self.store.set(self.key(snapshot, perception_type, pagination), space.model_dump_json())
+
+    @staticmethod
+    @cache
+    def from_config() -> "ActionSpaceCache | None":
+        """Process-wide cache shared by all the sessions (None if caching is disabled)"""
+        if not config.perception_cache:
+            return None
+        memory = LRUCompletionCache(max_entries=config.perception_cache_max_entries)
+        if config.perception_cache_path is None:
+            return ActionSpaceCache(memory)
+        return ActionSpaceCache(TieredCompletionCache([memory, SqliteCompletionCache(config.perception_cache_path)]))
@@ -1,8 +1,10 @@
+import asyncio
 from collections.abc import Sequence
 from typing import ClassVar
 
 from loguru import logger
 from notte_core.actions import InteractionAction
+from notte_core.browser.dom_tree import DomNode
 from notte_core.browser.node_type import NodeCategory
 from notte_core.browser.snapshot import BrowserSnapshot
 from notte_core.common.config import config
@@ -19,7 +21,7 @@ from notte_browser.tagging.action.llm_taging.base import BaseActionListingPipe
 from notte_browser.tagging.action.llm_taging.listing import MainActionListingPipe
 from notte_browser.tagging.action.llm_taging.validation import ActionListValidationPipe
 from notte_browser.tagging.page import PageCategoryPipe
-from notte_browser.tagging.type import PossibleAction
+from notte_browser.tagging.type import PossibleAction, PossibleActionSpace
 
 
 class LlmActionSpacePipe(BaseActionSpacePipe):
@@ -28,6 +30,8 @@ class LlmActionSpacePipe(BaseActionSpacePipe):
     required_action_coverage: ClassVar[float] = 0.95
     max_listing_trials: ClassVar[int] = 3
     include_images: ClassVar[bool] = False
+    # number of uncovered interaction nodes listed by each concurrent prompt (cf. `perception_parallel_listing`)
+    listing_chunk_size: ClassVar[int] = 50
 
     def __init__(self, llmserve: LLMService) -> None:
         self.action_listing_pipe: BaseActionListingPipe = MainActionListingPipe(llmserve)
@@ -45,6 +49,11 @@ class LlmActionSpacePipe(BaseActionSpacePipe):
                 "'max_listing_trials' must be positive",
                 advice="Check the `max_listing_trials` parameter in the `LlmActionSpaceConfig` class.",
             )
+        if self.listing_chunk_size <= 0:
+            raise UnexpectedBehaviorError(
+                "'listing_chunk_size' must be strictly positive",
+                advice="Check the `listing_chunk_size` parameter in the `LlmActionSpacePipe` class.",
+            )
 
     def get_n_trials(
         self,
@@ -115,7 +124,7 @@ class LlmActionSpacePipe(BaseActionSpacePipe):
         # we keep only intersection of current context inodes and previous actions!
         previous_action_list = [action for action in previous_action_list if action.id in inodes_ids]
         # TODO: question, can we already perform a `check_enough_actions` here ?
-        possible_space = await self.action_listing_pipe.forward(snapshot, previous_action_list)
+        possible_space = await self.list_actions(snapshot, previous_action_list)
         _merged_actions = self.merge_action_lists(inodes_ids, possible_space.actions, previous_action_list)
         merged_actions = self.possible_to_interaction(_merged_actions, snapshot)
         # check if we have enough actions to proceed.
@@ -137,14 +146,71 @@ class LlmActionSpacePipe(BaseActionSpacePipe):
                 pagination=pagination,
             )
 
-        space = ActionSpace(
+        return ActionSpace(
             description=possible_space.description,
             interaction_actions=merged_actions,
         )
-        # categorisation should only be done after enough actions have been listed to avoid unecessary LLM calls.
-        if self.doc_categoriser_pipe:
-            space.category = await self.doc_categoriser_pipe.forward(snapshot, space)
-        return space
+
+    def chunk_context(self, snapshot: BrowserSnapshot, ids: set[str]) -> BrowserSnapshot | None:
+        """Subgraph of the snapshot only containing the interaction nodes `ids` (and their ancestors)"""
+
+        def only_chunk_nodes(node: DomNode) -> bool:
+            return not ids.isdisjoint(node.subtree_ids)
+
+        filtered_graph = snapshot.dom_node.subtree_filter(only_chunk_nodes)
+        if filtered_graph is None:
+            return None
+        return snapshot.with_dom_node(filtered_graph)
+
+    async def list_actions(
+        self,
+        snapshot: BrowserSnapshot,
+        previous_action_list: Sequence[InteractionAction],
+    ) -> PossibleActionSpace:
+        """
+        Lists the actions of the snapshot that are not covered by `previous_action_list` yet.
+
+        With `perception_parallel_listing`, the uncovered interaction nodes are partitioned into chunks
+        of `listing_chunk_size` nodes which are listed concurrently, so that large pages only cost one
+        LLM round-trip instead of several sequential listing trials.
+        """
+        previous_ids = {action.id for action in previous_action_list}
+        uncovered_ids = [inode.id for inode in snapshot.interaction_nodes() if inode.id not in previous_ids]
+        if not config.perception_parallel_listing or len(uncovered_ids) <= self.listing_chunk_size:
+            return await self.action_listing_pipe.forward(snapshot, list(previous_action_list))
+
+        chunks = [
+            context
+            for i in range(0, len(uncovered_ids), self.listing_chunk_size)
+            if (context := self.chunk_context(snapshot, set(uncovered_ids[i : i + self.listing_chunk_size])))
+            is not None
+        ]
+        if config.verbose:
+            logger.trace(
+                f"[ActionListing] Listing {len(uncovered_ids)} uncovered actions with {len(chunks)} concurrent prompts"
+            )
+        results = await asyncio.gather(
+            *[self.action_listing_pipe.forward(chunk, list(previous_action_list)) for chunk in chunks],
+            return_exceptions=True,
+        )
+        spaces = [result for result in results if isinstance(result, PossibleActionSpace)]
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if len(spaces) == 0:
+            raise errors[0]
+        if len(errors) > 0 and config.verbose:
+            logger.debug(
+                f"[ActionListing] {len(errors)}/{len(chunks)} listing chunks failed: {[str(e)[:200] for e in errors]}"
+            )
+        # interaction nodes nested in one another can be listed by several chunks: keep the first listing
+        actions: dict[str, PossibleAction] = {}
+        for space in spaces:
+            for action in space.actions:
+                _ = actions.setdefault(action.id, action)
+        return PossibleActionSpace(
+            # chunks are in document order: the first one holds the top of the page
+            description=next((space.description for space in spaces if space.description), ""),
+            actions=list(actions.values()),
+        )
 
     def tagging_context(self, snapshot: BrowserSnapshot) -> BrowserSnapshot:
         if self.include_images:
@@ -167,30 +233,42 @@ class LlmActionSpacePipe(BaseActionSpacePipe):
         pagination: PaginationParams,
     ) -> ActionSpace:
         _snapshot = self.tagging_context(snapshot)
-
-        space = await self.forward_unfiltered(
-            _snapshot,
-            previous_action_list,
-            pagination=pagination,
-            n_trials=self.get_n_trials(
-                nb_nodes=len(snapshot.interaction_nodes()),
-                max_nb_actions=pagination.max_nb_actions,
-            ),
+        # categorisation only needs the snapshot: run it concurrently with the action listing
+        category_task = (
+            asyncio.create_task(self.doc_categoriser_pipe.forward(_snapshot)) if self.doc_categoriser_pipe else None
         )
+        try:
+            space = await self.forward_unfiltered(
+                _snapshot,
+                previous_action_list,
+                pagination=pagination,
+                n_trials=self.get_n_trials(
+                    nb_nodes=len(snapshot.interaction_nodes()),
+                    max_nb_actions=pagination.max_nb_actions,
+                ),
+            )
+        except BaseException:
+            if category_task is not None:
+                _ = category_task.cancel()
+            raise
         return ActionSpace(
             description=space.description,
             interaction_actions=space.interaction_actions,
-            category=space.category,
+            category=await category_task if category_task is not None else None,
         )
 
     def possible_to_interaction(
         self, actions: Sequence[InteractionAction | PossibleAction], snapshot: BrowserSnapshot
     ) -> Sequence[InteractionAction]:
         interaction_actions: list[InteractionAction] = []
-        inodes = {inode.id: inode for inode in snapshot.interaction_nodes()}
         for action in actions:
             if isinstance(action, PossibleAction):
-                inode = inodes[action.id]
+                inode = snapshot.interaction_node(action.id)
+                if inode is None:
+                    raise UnexpectedBehaviorError(
+                        f"Listed action '{action.id}' is not an interaction node of the snapshot",
+                        advice="Actions should be validated against the snapshot interaction nodes before conversion.",
+                    )
                 interaction_actions.append(action.to_interaction(inode))
             else:
                 interaction_actions.append(action)
@@ -11,6 +11,7 @@ from notte_sdk.types import PaginationParams
 from typing_extensions import override
 
 from notte_browser.tagging.action.base import BaseActionSpacePipe
+from notte_browser.tagging.action.cache import ActionSpaceCache
 from notte_browser.tagging.action.llm_taging.pipe import LlmActionSpacePipe
 from notte_browser.tagging.action.simple.pipe import SimpleActionSpacePipe
 
@@ -21,6 +22,7 @@ class MainActionSpacePipe(BaseActionSpacePipe):
         self.llm_pipe: LlmActionSpacePipe = LlmActionSpacePipe(llmserve=llmserve)
         self.simple_pipe: SimpleActionSpacePipe = SimpleActionSpacePipe()
         self.perception_type: PerceptionType = PerceptionType.DEEP
+        self.cache: ActionSpaceCache | None = ActionSpaceCache.from_config()
 
     def with_perception(self, perception_type: PerceptionType) -> Self:
         self.perception_type = perception_type
@@ -32,6 +34,23 @@ class MainActionSpacePipe(BaseActionSpacePipe):
         snapshot: BrowserSnapshot,
         previous_action_list: Sequence[InteractionAction] | None,
         pagination: PaginationParams,
+    ) -> ActionSpace:
+        if self.cache is None:
+            return await self.list_actions(snapshot, previous_action_list, pagination)
+        space = self.cache.get(snapshot, self.perception_type, pagination)
+        if space is not None:
+            if config.verbose:
+                logger.trace(f"♻️ Reusing cached action space for {snapshot.clean_url}")
+            return space
+        space = await self.list_actions(snapshot, previous_action_list, pagination)
+        self.cache.set(snapshot, self.perception_type, pagination, space)
+        return space
+
+    async def list_actions(
+        self,
+        snapshot: BrowserSnapshot,
+        previous_action_list: Sequence[InteractionAction] | None,
+        pagination: PaginationParams,
     ) -> ActionSpace:
         match self.perception_type:
             case PerceptionType.DEEP:
@@ -1,22 +1,101 @@
 import time
+from collections import OrderedDict
+from typing import ClassVar
 
 from loguru import logger
+from notte_core.browser.dom_tree import DomNode
+from notte_core.browser.node_type import NodeRole
 from notte_core.browser.snapshot import BrowserSnapshot
 from notte_core.llms.engine import StructuredContent
 from notte_core.llms.service import LLMService
 from notte_core.space import ActionSpace, SpaceCategory
 
+# pages with a password field and at most this many interactions are login pages: on larger pages (e.g. a
+# homepage with a sign in widget), the password form isn't the main content
+MAX_AUTH_INTERACTIONS = 10
+
+
+def heuristic_category(snapshot: BrowserSnapshot) -> SpaceCategory | None:
+    """
+    Cheap classification from the DOM roles, for the pages that are unambiguous.
+
+    Returns `None` when the LLM should decide.
+    """
+    dialogs = snapshot.dom_node.flatten(
+        keep_filter=lambda node: node.get_role_str() in (NodeRole.DIALOG.value, NodeRole.ALERTDIALOG.value)
+    )
+    if any("cookie" in dialog.inner_text().lower() for dialog in dialogs):
+        return SpaceCategory.MANAGE_COOKIES
+    if len(dialogs) > 0:
+        # modals asking to sign in are 'auth' pages, let the LLM decide
+        return None
+    passwords = snapshot.dom_node.flatten(
+        keep_filter=lambda node: node.attributes is not None and node.attributes.type == "password"
+    )
+    if len(passwords) > 0 and len(snapshot.interaction_nodes()) <= MAX_AUTH_INTERACTIONS:
+        return SpaceCategory.AUTH
+    return None
+
 
 class PageCategoryPipe:
+    # categories are cached per (clean url, DOM structure): repeated observations of a page don't re-classify it
+    max_cached_categories: ClassVar[int] = 256
+    _cache: ClassVar[OrderedDict[tuple[str, str], SpaceCategory]] = OrderedDict()
+    max_headings: ClassVar[int] = 10
+
     def __init__(self, llmserve: LLMService, verbose: bool = False) -> None:
         self.llmserve: LLMService = llmserve
         self.verbose: bool = verbose
 
-    async def forward(self, snapshot: BrowserSnapshot, space: ActionSpace) -> SpaceCategory:
+    @staticmethod
+    def cache_key(snapshot: BrowserSnapshot) -> tuple[str, str]:
+        return snapshot.clean_url, snapshot.dom_node.structural_hash
+
+    def snapshot_description(self, snapshot: BrowserSnapshot) -> str:
+        """Page description built from the snapshot alone, i.e. before the action listing is available"""
+
+        def is_heading(node: DomNode) -> bool:
+            return node.get_role_str() == NodeRole.HEADING.value
+
+        headings = [heading.inner_text() for heading in snapshot.dom_node.flatten(keep_filter=is_heading)]
+        headings = [heading for heading in headings if heading][: self.max_headings]
+        roles: dict[str, int] = {}
+        for inode in snapshot.interaction_nodes():
+            roles[inode.get_role_str()] = roles.get(inode.get_role_str(), 0) + 1
+        return f"""
+- Headings: {" | ".join(headings) or "No headings"}
+- Interactions: {", ".join(f"{count} {role}" for role, count in roles.items()) or "No interactions"}
+""".strip()
+
+    async def forward(self, snapshot: BrowserSnapshot, space: ActionSpace | None = None) -> SpaceCategory:
+        key = self.cache_key(snapshot)
+        category = self._cache.get(key)
+        if category is not None:
+            self._cache.move_to_end(key)
+            if self.verbose:
+                logger.trace(f"🏷️ Page categorisation: {category} (cached)")
+            return category
+
+        category = heuristic_category(snapshot)
+        if category is None:
+            category = await self.llm_category(snapshot, space)
+        elif self.verbose:
+            logger.trace(f"🏷️ Page categorisation: {category} (heuristic)")
+
+        self._cache[key] = category
+        if len(self._cache) > self.max_cached_categories:
+            _ = self._cache.popitem(last=False)
+        return category
+
+    async def llm_category(self, snapshot: BrowserSnapshot, space: ActionSpace | None = None) -> SpaceCategory:
+        if space is not None:
+            page_description = f"- Description: {space.description or 'No description available'}"
+        else:
+            page_description = self.snapshot_description(snapshot)
         description = f"""
 - URL: {snapshot.metadata.url}
 - Title: {snapshot.metadata.title}
-- Description: {space.description or "No description available"}
+{page_description}
 """.strip()
 
         start_time = time.time()
@@ -5,18 +5,19 @@ import time
 from collections.abc import Awaitable
 from http import HTTPStatus
 from pathlib import Path
-from typing import Any, Callable, ClassVar, Self
+from typing import Any, Callable, ClassVar, Self, TypeVar
 
 import httpx
 from loguru import logger
 from notte_core.browser.dom_tree import A11yNode, A11yTree, DomNode
 from notte_core.browser.snapshot import (
     BrowserSnapshot,
+    SnapshotCapturePlan,
     SnapshotMetadata,
     TabsData,
     ViewportData,
 )
-from notte_core.common.config import BrowserType, PlaywrightProxySettings, config
+from notte_core.common.config import BrowserType, PlaywrightProxySettings, ScreenshotFormat, config
 from notte_core.errors.processing import SnapshotProcessingError
 from notte_core.profiling import profiler
 from notte_core.utils.url import is_valid_url
@@ -44,6 +45,23 @@ from notte_browser.errors import (
 )
 from notte_browser.playwright_async_api import CDPSession, Locator, Page, Response
 
+T = TypeVar("T")
+
+# title + viewport values of the current page, collected in a single round-trip
+SNAPSHOT_METADATA_JS = """() => ({
+    title: document.title,
+    scroll_x: window.scrollX,
+    scroll_y: window.scrollY,
+    viewport_width: window.innerWidth,
+    viewport_height: window.innerHeight,
+    total_width: document.documentElement.scrollWidth,
+    total_height: document.documentElement.scrollHeight,
+})"""
+
+
+async def _skipped(value: T) -> T:
+    return value
+
 
 class BrowserWindowOptions(BaseModel):
     headless: bool
@@ -241,26 +259,45 @@ class BrowserWindow(BaseModel):
 
     @profiler.profiled()
     async def snapshot_metadata(self) -> SnapshotMetadata:
+        page, tabs = self.page, self.tabs
+        # one evaluate for the current page, the titles of the other tabs are fetched concurrently
+        values, other_titles = await asyncio.gather(
+            page.evaluate(SNAPSHOT_METADATA_JS),
+            asyncio.gather(*[tab.title() for tab in tabs if tab is not page]),
+        )
+        titles = iter(other_titles)
         return SnapshotMetadata(
-            title=await self.page.title(),
-            url=self.page.url,
+            title=values["title"],
+            url=page.url,
             viewport=ViewportData(
-                scroll_x=int(await self.page.evaluate("window.scrollX")),
-                scroll_y=int(await self.page.evaluate("window.scrollY")),
-                viewport_width=int(await self.page.evaluate("window.innerWidth")),
-                viewport_height=int(await self.page.evaluate("window.innerHeight")),
-                total_width=int(await self.page.evaluate("document.documentElement.scrollWidth")),
-                total_height=int(await self.page.evaluate("document.documentElement.scrollHeight")),
+                scroll_x=int(values["scroll_x"]),
+                scroll_y=int(values["scroll_y"]),
+                viewport_width=int(values["viewport_width"]),
+                viewport_height=int(values["viewport_height"]),
+                total_width=int(values["total_width"]),
+                total_height=int(values["total_height"]),
             ),
-            tabs=[await self.tab_metadata(i) for i, _ in enumerate(self.tabs)],
+            tabs=[
+                TabsData(tab_id=i, title=values["title"] if tab is page else next(titles), url=tab.url)
+                for i, tab in enumerate(tabs)
+            ],
         )
 
+    async def _try_snapshot_metadata(self) -> SnapshotMetadata | None:
+        try:
+            return await self.snapshot_metadata()
+        except PlaywrightError:
+            return None
+
     @profiler.profiled()
     async def screenshot(self, retries: int = config.empty_page_max_retry) -> bytes:
         if retries <= 0:
             raise EmptyPageContentError(url=self.page.url, nb_retries=config.empty_page_max_retry)
         try:
             mask = await self.screenshot_mask.mask(self.page) if self.screenshot_mask is not None else None
+            if config.screenshot_format == ScreenshotFormat.JPEG:
+                # smaller screenshots in the trajectory: JPEG can be captured directly
+                return await self.page.screenshot(mask=mask, type="jpeg", quality=config.screenshot_quality)
             return await self.page.screenshot(mask=mask)
         except PlaywrightTimeoutError:
             if config.verbose:
@@ -268,9 +305,15 @@ class BrowserWindow(BaseModel):
             await self.short_wait()
             return await self.screenshot(retries=retries - 1)
 
+    @profiler.profiled()
+    async def content(self) -> str:
+        return await self.page.content()
+
     async def a11y(self) -> A11yTree | None:
-        a11y_simple: A11yNode | None = await profiler.profiled()(self.page.accessibility.snapshot)()  # type: ignore[attr-defined]
-        a11y_raw: A11yNode | None = await profiler.profiled()(self.page.accessibility.snapshot)(interesting_only=False)  # type: ignore[attr-defined]
+        snapshot = profiler.profiled()(self.page.accessibility.snapshot)  # type: ignore[attr-defined]
+        a11y_simple: A11yNode | None
+        a11y_raw: A11yNode | None
+        a11y_simple, a11y_raw = await asyncio.gather(snapshot(), snapshot(interesting_only=False))  # type: ignore[assignment]
         if a11y_simple is None or a11y_raw is None or len(a11y_simple.get("children", [])) == 0:
             logger.warning("A11y tree is empty, this might cause unforeseen issues")
             return None
@@ -281,21 +324,30 @@ class BrowserWindow(BaseModel):
 
     @profiler.profiled()
     async def snapshot(
-        self, screenshot: bool | None = None, retries: int = config.empty_page_max_retry
+        self, capture: SnapshotCapturePlan | None = None, retries: int = config.empty_page_max_retry
     ) -> BrowserSnapshot:
+        """Snapshot the page, only capturing the artifacts requested by `capture` (all of them concurrently)"""
         if retries <= 0:
             raise EmptyPageContentError(url=self.page.url, nb_retries=config.empty_page_max_retry)
+        capture = capture or SnapshotCapturePlan()
         html_content: str = ""
         dom_node: DomNode | None = None
         snapshot_screenshot = None
+        snapshot_metadata: SnapshotMetadata | None = None
+        a11y_tree: A11yTree | None = None
         try:
-            html_content = await profiler.profiled()(self.page.content)()
             dom_tree_pipe = dom_tree_parsers["default"]
-            snapshot_screenshot, dom_node = await asyncio.gather(self.screenshot(), dom_tree_pipe.forward(self.page))
+            html_content, snapshot_screenshot, a11y_tree, dom_node, snapshot_metadata = await asyncio.gather(
+                self.content() if capture.html else _skipped(""),
+                self.screenshot() if capture.screenshot else _skipped(b""),
+                self.a11y() if capture.a11y else _skipped(None),
+                dom_tree_pipe.forward(self.page),
+                self._try_snapshot_metadata(),
+            )
 
         except SnapshotProcessingError:
             await self.long_wait()
-            return await self.snapshot(screenshot=screenshot, retries=retries - 1)
+            return await self.snapshot(capture=capture, retries=retries - 1)
 
         except Exception as e:
             if "has been closed" in str(e):
@@ -310,20 +362,18 @@ class BrowserWindow(BaseModel):
             if config.verbose:
                 logger.warning(f"Empty page content for {self.page.url}. Retry in {config.wait_retry_snapshot_ms}ms")
             await self.page.wait_for_timeout(config.wait_retry_snapshot_ms)
-            return await self.snapshot(screenshot=screenshot, retries=retries - 1)
+            return await self.snapshot(capture=capture, retries=retries - 1)
 
-        try:
-            snapshot_metadata = await self.snapshot_metadata()
-
-            return BrowserSnapshot(
-                metadata=snapshot_metadata,
-                html_content=html_content,
-                a11y_tree=None,
-                dom_node=dom_node,
-                screenshot=snapshot_screenshot,
-            )
-        except PlaywrightError:
-            return await self.snapshot(screenshot=screenshot, retries=retries - 1)
+        if snapshot_metadata is None:
+            return await self.snapshot(capture=capture, retries=retries - 1)
+
+        return BrowserSnapshot(
+            metadata=snapshot_metadata,
+            html_content=html_content,
+            a11y_tree=a11y_tree,
+            dom_node=dom_node,
+            screenshot=snapshot_screenshot,
+        )
 
     async def goto(self, url: str, tries: int = 3) -> None:
         if url == self.page.url:
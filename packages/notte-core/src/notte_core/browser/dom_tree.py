@@ -1,6 +1,8 @@
+import hashlib
 import time
 from collections.abc import Sequence
 from dataclasses import asdict, dataclass, field
+from functools import cached_property
 from typing import Callable, ClassVar, Required, TypeAlias, TypeVar
 
 from loguru import logger
@@ -352,9 +354,23 @@ class DomNode:
     @override
     def __repr__(self) -> str:
         # only display relevant attributes
-        # recursively display children + indent
-        children_repr = "\n".join([f"  {child.__repr__()}" for child in self.children])
-        return f"{self.__class__.__name__}(id={self.id}, role={self.get_role_str()}, text={self.text[:40]}...)\n{children_repr}"
+        # display children + indent, with an explicit stack: pages can be deeper than the recursion limit
+        parts: list[str] = []
+        stack: list[tuple[DomNode, str] | str] = [(self, "")]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                parts.append(item)
+                continue
+            node, prefix = item
+            parts.append(
+                f"{prefix}{node.__class__.__name__}(id={node.id}, role={node.get_role_str()}, text={node.text[:40]}...)\n"
+            )
+            for i, child in enumerate(reversed(node.children)):
+                stack.append((child, "  "))
+                if i < len(node.children) - 1:
+                    stack.append("\n")
+        return "".join(parts)
 
     def __post_init__(self) -> None:
         subtree_ids: list[str] = [] if self.id is None else [self.id]
@@ -367,31 +383,48 @@ class DomNode:
     def set_parent(self, parent: "DomNode | None") -> None:
         object.__setattr__(self, "parent", parent)
 
-    def inner_text(self, depth: int = 3) -> str:
+    def _leaf_text(self) -> str | None:
         if self.attributes is not None and self.attributes.tag_name.lower() == "input":
             return self.text or self.attributes.placeholder or ""
-
         if self.type == NodeType.TEXT:
             return self.text
-        texts: list[str] = []
-        for child in self.children:
-            # inner text is not allowed to be hidden
-            # or not visible
-            # or disabled
-            child_text = child.inner_text(depth=depth - 1)
-            if len(child_text) == 0:
-                continue
-            elif child.attributes is None:
-                texts.append(child_text)
-            elif child.attributes.hidden is not None and not child.attributes.hidden:
-                continue
-            elif child.attributes.visible is not None and not child.attributes.visible:
+        return None
+
+    def inner_text(self, depth: int = 3) -> str:
+        _ = depth  # never limited the traversal, kept for backward compatibility
+        # post-order traversal with an explicit stack: pages can be deeper than the recursion limit
+        texts: dict[int, str] = {}
+        stack: list[tuple[DomNode, bool]] = [(self, False)]
+        while stack:
+            node, expanded = stack.pop()
+            leaf_text = node._leaf_text()
+            if leaf_text is not None:
+                texts[id(node)] = leaf_text
                 continue
-            elif child.attributes.enabled is not None and not child.attributes.enabled:
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children)
                 continue
-            else:
-                texts.append(child_text)
-        return " ".join(texts)
+            child_texts: list[str] = []
+            for child in node.children:
+                # inner text is not allowed to be hidden
+                # or not visible
+                # or disabled
+                child_text = texts[id(child)]
+                if len(child_text) == 0:
+                    continue
+                elif child.attributes is None:
+                    child_texts.append(child_text)
+                elif child.attributes.hidden is not None and not child.attributes.hidden:
+                    continue
+                elif child.attributes.visible is not None and not child.attributes.visible:
+                    continue
+                elif child.attributes.enabled is not None and not child.attributes.enabled:
+                    continue
+                else:
+                    child_texts.append(child_text)
+            texts[id(node)] = " ".join(child_texts)
+        return texts[id(self)]
 
     def get_role_str(self) -> str:
         if isinstance(self.role, str):
@@ -404,16 +437,64 @@ class DomNode:
             return None
         return attr.notte_selector.split(":")[0]
 
+    # DomNode trees are never modified once built (only parents are set afterwards),
+    # so the indexes below are computed lazily once and stay valid for the lifetime of the node
+
+    @cached_property
+    def _nodes_by_id(self) -> dict[str, "DomNode"]:
+        nodes: dict[str, DomNode] = {}
+        for node in self.flatten(keep_filter=lambda node: node.id is not None):
+            _ = nodes.setdefault(node.id, node)  # pyright: ignore[reportArgumentType]
+        return nodes
+
+    @cached_property
+    def _interaction_nodes(self) -> tuple["InteractionDomNode", ...]:
+        inodes = self.flatten(keep_filter=lambda node: node.is_interaction())
+        return tuple(inode.to_interaction_node() for inode in inodes)
+
+    @cached_property
+    def _interaction_nodes_by_id(self) -> dict[str, "InteractionDomNode"]:
+        inodes: dict[str, InteractionDomNode] = {}
+        for inode in self._interaction_nodes:
+            _ = inodes.setdefault(inode.id, inode)
+        return inodes
+
+    @cached_property
+    def structural_hash(self) -> str:
+        """Hash of the shape of the tree (roles and nesting), ignoring texts and attributes"""
+        digest = hashlib.blake2b(digest_size=16)
+        stack: list[DomNode | None] = [self]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                digest.update(b")")
+                continue
+            digest.update(f"({node.get_role_str()}".encode())
+            # closing marker, so that siblings and children don't hash the same
+            stack.append(None)
+            stack.extend(reversed(node.children))
+        return digest.hexdigest()
+
+    @cached_property
+    def interaction_fingerprint(self) -> str:
+        """Hash of the interaction nodes (ids, roles, texts and selectors): equal for unchanged action spaces"""
+        digest = hashlib.blake2b(digest_size=16)
+        for inode in self._interaction_nodes:
+            selectors = inode.computed_attributes.selectors
+            text_hash = hashlib.blake2b(inode.text.encode(), digest_size=8).hexdigest()
+            selector = "" if selectors is None else f"{selectors.css_selector}|{selectors.xpath_selector}"
+            selector_hash = hashlib.blake2b(selector.encode(), digest_size=8).hexdigest()
+            digest.update(f"{inode.id}:{inode.get_role_str()}:{text_hash}:{selector_hash};".encode())
+        return digest.hexdigest()
+
     def find(self, id: str) -> "InteractionDomNode | None":
-        if self.id == id:
-            if self.is_interaction():
-                return self.to_interaction_node()
-            return self  # pyright: ignore[reportReturnType]
-        for child in self.children:
-            found = child.find(id)
-            if found:
-                return found
-        return None
+        node = self._nodes_by_id.get(id)
+        if node is not None and node.is_interaction():
+            return self._interaction_nodes_by_id[id]
+        return node  # pyright: ignore[reportReturnType]
+
+    def interaction_node(self, id: str) -> "InteractionDomNode | None":
+        return self._interaction_nodes_by_id.get(id)
 
     def is_interaction(self) -> bool:
         if isinstance(self.role, str):
@@ -430,14 +511,15 @@ class DomNode:
         return self.role.category().value == NodeCategory.IMAGE.value
 
     def flatten(self, keep_filter: Callable[["DomNode"], bool] | None = None) -> list["DomNode"]:
-        def inner(node: DomNode, acc: list["DomNode"]) -> list["DomNode"]:
+        acc: list[DomNode] = []
+        stack: list[DomNode] = [self]
+        while stack:
+            node = stack.pop()
             if keep_filter is None or keep_filter(node):
                 acc.append(node)
-            for child in node.children:
-                _ = inner(child, acc)
-            return acc
-
-        return inner(self, [])
+            # reversed so that nodes are visited in document order
+            stack.extend(reversed(node.children))
+        return acc
 
     @staticmethod
     def find_all_matching_subtrees_with_parents(
@@ -445,13 +527,14 @@ class DomNode:
     ) -> Sequence["DomNode"]:
         """TODO: same implementation for A11yNode and DomNode"""
 
-        if predicate(node):
-            return [node]
-
         matches: list[DomNode] = []
-        for child in node.children:
-            matching_subtrees = DomNode.find_all_matching_subtrees_with_parents(child, predicate)
-            matches.extend(matching_subtrees)
+        stack: list[DomNode] = [node]
+        while stack:
+            current = stack.pop()
+            if predicate(current):
+                matches.append(current)
+            else:
+                stack.extend(reversed(current.children))
 
         return matches
 
@@ -477,37 +560,47 @@ class DomNode:
         return dialogs
 
     def interaction_nodes(self) -> Sequence["InteractionDomNode"]:
-        inodes = self.flatten(keep_filter=lambda node: node.is_interaction())
-        return [inode.to_interaction_node() for inode in inodes]
+        return self._interaction_nodes
 
     def image_nodes(self) -> list["DomNode"]:
         return self.flatten(keep_filter=lambda node: node.is_image())
 
     def subtree_filter(self, ft: Callable[["DomNode"], bool], verbose: bool = False) -> "DomNode | None":
-        def inner(node: DomNode) -> DomNode | None:
-            children = node.children
-            if not ft(node):
-                return None
-
-            filtered_children: list[DomNode] = []
-            for child in children:
-                filtered_child = inner(child)
-                if filtered_child is not None:
-                    filtered_children.append(filtered_child)
-                    # need copy the parent
-            if node.id is None and len(filtered_children) == 0 and node.text.strip() == "":
-                return None
-            return DomNode(
-                id=node.id,
-                type=node.type,
-                role=node.role,
-                text=node.text,
-                children=filtered_children,
-                attributes=node.attributes,
-                computed_attributes=node.computed_attributes,
-                parent=node.parent,
-                bbox=node.bbox,
-            )
+        def inner(root: DomNode) -> DomNode | None:
+            # post-order traversal with an explicit stack: pages can be deeper than the recursion limit
+            filtered: dict[int, DomNode | None] = {}
+            stack: list[tuple[DomNode, bool]] = [(root, False)]
+            while stack:
+                node, expanded = stack.pop()
+                if not expanded:
+                    if not ft(node):
+                        filtered[id(node)] = None
+                        continue
+                    stack.append((node, True))
+                    stack.extend((child, False) for child in reversed(node.children))
+                    continue
+
+                filtered_children: list[DomNode] = []
+                for child in node.children:
+                    filtered_child = filtered[id(child)]
+                    if filtered_child is not None:
+                        filtered_children.append(filtered_child)
+                        # need copy the parent
+                if node.id is None and len(filtered_children) == 0 and node.text.strip() == "":
+                    filtered[id(node)] = None
+                    continue
+                filtered[id(node)] = DomNode(
+                    id=node.id,
+                    type=node.type,
+                    role=node.role,
+                    text=node.text,
+                    children=filtered_children,
+                    attributes=node.attributes,
+                    computed_attributes=node.computed_attributes,
+                    parent=node.parent,
+                    bbox=node.bbox,
+                )
+            return filtered[id(root)]
 
         start = time.time()
         snode = inner(self)
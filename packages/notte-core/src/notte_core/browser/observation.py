@@ -1,16 +1,18 @@
 import base64
+import io
 from base64 import b64encode
+from collections import OrderedDict
 from datetime import datetime
-from typing import Annotated, Any
+from typing import Annotated, Any, ClassVar
 
 from PIL import Image
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator
 from typing_extensions import override
 
 from notte_core.actions import ActionUnion
 from notte_core.browser.highlighter import BoundingBox, ScreenshotHighlighter
 from notte_core.browser.snapshot import BrowserSnapshot, SnapshotMetadata, ViewportData
-from notte_core.common.config import ScreenshotType, config
+from notte_core.common.config import ScreenshotFormat, ScreenshotType, config
 from notte_core.data.space import DataSpace
 from notte_core.errors.base import NotteBaseError
 from notte_core.space import ActionSpace
@@ -19,10 +21,87 @@ from notte_core.utils.url import clean_url
 _empty_observation_instance = None
 
 
+class ScreenshotOptions(BaseModel):
+    """How screenshots are encoded before being sent to the LLM or returned to the user"""
+
+    model_config = ConfigDict(frozen=True)  # pyright: ignore[reportUnannotatedClassAttribute]
+
+    format: ScreenshotFormat = ScreenshotFormat.PNG
+    quality: Annotated[int, Field(ge=1, le=100, description="Quality of the JPEG and WEBP encodings")] = 80
+    max_width: Annotated[int | None, Field(gt=0, description="Downscale images wider than this (in pixels)")] = None
+    clip: Annotated[
+        tuple[int, int, int, int] | None,
+        Field(description="Region (x, y, width, height) of the screenshot to keep, in screenshot pixels"),
+    ] = None
+    grayscale: bool = False
+
+    @staticmethod
+    def from_config() -> "ScreenshotOptions":
+        return ScreenshotOptions(
+            format=config.screenshot_format,
+            quality=config.screenshot_quality,
+            max_width=config.screenshot_max_width,
+            grayscale=config.screenshot_grayscale,
+        )
+
+    @property
+    def mime_type(self) -> str:
+        return f"image/{self.format.value}"
+
+    def is_identity(self, data: bytes) -> bool:
+        """Whether encoding `data` with these options would return it unchanged"""
+        from notte_core.utils.image import image_mime_type
+
+        return (
+            image_mime_type(data) == self.mime_type
+            and self.max_width is None
+            and self.clip is None
+            and not self.grayscale
+        )
+
+    def encoded_size(self, size: tuple[int, int]) -> tuple[int, int]:
+        """Size of an image of `size` once encoded with these options (without decoding it)"""
+        width, height = size
+        if self.clip is not None:
+            _, _, width, height = self.clip
+        if self.max_width is not None and width > self.max_width:
+            return self.max_width, max(1, round(height * self.max_width / width))
+        return width, height
+
+    def encode(self, data: bytes) -> bytes:
+        image = Image.open(io.BytesIO(data))
+        if self.clip is not None:
+            x, y, width, height = self.clip
+            image = image.crop((x, y, x + width, y + height))
+        if self.max_width is not None and image.width > self.max_width:
+            height = max(1, round(image.height * self.max_width / image.width))
+            image = image.resize((self.max_width, height), Image.Resampling.LANCZOS)  # pyright: ignore[reportUnknownMemberType]
+        if self.grayscale:
+            image = image.convert("L")
+        elif self.format == ScreenshotFormat.JPEG and image.mode != "RGB":
+            # JPEG has no alpha channel
+            image = image.convert("RGB")
+        output = io.BytesIO()
+        match self.format:
+            case ScreenshotFormat.PNG:
+                image.save(output, format="PNG", optimize=True)
+            case ScreenshotFormat.JPEG:
+                image.save(output, format="JPEG", quality=self.quality, optimize=True)
+            case ScreenshotFormat.WEBP:
+                image.save(output, format="WEBP", quality=self.quality)
+        return output.getvalue()
+
+
 class Screenshot(BaseModel):
     raw: bytes = Field(repr=False)
     bboxes: list[BoundingBox] = Field(default_factory=list)
     last_action_id: str | None = None
+    # highlighted and encoded variants, per (type, last action[, options]): the trajectory keeps every screenshot,
+    # so only the most recently used variants of each screenshot are kept
+    max_cached_variants: ClassVar[int] = 2
+    _variants: OrderedDict[tuple[ScreenshotType, str | None, ScreenshotOptions | None], bytes] = PrivateAttr(
+        default_factory=OrderedDict
+    )
 
     model_config = {  # type: ignore[reportUnknownMemberType]
         "json_encoders": {
@@ -36,9 +115,34 @@ class Screenshot(BaseModel):
         data["raw"] = b64encode(self.raw).decode("utf-8")
         return data
 
-    def bytes(self, type: ScreenshotType | None = None) -> bytes:
-        type = type or ("full" if config.highlight_elements else "raw")
-        # config.highlight_elements
+    @override
+    def __getstate__(self) -> dict[Any, Any]:
+        # rendered variants are caches: don't pickle them (e.g. when spilling the trajectory to disk)
+        state = super().__getstate__()
+        return {**state, "__pydantic_private__": {"_variants": OrderedDict()}}
+
+    def _cached_variant(self, type: ScreenshotType, options: ScreenshotOptions | None) -> bytes | None:
+        key = (type, self.last_action_id, options)
+        variant = self._variants.get(key)
+        if variant is not None:
+            self._variants.move_to_end(key)
+        return variant
+
+    def _cache_variant(self, type: ScreenshotType, options: ScreenshotOptions | None, variant: bytes) -> None:
+        self._variants[(type, self.last_action_id, options)] = variant
+        while len(self._variants) > self.max_cached_variants:
+            _ = self._variants.popitem(last=False)
+
+    def render(self, type: ScreenshotType) -> bytes:
+        if type == "raw":
+            return self.raw
+        rendered = self._cached_variant(type, None)
+        if rendered is None:
+            rendered = self._render(type)
+            self._cache_variant(type, None, rendered)
+        return rendered
+
+    def _render(self, type: ScreenshotType) -> bytes:
         match type:
             case "raw":
                 return self.raw
@@ -52,10 +156,25 @@ class Screenshot(BaseModel):
             case _:  # pyright: ignore[reportUnnecessaryComparison]
                 raise ValueError(f"Invalid screenshot type: {type}")  # pyright: ignore[reportUnreachable]
 
-    def display(self, type: ScreenshotType | None = None) -> "Image.Image | None":
+    def bytes(self, type: ScreenshotType | None = None, options: ScreenshotOptions | None = None) -> bytes:
+        type = type or ("full" if config.highlight_elements else "raw")
+        options = options or ScreenshotOptions.from_config()
+        encoded = self._cached_variant(type, options)
+        if encoded is not None:
+            return encoded
+        rendered = self.render(type)
+        if options.is_identity(rendered):
+            return rendered
+        encoded = options.encode(rendered)
+        self._cache_variant(type, options, encoded)
+        return encoded
+
+    def display(
+        self, type: ScreenshotType | None = None, options: ScreenshotOptions | None = None
+    ) -> "Image.Image | None":
         from notte_core.utils.image import image_from_bytes
 
-        data = self.bytes(type)
+        data = self.bytes(type, options)
         return image_from_bytes(data)
 
 
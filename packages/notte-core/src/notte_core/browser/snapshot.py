@@ -43,6 +43,19 @@ class SnapshotMetadata(BaseModel):
     timestamp: dt.datetime = field(default_factory=lambda: dt.datetime.now())
 
 
+class SnapshotCapturePlan(BaseModel, frozen=True):
+    """
+    Artifacts to capture when snapshotting a page, on top of the DOM tree and the page metadata.
+
+    Skipped artifacts are left empty in the resulting `BrowserSnapshot`
+    (`html_content=""`, `screenshot=b""` and `a11y_tree=None`).
+    """
+
+    html: bool = True
+    screenshot: bool = True
+    a11y: bool = False
+
+
 class BrowserSnapshot(BaseModel):
     metadata: SnapshotMetadata
     html_content: str
@@ -66,8 +79,8 @@ class BrowserSnapshot(BaseModel):
         return clean_url(self.metadata.url)
 
     def compare_with(self, other: "BrowserSnapshot") -> bool:
-        inodes = {node.id for node in self.dom_node.interaction_nodes()}
-        new_inodes = {node.id for node in other.dom_node.interaction_nodes()}
+        inodes = {node.id for node in self.interaction_nodes()}
+        new_inodes = {node.id for node in other.interaction_nodes()}
         identical = inodes == new_inodes
         if not identical:
             logger.trace(f"Interactive nodes changed: {new_inodes.difference(inodes)}")
@@ -76,6 +89,9 @@ class BrowserSnapshot(BaseModel):
     def interaction_nodes(self) -> Sequence[InteractionDomNode]:
         return self.dom_node.interaction_nodes()
 
+    def interaction_node(self, id: str) -> InteractionDomNode | None:
+        return self.dom_node.interaction_node(id)
+
     def with_dom_node(self, dom_node: DomNode) -> "BrowserSnapshot":
         return BrowserSnapshot(
             metadata=self.metadata,
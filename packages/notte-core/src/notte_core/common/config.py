@@ -143,6 +143,29 @@ class PerceptionType(StrEnum):
     DEEP = "deep"
 
 
+class TrajectoryStoreType(StrEnum):
+    """Where trajectory elements are kept.
+
+    With `segment` and `sqlite`, only the most recent elements stay in memory: older ones are spilled to append-only
+    segment files or to a SQLite database, and loaded back when accessed.
+    """
+
+    MEMORY = "memory"
+    SEGMENT = "segment"
+    SQLITE = "sqlite"
+
+
+class ScreenshotFormat(StrEnum):
+    """Encoding of the screenshots sent to the LLM and stored in the trajectory.
+
+    JPEG screenshots are captured as JPEG directly, WEBP screenshots are re-encoded from PNG captures.
+    """
+
+    PNG = "png"
+    JPEG = "jpeg"
+    WEBP = "webp"
+
+
 class RaiseCondition(StrEnum):
     """How to raise an error when the agent fails to complete a step.
 
@@ -154,11 +177,26 @@ class RaiseCondition(StrEnum):
     NEVER = "never"
 
 
+class TraceImageMode(StrEnum):
+    """How the images of the traced LLM conversations are stored.
+
+    Either kept inline (base64), stripped or stored once per content hash next to the traces.
+    """
+
+    KEEP = "keep"
+    STRIP = "strip"
+    HASH = "hash"
+
+
 class NotteConfigDict(TypedDict, total=False):
     # [log]
     level: str
     verbose: bool
     logging_mode: ErrorMode
+    trace_queue_size: int
+    trace_batch_size: int
+    trace_compress: bool
+    trace_images: TraceImageMode
 
     # [llm]
     reasoning_model: str
@@ -168,6 +206,14 @@ class NotteConfigDict(TypedDict, total=False):
     clip_tokens: int
     use_llamux: bool
     temperature: float
+    llm_max_concurrent_calls: int
+    llm_cache: bool
+    llm_cache_max_entries: int
+    llm_cache_path: str | None
+    llm_cache_ttl_seconds: int
+    llm_cache_disk_max_entries: int
+    llm_stream_structured_output: bool
+    llm_prompt_caching: bool
 
     # [browser]
     headless: bool
@@ -176,6 +222,10 @@ class NotteConfigDict(TypedDict, total=False):
     viewport_width: int | None
     viewport_height: int | None
     screenshot_type: ScreenshotType
+    screenshot_format: ScreenshotFormat
+    screenshot_quality: int
+    screenshot_max_width: int | None
+    screenshot_grayscale: bool
     cdp_url: str | None
     browser_type: BrowserType
     browser_backend: BrowserBackend
@@ -187,6 +237,10 @@ class NotteConfigDict(TypedDict, total=False):
     # [perception]
     perception_type: PerceptionType
     perception_model: str | None
+    perception_parallel_listing: bool
+    perception_cache: bool
+    perception_cache_max_entries: int
+    perception_cache_path: str | None
 
     # [scraping]
     scraping_type: ScrapingType
@@ -211,6 +265,8 @@ class NotteConfigDict(TypedDict, total=False):
     focus_element: int
     viewport_expansion: int
     enable_pointer_elements: bool
+    incremental_snapshots: bool
+    columnar_dom_transfer: bool
 
     # [playwright wait/timeout]
     timeout_goto_ms: int
@@ -220,6 +276,11 @@ class NotteConfigDict(TypedDict, total=False):
     wait_short_ms: int
     empty_page_max_retry: int
 
+    # [trajectory]
+    trajectory_store: TrajectoryStoreType
+    trajectory_hot_elements: int
+    trajectory_spill_dir: str | None
+
     # [misc]
     enable_profiling: bool
 
@@ -261,6 +322,10 @@ class NotteConfig(TomlConfig):
     level: str
     verbose: bool
     logging_mode: ErrorMode
+    trace_queue_size: int
+    trace_batch_size: int
+    trace_compress: bool
+    trace_images: TraceImageMode
 
     # [llm]
     reasoning_model: str = LlmModel.default().value
@@ -270,6 +335,14 @@ class NotteConfig(TomlConfig):
     clip_tokens: int
     use_llamux: bool
     temperature: float
+    llm_max_concurrent_calls: int
+    llm_cache: bool
+    llm_cache_max_entries: int
+    llm_cache_path: str | None = None
+    llm_cache_ttl_seconds: int
+    llm_cache_disk_max_entries: int
+    llm_stream_structured_output: bool
+    llm_prompt_caching: bool
 
     # [browser]
     headless: bool
@@ -279,6 +352,10 @@ class NotteConfig(TomlConfig):
     viewport_height: int | None = None
     cdp_url: str | None = None
     screenshot_type: ScreenshotType = "last_action"
+    screenshot_format: ScreenshotFormat = ScreenshotFormat.PNG
+    screenshot_quality: int
+    screenshot_max_width: int | None = None
+    screenshot_grayscale: bool
     browser_type: BrowserType
     browser_backend: BrowserBackend = BrowserBackend.PATCHRIGHT
     web_security: bool
@@ -289,6 +366,10 @@ class NotteConfig(TomlConfig):
     # [perception]
     perception_type: PerceptionType = PerceptionType.DEEP
     perception_model: str | None = None  # if none use reasoning_model
+    perception_parallel_listing: bool
+    perception_cache: bool
+    perception_cache_max_entries: int
+    perception_cache_path: str | None = None
 
     # [scraping]
     scraping_type: ScrapingType
@@ -313,6 +394,8 @@ class NotteConfig(TomlConfig):
     focus_element: int
     viewport_expansion: int
     enable_pointer_elements: bool
+    incremental_snapshots: bool
+    columnar_dom_transfer: bool
 
     # [playwright wait/timeout]
     timeout_goto_ms: int
@@ -322,6 +405,11 @@ class NotteConfig(TomlConfig):
     wait_short_ms: int
     empty_page_max_retry: int
 
+    # [trajectory]
+    trajectory_store: TrajectoryStoreType
+    trajectory_hot_elements: int
+    trajectory_spill_dir: str | None = None
+
     # [misc]
     enable_profiling: bool
 
@@ -1,14 +1,25 @@
 from __future__ import annotations
 
+import atexit
+import base64
 import datetime as dt
+import gzip
+import hashlib
 import json
+import queue
+import threading
+from collections.abc import Callable
+from functools import cache
 from pathlib import Path
 from typing import Any, ClassVar, Protocol
 
 from litellm import AllMessageValues
+from loguru import logger
 from pydantic import BaseModel, Field
 from typing_extensions import override
 
+from notte_core.common.config import TraceImageMode, config
+
 
 class Tracer(Protocol):
     """Protocol for database clients that handle LLM usage logging."""
@@ -21,6 +32,142 @@ class Tracer(Protocol):
 ROOT_DIR = Path(__file__).parent.parent.parent.parent / "traces"
 ROOT_DIR.mkdir(parents=True, exist_ok=True)
 
+# prepares a record in the writer thread, given the directory of the traces file
+TracePreparer = Callable[[dict[str, Any], Path], dict[str, Any]]
+
+
+class JsonlFileWriter:
+    """
+    Appends JSON lines to a file from a background thread, so that tracing never blocks the event loop.
+
+    Records are queued without waiting (and dropped if the queue is full), then prepared, serialized and
+    written in batches (optionally gzip compressed) by the writer thread.
+    """
+
+    def __init__(
+        self,
+        file_path: Path,
+        max_queue_size: int = config.trace_queue_size,
+        batch_size: int = config.trace_batch_size,
+        compress: bool = config.trace_compress,
+        prepare: TracePreparer | None = None,
+    ) -> None:
+        self.file_path: Path = file_path.with_name(file_path.name + ".gz") if compress else file_path
+        self.batch_size: int = batch_size
+        self.compress: bool = compress
+        self.prepare: TracePreparer | None = prepare
+        self.dropped: int = 0
+        self._queue: queue.Queue[dict[str, Any]] = queue.Queue(maxsize=max_queue_size)
+        self._thread: threading.Thread | None = None
+        self._lock: threading.Lock = threading.Lock()
+
+    def write(self, record: dict[str, Any]) -> None:
+        self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 100 == 0:
+                logger.warning(f"⚠️ Trace queue of {self.file_path.name} is full: {self.dropped} records dropped")
+
+    def flush(self) -> None:
+        """Blocks until all the queued records are written"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f"trace-writer-{self.file_path.name}", daemon=True
+                )
+                self._thread.start()
+                # write the pending records before the interpreter exits
+                _ = atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                logger.debug(f"Error writing traces to {self.file_path}: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: list[dict[str, Any]]) -> None:
+        lines: list[str] = []
+        for record in batch:
+            try:
+                if self.prepare is not None:
+                    record = self.prepare(record, self.file_path.parent)
+                lines.append(json.dumps(record) + "\n")
+            except Exception as e:
+                logger.debug(f"Error serializing trace: {str(e)}")
+        if not lines:
+            return
+        data = "".join(lines)
+        if self.compress:
+            # each batch is appended as a separate gzip member, which `gzip.open` reads back as a single stream
+            with gzip.open(self.file_path, "at") as f:
+                _ = f.write(data)
+        else:
+            with open(self.file_path, "a") as f:
+                _ = f.write(data)
+
+
+@cache
+def jsonl_writer(file_path: Path, prepare: TracePreparer | None = None) -> JsonlFileWriter:
+    """Writer shared by all the tracers of `file_path`"""
+    return JsonlFileWriter(file_path, prepare=prepare)
+
+
+def store_image(url: str, root: Path) -> str:
+    """Stores a base64 image in `root/images` (once per content hash) and returns its path relative to `root`"""
+    header, _, data = url.partition(",")
+    if not header.startswith("data:") or not data:
+        return url
+    extension = header.removeprefix("data:").split(";")[0].split("/")[-1] or "bin"
+    content = base64.b64decode(data)
+    path = root / "images" / f"{hashlib.sha256(content).hexdigest()}.{extension}"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _ = path.write_bytes(content)
+    return str(path.relative_to(root))
+
+
+def trace_images(messages: list[dict[str, Any]], mode: TraceImageMode, root: Path) -> list[dict[str, Any]]:
+    if mode == TraceImageMode.KEEP:
+        return messages
+    traced: list[dict[str, Any]] = []
+    for message in messages:
+        content: list[dict[str, Any]] | str | None = message.get("content")
+        if not isinstance(content, list):
+            traced.append(message)
+            continue
+        blocks: list[dict[str, Any]] = []
+        for block in content:
+            if block.get("type") != "image_url":
+                blocks.append(block)
+            elif mode == TraceImageMode.HASH:
+                image_url: dict[str, str] | str = block["image_url"]
+                url = image_url["url"] if isinstance(image_url, dict) else image_url
+                blocks.append({**block, "image_url": {"url": store_image(url, root)}})
+        traced.append({**message, "content": blocks})
+    return traced
+
+
+def prepare_llm_trace(record: dict[str, Any], root: Path) -> dict[str, Any]:
+    return {**record, "messages": trace_images(record["messages"], config.trace_images, root)}
+
 
 class LlmTracer(Tracer):
     @override
@@ -42,12 +189,16 @@ class LlmUsageDictTracer(LlmTracer):
         prompt_tokens: int
         completion_tokens: int
         total_tokens: int
+        cached_tokens: int = 0
+        cache_creation_tokens: int = 0
 
         def add(self, other: LlmUsageDictTracer.LiteLLmUsage) -> LlmUsageDictTracer.LiteLLmUsage:
             return LlmUsageDictTracer.LiteLLmUsage(
                 prompt_tokens=self.prompt_tokens + other.prompt_tokens,
                 completion_tokens=self.completion_tokens + other.completion_tokens,
                 total_tokens=self.total_tokens + other.total_tokens,
+                cached_tokens=self.cached_tokens + other.cached_tokens,
+                cache_creation_tokens=self.cache_creation_tokens + other.cache_creation_tokens,
             )
 
         @classmethod
@@ -126,19 +277,18 @@ class LlmUsageFileTracer(LlmTracer):
         usage: dict[str, int],
         metadata: dict[str, Any] | None = None,
     ) -> None:
-        """Log LLM usage to a file."""
-        with open(self.file_path, "a") as f:
-            json.dump(
-                {
-                    "timestamp": timestamp,
-                    "model": model,
-                    "messages": messages,
-                    "completion": completion,
-                    "usage": usage,
-                },
-                f,
-            )
-            _ = f.write("\n")
+        """Log LLM usage to a file (in the background)."""
+        jsonl_writer(self.file_path, prepare_llm_trace).write(
+            {
+                "timestamp": timestamp,
+                "model": model,
+                # the conversation keeps growing after the call: snapshot the current messages
+                "messages": list(messages),
+                "completion": completion,
+                "usage": usage,
+                "metadata": metadata,
+            }
+        )
 
 
 class LlmParsingErrorFileTracer(Tracer):
@@ -159,15 +309,12 @@ class LlmParsingErrorFileTracer(Tracer):
         nb_retries: int,
         error_msgs: list[str],
     ) -> None:
-        """Log LLM parsing errors to a file."""
-        with open(self.file_path, "a") as f:
-            json.dump(
-                LlmParsingErrorFileTracer.LLmParsingError(
-                    status=status,
-                    pipe_name=pipe_name,
-                    nb_retries=nb_retries,
-                    error_msgs=error_msgs,
-                ).model_dump(),
-                f,
-            )
-            _ = f.write("\n")
+        """Log LLM parsing errors to a file (in the background)."""
+        jsonl_writer(self.file_path).write(
+            LlmParsingErrorFileTracer.LLmParsingError(
+                status=status,
+                pipe_name=pipe_name,
+                nb_retries=nb_retries,
+                error_msgs=error_msgs,
+            ).model_dump()
+        )
@@ -63,3 +63,7 @@ class LLmModelOverloadedError(NotteBaseError):
             agent_message=f"Model {model_name} is overloaded. Please try another model or try again later.",
             should_retry_later=True,
         )
+
+
+class LLMStreamAbortedError(LLMParsingError):
+    """Raised while streaming a structured completion as soon as the output cannot be parsed anymore"""
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Sequence
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+from litellm import AllMessageValues
+from pydantic import BaseModel
+from typing_extensions import override
+
+from notte_core.common.config import config
+
+
+class CompletionCacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def to_dict(self) -> dict[str, int | float]:
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate}
+
+
+class CompletionCache(ABC):
+    """Exact-match cache of serialized LLM completions"""
+
+    def __init__(self) -> None:
+        self.stats: CompletionCacheStats = CompletionCacheStats()
+
+    @staticmethod
+    def key(
+        model: str,
+        messages: list[AllMessageValues],
+        response_format: dict[str, str] | type[BaseModel] | None,
+        temperature: float,
+        n: int = 1,
+    ) -> str:
+        schema: dict[str, Any] | None = (
+            response_format.model_json_schema() if isinstance(response_format, type) else response_format
+        )
+        payload = json.dumps(
+            {
+                "model": model,
+                "messages": messages,
+                "response_format": schema,
+                "temperature": temperature,
+                "n": n,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @abstractmethod
+    def _get(self, key: str) -> str | None:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        pass
+
+    def get(self, key: str) -> str | None:
+        value = self._get(key)
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    @staticmethod
+    @cache
+    def from_config() -> "CompletionCache | None":
+        """Process-wide cache shared by all the services (None if caching is disabled)"""
+        if not config.llm_cache:
+            return None
+        memory = LRUCompletionCache()
+        if config.llm_cache_path is None:
+            return memory
+        return TieredCompletionCache([memory, SqliteCompletionCache(config.llm_cache_path)])
+
+
+class LRUCompletionCache(CompletionCache):
+    def __init__(self, max_entries: int = config.llm_cache_max_entries) -> None:
+        super().__init__()
+        self.max_entries: int = max_entries
+        self._entries: OrderedDict[str, str] = OrderedDict()
+
+    @override
+    def _get(self, key: str) -> str | None:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    @override
+    def set(self, key: str, value: str) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            _ = self._entries.popitem(last=False)
+
+
+class SqliteCompletionCache(CompletionCache):
+    """On-disk cache shared across processes, with a time-to-live and a maximum number of entries"""
+
+    def __init__(
+        self,
+        path: str | Path,
+        ttl_seconds: int = config.llm_cache_ttl_seconds,
+        max_entries: int = config.llm_cache_disk_max_entries,
+    ) -> None:
+        super().__init__()
+        self.path: Path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds: int = ttl_seconds
+        self.max_entries: int = max_entries
+        self._lock: threading.Lock = threading.Lock()
+        self._db: sqlite3.Connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        _ = self._db.execute("PRAGMA journal_mode=WAL")
+        _ = self._db.execute(
+            "CREATE TABLE IF NOT EXISTS completions "
+            + "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+
+    @override
+    def _get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM completions WHERE key = ? AND created_at >= ?", (key, now - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                return None
+            _ = self._db.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    @override
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            _ = self._db.execute(
+                "INSERT OR REPLACE INTO completions (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        _ = self._db.execute("DELETE FROM completions WHERE created_at < ?", (now - self.ttl_seconds,))
+        # least recently used entries above the size limit
+        _ = self._db.execute(
+            "DELETE FROM completions WHERE key IN "
+            + "(SELECT key FROM completions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class TieredCompletionCache(CompletionCache):
+    """Looks up the tiers in order (e.g. memory, then disk) and backfills the faster tiers on hits"""
+
+    def __init__(self, tiers: Sequence[CompletionCache]) -> None:
+        super().__init__()
+        self.tiers: list[CompletionCache] = list(tiers)
+
+    @override
+    def _get(self, key: str) -> str | None:
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for faster in self.tiers[:i]:
+                    faster.set(key, value)
+                return value
+        return None
+
+    @override
+    def set(self, key: str, value: str) -> None:
+        for tier in self.tiers:
+            tier.set(key, value)
@@ -1,13 +1,20 @@
 from __future__ import annotations
 
+import asyncio
+import inspect
+import json
 import re
+from collections.abc import Callable
 from dataclasses import dataclass
-from typing import TypeVar, cast
+from functools import cache
+from typing import Any, ClassVar, TypeVar, cast
+from weakref import WeakKeyDictionary
 
 import litellm
 from litellm import (
     AllMessageValues,
     ChatCompletionUserMessage,
+    Usage,
 )
 from litellm.exceptions import (
     APIError,
@@ -20,13 +27,16 @@ from litellm.exceptions import (
     ContextWindowExceededError as LiteLLMContextWindowExceededError,
 )
 from litellm.files.main import ModelResponse  # pyright: ignore [reportMissingTypeStubs]
+from litellm.litellm_core_utils.streaming_handler import (  # pyright: ignore [reportMissingTypeStubs]
+    CustomStreamWrapper,
+)
 from loguru import logger
 from pydantic import BaseModel, ValidationError
 
 from notte_core.common.config import LlmModel, config
 from notte_core.common.tracer import LlmTracer, LlmUsageFileTracer
 from notte_core.errors.base import NotteBaseError
-from notte_core.errors.llm import LLmModelOverloadedError, LLMParsingError
+from notte_core.errors.llm import LLmModelOverloadedError, LLMParsingError, LLMStreamAbortedError
 from notte_core.errors.provider import (
     ContextWindowExceededError,
     InsufficentCreditsError,
@@ -38,14 +48,46 @@ from notte_core.errors.provider import (
     ModelNotFoundError,
 )
 from notte_core.errors.provider import RateLimitError as NotteRateLimitError
+from notte_core.llms.cache import CompletionCache
 from notte_core.llms.logging import trace_llm_usage
+from notte_core.llms.streaming import IncrementalJsonParser
+from notte_core.llms.tokens import TokenCounter
 from notte_core.profiling import profiler
 
 TResponseFormat = TypeVar("TResponseFormat", bound=BaseModel)
 
 
+@cache
+def default_llm_tracer() -> LlmTracer:
+    """Usage tracer shared by all the engines created without an explicit tracer"""
+    return LlmUsageFileTracer()
+
+
+def cache_breakpoint(message: AllMessageValues) -> AllMessageValues:
+    """Copy of `message` with a `cache_control` breakpoint on its last content block"""
+    content: Any = message.get("content")  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}]
+    if not content:
+        # empty text blocks can't be cached (e.g. assistant tool calls)
+        return message
+    blocks: list[dict[str, Any]] = list(content)
+    blocks[-1] = {**blocks[-1], "cache_control": {"type": "ephemeral"}}
+    return cast(AllMessageValues, cast(object, {**message, "content": blocks}))
+
+
 class LLMEngine:
     PREFIXES: list[str] = ['{"json":', '{"additionalProperties":']  # LLM Response Prefixes
+    # minimum size (in tokens) of the stable prefix to use explicit prompt caching, per provider
+    # (OpenAI and DeepSeek cache prompt prefixes automatically: messages only need to keep a stable order)
+    PROMPT_CACHE_MIN_TOKENS: ClassVar[dict[str, int]] = {
+        "anthropic": 1024,
+        "bedrock": 1024,
+        "vertex_ai": 4096,
+        "gemini": 4096,
+    }
+    # anthropic allows at most 4 cache breakpoints per request
+    MAX_CACHE_BREAKPOINTS: ClassVar[int] = 4
 
     def __init__(
         self,
@@ -53,17 +95,110 @@ class LLMEngine:
         tracer: LlmTracer | None = None,
         nb_retries_structured_output: int = config.nb_retries_structured_output,
         verbose: bool = False,
+        max_concurrent_calls: int = config.llm_max_concurrent_calls,
+        cache: CompletionCache | None = None,
+        prompt_caching: bool = config.llm_prompt_caching,
     ):
         self.model: str = model or LlmModel.default()
         self.sc: StructuredContent = StructuredContent(inner_tag="json", fail_if_inner_tag=False)
 
         if tracer is None:
-            tracer = LlmUsageFileTracer()
+            tracer = default_llm_tracer()
 
         self.tracer: LlmTracer = tracer
         self.completion = trace_llm_usage(tracer=self.tracer)(self.completion)  # pyright: ignore [reportAttributeAccessIssue]
         self.nb_retries_structured_output: int = nb_retries_structured_output
         self.verbose: bool = verbose
+        self.max_concurrent_calls: int = max_concurrent_calls
+        self.cache: CompletionCache | None = cache
+        self.prompt_caching: bool = prompt_caching
+        # engines are long-lived and can be used from several event loops (e.g. sync session API)
+        self._limiters: WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = WeakKeyDictionary()
+
+    def limiter(self) -> asyncio.Semaphore:
+        """Bounds the number of in-flight provider calls of this engine on the running event loop"""
+        loop = asyncio.get_running_loop()
+        limiter = self._limiters.get(loop)
+        if limiter is None:
+            limiter = asyncio.Semaphore(self.max_concurrent_calls)
+            self._limiters[loop] = limiter
+        return limiter
+
+    def _annotate_cache(self, response: ModelResponse, hit: bool) -> ModelResponse:
+        if self.cache is not None:
+            # picked up by `trace_llm_usage` and forwarded to the tracer metadata
+            response._hidden_params["completion_cache"] = {"hit": hit, **self.cache.stats.to_dict()}  # pyright: ignore[reportPrivateUsage, reportUnknownMemberType]
+        return response
+
+    def _cached_completion(self, cache_key: str) -> ModelResponse | None:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            return None
+        response = ModelResponse(**json.loads(cached))
+        # cache hits do not consume any token
+        response.usage = Usage(prompt_tokens=0, completion_tokens=0, total_tokens=0)  # pyright: ignore[reportAttributeAccessIssue]
+        return self._annotate_cache(response, hit=True)
+
+    @staticmethod
+    async def _collect_stream(
+        stream: CustomStreamWrapper, messages: list[AllMessageValues], on_delta: Callable[[str], None]
+    ) -> ModelResponse:
+        chunks: list[Any] = []
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+                delta: str | None = chunk.choices[0].delta.content if chunk.choices else None  # pyright: ignore [reportUnknownMemberType, reportUnknownVariableType]
+                if delta:
+                    # raises `LLMStreamAbortedError` to stop the generation early
+                    on_delta(delta)  # pyright: ignore [reportUnknownArgumentType]
+        finally:
+            await LLMEngine._close_stream(stream)
+        response = litellm.stream_chunk_builder(chunks, messages=messages)  # pyright: ignore [reportUnknownMemberType]
+        if response is None:
+            raise LLMParsingError("Empty streamed completion")
+        return cast(ModelResponse, response)
+
+    @staticmethod
+    async def _close_stream(stream: CustomStreamWrapper) -> None:
+        """
+        Closes the provider connection, so that an aborted generation stops (and stops being billed).
+        litellm's wrapper can't be closed itself: close the provider stream it wraps.
+        """
+        for target in (stream, getattr(stream, "completion_stream", None)):
+            close = getattr(target, "aclose", None) or getattr(target, "close", None)
+            if close is None:
+                continue
+            try:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.debug(f"Failed to close the completion stream: {e}")
+
+    def with_prompt_caching(self, model: str, messages: list[AllMessageValues]) -> list[AllMessageValues]:
+        """
+        Marks the stable prefix of the conversation with `cache_control` breakpoints: the initial system and task
+        messages (identical across agent steps) and the last assistant message (the trajectory only grows).
+        litellm translates them into anthropic cache breakpoints and gemini context caching.
+        """
+        min_tokens = LLMEngine.PROMPT_CACHE_MIN_TOKENS.get(model.split("/")[0])
+        if not self.prompt_caching or min_tokens is None:
+            return messages
+        # leading system messages + first user message (task description)
+        nb_init = next((i for i, m in enumerate(messages) if m["role"] != "system"), len(messages))
+        if nb_init < len(messages) and messages[nb_init]["role"] == "user":
+            nb_init += 1
+        if nb_init == 0 or TokenCounter.for_model(model).count_messages(messages[:nb_init]) < min_tokens:
+            return messages
+        breakpoints = list(range(nb_init))[-(LLMEngine.MAX_CACHE_BREAKPOINTS - 1) :]
+        last_assistant = next(
+            (i for i in reversed(range(nb_init, len(messages))) if messages[i]["role"] == "assistant"), None
+        )
+        if last_assistant is not None:
+            breakpoints.append(last_assistant)
+        return [cache_breakpoint(m) if i in breakpoints else m for i, m in enumerate(messages)]
 
     def context_length(self) -> int:
         return LlmModel.get_provider(self.model).context_length
@@ -75,7 +210,14 @@ class LLMEngine:
         response_format: type[TResponseFormat],
         model: str | None = None,
         use_strict_response_format: bool = True,
+        stream: bool = config.llm_stream_structured_output,
+        on_field: Callable[[str, Any], None] | None = None,
     ) -> TResponseFormat:
+        """
+        If `stream` is True, the completion is parsed while it is generated: `on_field(name, value)` is called
+        as soon as each top-level field of `response_format` is complete and valid, and the generation is
+        aborted (and retried) as soon as the output is malformed.
+        """
         tries = self.nb_retries_structured_output + 1
         content = None
 
@@ -87,10 +229,27 @@ class LLMEngine:
 
         while tries > 0:
             tries -= 1
+            parser = IncrementalJsonParser(response_format, on_field=on_field) if stream else None
             try:
                 content = (
-                    await self.single_completion(messages, model, response_format=litellm_response_format) or ""
+                    await self.single_completion(
+                        messages,
+                        model,
+                        response_format=litellm_response_format,
+                        on_delta=parser.feed if parser is not None else None,
+                    )
+                    or ""
                 ).strip()
+            except LLMStreamAbortedError as e:
+                logger.warning(f"⚠️ Aborted malformed streamed completion: {e.dev_message}")
+                messages.append(
+                    ChatCompletionUserMessage(
+                        role="user",
+                        content=f"Invalid LLM response. {e.dev_message}. Retrying",
+                    )
+                )
+                raised_exc = e
+                continue
             except InvalidJsonResponseForStructuredOutput as e:
                 if use_strict_response_format:
                     # fallback to non-strict response format
@@ -147,6 +306,7 @@ class LLMEngine:
         model: str | None = None,
         temperature: float = config.temperature,
         response_format: dict[str, str] | type[BaseModel] | None = None,
+        on_delta: Callable[[str], None] | None = None,
     ) -> str | None:
         model = model or self.model
         response = await self.completion(
@@ -155,6 +315,7 @@ class LLMEngine:
             temperature=temperature,
             n=1,
             response_format=response_format,
+            on_delta=on_delta,
         )
         return response.choices[0].message.content  # pyright: ignore [reportUnknownVariableType, reportUnknownMemberType, reportAttributeAccessIssue]
 
@@ -166,21 +327,41 @@ class LLMEngine:
         temperature: float = config.temperature,
         response_format: dict[str, str] | type[BaseModel] | None = None,
         n: int = 1,
+        on_delta: Callable[[str], None] | None = None,
     ) -> ModelResponse:
+        """If `on_delta` is provided, the completion is streamed and `on_delta` receives the content chunks"""
         model = model or self.model
+        cache_key = ""
+        if self.cache is not None:
+            cache_key = self.cache.key(model, messages, response_format, temperature, n)
+            cached = self._cached_completion(cache_key)
+            if cached is not None:
+                if on_delta is not None:
+                    on_delta(cached.choices[0].message.content or "")  # pyright: ignore [reportUnknownArgumentType, reportUnknownMemberType, reportAttributeAccessIssue]
+                return cached
         try:
-            response = await litellm.acompletion(  # pyright: ignore [reportUnknownMemberType]
-                model,
-                messages,
-                temperature=temperature,
-                n=n,
-                response_format=response_format,
-                max_completion_tokens=8192,
-                drop_params=True,
-            )
-            # Cast to ModelResponse since we know it's not streaming in this case
-            return cast(ModelResponse, response)
+            async with self.limiter():
+                response = await litellm.acompletion(  # pyright: ignore [reportUnknownMemberType]
+                    model,
+                    self.with_prompt_caching(model, messages),
+                    temperature=temperature,
+                    n=n,
+                    response_format=response_format,
+                    max_completion_tokens=8192,
+                    drop_params=True,
+                    stream=on_delta is not None,
+                    stream_options={"include_usage": True} if on_delta is not None else None,
+                )
+                if on_delta is not None:
+                    response = await self._collect_stream(cast(CustomStreamWrapper, response), messages, on_delta)
+            # Cast to ModelResponse since streams are collected into a single response
+            response = cast(ModelResponse, response)
+            if self.cache is not None:
+                self.cache.set(cache_key, response.model_dump_json())
+            return self._annotate_cache(response, hit=False)
 
+        except LLMStreamAbortedError:
+            raise
         except NotFoundError as e:
             raise ModelNotFoundError(model) from e
         except RateLimitError:
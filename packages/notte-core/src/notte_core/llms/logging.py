@@ -72,23 +72,32 @@ def trace_llm_usage(
                     completion: str = _completion or ""  # type: ignore[attr-defined]
 
                     usage = getattr(response, "usage", None)
+                    prompt_details = getattr(usage, "prompt_tokens_details", None)
                     usage_dict = (
                         {
                             "prompt_tokens": getattr(usage, "prompt_tokens", 0),
                             "completion_tokens": getattr(usage, "completion_tokens", 0),
                             "total_tokens": getattr(usage, "total_tokens", 0),
+                            # prompt tokens read from / written to the provider prompt cache
+                            "cached_tokens": getattr(prompt_details, "cached_tokens", 0) or 0,
+                            "cache_creation_tokens": getattr(usage, "cache_creation_input_tokens", 0) or 0,
                         }
                         if usage
                         else {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
                     )
 
+                    metadata: dict[str, Any] | None = kwargs.get("metadata")
+                    cache_info = getattr(response, "_hidden_params", {}).get("completion_cache")
+                    if cache_info is not None:
+                        metadata = {**(metadata or {}), "completion_cache": cache_info}
+
                     tracer.trace(
                         timestamp=datetime.now().isoformat(),
                         model=model,
                         messages=messages,
                         completion=completion,  # type: ignore[arg-type]
                         usage=usage_dict,
-                        metadata=kwargs.get("metadata"),
+                        metadata=metadata,
                     )
                 except Exception as e:
                     logger.debug(f"Error logging LLM usage: {str(e)}")
@@ -2,15 +2,16 @@ import os
 from pathlib import Path
 from typing import Any
 
-import tiktoken
 from litellm import ModelResponse  # type: ignore[import]
 from llamux import Router  # type: ignore[import]
 from loguru import logger
 
 from notte_core.common.config import LlmModel, config
 from notte_core.errors.llm import InvalidPromptTemplateError
+from notte_core.llms.cache import CompletionCache
 from notte_core.llms.engine import LLMEngine, TResponseFormat
 from notte_core.llms.prompt import PromptLibrary
+from notte_core.llms.tokens import TokenCounter
 
 PROMPT_DIR = Path(__file__).parent.parent / "llms" / "prompts"
 LLAMUX_CONFIG = Path(__file__).parent.parent / "llms" / "config" / "endpoints.csv"
@@ -42,9 +43,17 @@ class LLMService:
                 raise FileNotFoundError(f"LLAMUX config file not found at {path}")
             self.router = Router.from_csv(llamux_config)
         self.base_model: str = base_model or LlmModel.default()
-        self.tokenizer: tiktoken.Encoding = tiktoken.get_encoding("cl100k_base")
+        # the tokenizer is only loaded the first time tokens are counted
+        self.token_counter: TokenCounter = TokenCounter.for_model(self.base_model)
         self.verbose: bool = config.verbose
         self.nb_retries_structured_output: int = config.nb_retries_structured_output
+        # long-lived engine: provider http clients are pooled by litellm and reused across calls
+        self.engine: LLMEngine = LLMEngine(
+            model=self.base_model,
+            nb_retries_structured_output=self.nb_retries_structured_output,
+            verbose=self.verbose,
+            cache=CompletionCache.from_config(),
+        )
 
     @staticmethod
     def from_config() -> "LLMService":
@@ -68,17 +77,17 @@ class LLMService:
             router = "fixed"
             base_model = self.base_model
 
-        token_len = self.estimate_tokens(text="\n".join([m["content"] for m in messages]))
         if self.verbose:
+            token_len = self.estimate_tokens(text="\n".join([m["content"] for m in messages]))
             logger.debug(f"llm router '{router}' selected '{base_model}' for approx {token_len} tokens")
         return base_model, eid
 
     def clip_tokens(self, document: str, max_tokens: int | None = None) -> str:
         max_tokens = max_tokens or (self.context_length() - 2000)
-        tokens = self.tokenizer.encode(document)
-        if len(tokens) > max_tokens:
-            logger.debug(f"Cannot process document, exceeds max tokens: {len(tokens)} > {max_tokens}. Clipping...")
-            return self.tokenizer.decode(tokens[:max_tokens])
+        nb_tokens = self.token_counter.count(document)
+        if nb_tokens > max_tokens:
+            logger.debug(f"Cannot process document, exceeds max tokens: {nb_tokens} > {max_tokens}. Clipping...")
+            return self.token_counter.decode(self.token_counter.encode(document)[:max_tokens])
         return document
 
     def estimate_tokens(
@@ -92,7 +101,7 @@ class LLMService:
                 )
             messages = self.lib.materialize(prompt_id, variables)
             text = "\n".join([m["content"] for m in messages])
-        return len(self.tokenizer.encode(text))
+        return self.token_counter.count(text)
 
     async def structured_completion(
         self,
@@ -103,9 +112,7 @@ class LLMService:
     ) -> TResponseFormat:
         messages = self.lib.materialize(prompt_id, variables)
         base_model, _ = self.get_base_model(messages)
-        return await LLMEngine(
-            nb_retries_structured_output=self.nb_retries_structured_output, verbose=self.verbose
-        ).structured_completion(
+        return await self.engine.structured_completion(
             messages=messages,  # type: ignore[arg-type]
             response_format=response_format,
             model=base_model,
@@ -119,7 +126,7 @@ class LLMService:
     ) -> ModelResponse:
         messages = self.lib.materialize(prompt_id, variables)
         base_model, eid = self.get_base_model(messages)
-        response = await LLMEngine(verbose=self.verbose).completion(
+        response = await self.engine.completion(
             messages=messages,  # type: ignore[arg-type]
             model=base_model,
         )
@@ -0,0 +1,144 @@
+import json
+from collections.abc import Callable
+from functools import cache
+from typing import Annotated, Any
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from notte_core.errors.llm import LLMStreamAbortedError
+
+# text allowed before the JSON object (e.g. "Here is the answer:\n```json"), longer preambles abort the generation
+MAX_PREAMBLE_CHARS = 200
+
+
+@cache
+def field_adapters(response_format: type[BaseModel]) -> dict[str, tuple[str, TypeAdapter[Any]]]:
+    """Validators of the top-level fields of `response_format`, indexed by their JSON key"""
+    return {
+        field.alias or name: (name, TypeAdapter(Annotated[field.annotation, field]))  # pyright: ignore[reportArgumentType, reportInvalidTypeForm, reportUnknownMemberType]
+        for name, field in response_format.model_fields.items()
+    }
+
+
+class IncrementalJsonParser:
+    """
+    Parses a JSON object streamed by a LLM chunk by chunk.
+
+    Each top-level field is validated against `response_format` as soon as its value is complete and
+    forwarded to `on_field`, so that callers can start using the first fields before the end of the generation.
+    Text before the first `{` (e.g. an opening code block) is skipped. `feed` raises `LLMStreamAbortedError` as soon
+    as the output is malformed (e.g. no JSON object after `MAX_PREAMBLE_CHARS` characters, unbalanced brackets or a
+    field that does not validate) so that the generation can be aborted early.
+    """
+
+    def __init__(
+        self,
+        response_format: type[BaseModel],
+        on_field: Callable[[str, Any], None] | None = None,
+    ) -> None:
+        self.adapters: dict[str, tuple[str, TypeAdapter[Any]]] = field_adapters(response_format)
+        self.on_field: Callable[[str, Any], None] | None = on_field
+        # validated top-level fields (by field name)
+        self.fields: dict[str, Any] = {}
+        self.done: bool = False
+        self._text: str = ""
+        self._stack: list[str] = []
+        self._in_string: bool = False
+        self._escaped: bool = False
+        # position in the top-level object: 'key', 'colon' or 'value'
+        self._phase: str = "key"
+        self._start: int = 0
+        self._key: str | None = None
+        # set to False when the object is wrapped (e.g. `{"json": {...}}`): fields can't be checked one by one
+        self._check_fields: bool = True
+
+    def feed(self, delta: str) -> None:
+        offset = len(self._text)
+        self._text += delta
+        for pos in range(offset, len(self._text)):
+            if self.done:
+                # trailing content (closing code block, etc.) is handled by the final parsing
+                return
+            if not self._stack:
+                self._consume_head(self._text[pos], pos)
+            else:
+                self._consume(self._text[pos], pos)
+
+    def _abort(self, reason: str) -> None:
+        raise LLMStreamAbortedError(f"{reason}. Content so far: {self._text}")
+
+    def _consume_head(self, char: str, pos: int) -> None:
+        if char == "{":
+            self._stack.append("}")
+        elif pos >= MAX_PREAMBLE_CHARS:
+            self._abort("JSON object expected")
+
+    def _consume(self, char: str, pos: int) -> None:
+        if self._in_string:
+            if self._escaped:
+                self._escaped = False
+            elif char == "\\":
+                self._escaped = True
+            elif char == '"':
+                self._in_string = False
+                if len(self._stack) == 1 and self._phase == "key":
+                    self._key = json.loads(self._text[self._start : pos + 1])
+                    self._phase = "colon"
+            return
+
+        top_level = len(self._stack) == 1
+        if top_level and char.isspace():
+            return
+        if top_level and self._phase == "key":
+            if char == '"':
+                self._in_string = True
+                self._start = pos
+            elif char == "}":
+                self._close()
+            else:
+                self._abort("Object key expected")
+        elif top_level and self._phase == "colon":
+            if char != ":":
+                self._abort("Colon expected after object key")
+            self._phase = "value"
+            self._start = pos + 1
+        elif top_level and char in ",}":
+            self._complete_field(self._text[self._start : pos])
+            if char == "}":
+                self._close()
+            else:
+                self._phase = "key"
+        elif char == '"':
+            self._in_string = True
+        elif char in "{[":
+            self._stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if char != self._stack.pop():
+                self._abort("Unbalanced brackets")
+
+    def _close(self) -> None:
+        _ = self._stack.pop()
+        self.done = True
+
+    def _complete_field(self, raw: str) -> None:
+        key = self._key
+        self._key = None
+        if not self._check_fields or key is None:
+            return
+        if key not in self.adapters:
+            if not self.fields:
+                # wrapped object (e.g. `{"json": {...}}`), unwrapped by the final parsing
+                self._check_fields = False
+            return
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            self._abort(f"Invalid JSON value for field '{key}'")
+            return
+        name, adapter = self.adapters[key]
+        try:
+            self.fields[name] = adapter.validate_python(value)
+        except ValidationError as e:
+            self._abort(f"Invalid value for field '{name}': {e.errors()}")
+        if self.on_field is not None:
+            self.on_field(name, self.fields[name])
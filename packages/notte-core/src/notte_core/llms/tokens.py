@@ -0,0 +1,199 @@
+import base64
+import hashlib
+import json
+import math
+import struct
+from collections import OrderedDict
+from functools import cache
+from typing import Any, ClassVar
+
+import tiktoken
+from loguru import logger
+
+DEFAULT_ENCODING = "cl100k_base"
+# model name prefixes (without provider) of the models using the `o200k_base` encoding
+O200K_MODEL_PREFIXES = ("gpt-4o", "gpt-4.1", "gpt-4.5", "gpt-5", "o1", "o3", "o4")
+
+# OpenAI chat format overhead (cf. litellm `token_counter`)
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_NAME = 1
+TOKENS_REPLY_PRIMING = 3
+
+# image tokens: 85 base tokens + 170 tokens per 512px tile once resized to fit in 2048x2048 with a 768px short side
+IMAGE_BASE_TOKENS = 85
+IMAGE_TILE_TOKENS = 170
+# 1024x1024 image (used when the dimensions can't be read from the image header)
+DEFAULT_IMAGE_TOKENS = IMAGE_BASE_TOKENS + 4 * IMAGE_TILE_TOKENS
+# base64 characters decoded to read the dimensions of an image: PNG and WEBP headers fit in the first 30 bytes,
+# JPEG frame headers come after the metadata segments (usually a few hundred bytes for screenshots)
+IMAGE_HEADER_B64_CHARS = 64
+JPEG_HEADER_B64_CHARS = 8192
+
+
+def encoding_name(model: str) -> str:
+    """Tokenizer family of `model` (e.g. `openai/gpt-4o` -> `o200k_base`)"""
+    name = model.split("/")[-1]
+    if name.startswith(O200K_MODEL_PREFIXES):
+        return "o200k_base"
+    # other providers don't ship their tokenizer with tiktoken: cl100k is the usual approximation
+    return DEFAULT_ENCODING
+
+
+@cache
+def load_encoding(name: str) -> tiktoken.Encoding:
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        if name == DEFAULT_ENCODING:
+            raise
+        logger.debug(f"Failed to load tokenizer '{name}', falling back to '{DEFAULT_ENCODING}': {str(e)}")
+        return load_encoding(DEFAULT_ENCODING)
+
+
+def webp_size(data: bytes) -> tuple[int, int] | None:
+    """Reads the (width, height) of a lossy (VP8), lossless (VP8L) or extended (VP8X) WEBP image"""
+    if len(data) < 30:
+        return None
+    match data[12:16]:
+        case b"VP8 ":
+            # frame tag (3 bytes) and start code, then 14-bit dimensions
+            if data[23:26] != b"\x9d\x01\x2a":
+                return None
+            width, height = struct.unpack("<HH", data[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        case b"VP8L":
+            if data[20] != 0x2F:
+                return None
+            bits = int.from_bytes(data[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        case b"VP8X":
+            # 24-bit canvas dimensions (minus one)
+            return int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+        case _:
+            return None
+
+
+def image_size(data: bytes) -> tuple[int, int] | None:
+    """Reads the (width, height) of a PNG, JPEG or WEBP image from its header, without decoding the image"""
+    if data.startswith(b"\x89PNG\r\n\x1a\n") and len(data) >= 24:
+        width, height = struct.unpack(">II", data[16:24])
+        return width, height
+    if data.startswith(b"RIFF") and data[8:12] == b"WEBP":
+        return webp_size(data)
+    if data.startswith(b"\xff\xd8"):
+        i = 2
+        while i + 9 < len(data):
+            if data[i] != 0xFF:
+                return None
+            marker = data[i + 1]
+            # start of frame markers (except DHT, JPG and DAC)
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", data[i + 5 : i + 9])
+                return width, height
+            i += 2 + struct.unpack(">H", data[i + 2 : i + 4])[0]
+    return None
+
+
+def estimate_image_tokens(width: int, height: int, detail: str = "high") -> int:
+    if detail == "low":
+        return IMAGE_BASE_TOKENS
+    scale = min(1.0, 2048 / max(width, height))
+    scale *= min(1.0, 768 / (min(width, height) * scale))
+    tiles = math.ceil(width * scale / 512) * math.ceil(height * scale / 512)
+    return IMAGE_BASE_TOKENS + IMAGE_TILE_TOKENS * tiles
+
+
+class TokenCounter:
+    """
+    Local token counting for a tokenizer family.
+
+    The tokenizer is only loaded on first use and text counts are memoized by content hash,
+    so that recounting the same prompts, DOM snapshots or conversation messages is free.
+    """
+
+    max_cached_counts: ClassVar[int] = 16_384
+
+    def __init__(self, encoding_name: str = DEFAULT_ENCODING) -> None:
+        self.encoding_name: str = encoding_name
+        self._counts: OrderedDict[bytes, int] = OrderedDict()
+
+    @staticmethod
+    def for_model(model: str) -> "TokenCounter":
+        """Counter shared by all the models of the same tokenizer family"""
+        return TokenCounter.for_encoding(encoding_name(model))
+
+    @staticmethod
+    @cache
+    def for_encoding(name: str) -> "TokenCounter":
+        return TokenCounter(name)
+
+    @property
+    def encoding(self) -> tiktoken.Encoding:
+        return load_encoding(self.encoding_name)
+
+    def encode(self, text: str) -> list[int]:
+        return self.encoding.encode(text, disallowed_special=())
+
+    def decode(self, tokens: list[int]) -> str:
+        return self.encoding.decode(tokens)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        key = hashlib.blake2b(text.encode(), digest_size=16).digest()
+        count = self._counts.get(key)
+        if count is not None:
+            self._counts.move_to_end(key)
+            return count
+        count = len(self.encode(text))
+        self._counts[key] = count
+        if len(self._counts) > self.max_cached_counts:
+            _ = self._counts.popitem(last=False)
+        return count
+
+    def count_image(self, image_url: dict[str, Any] | str) -> int:
+        url: str = image_url["url"] if isinstance(image_url, dict) else image_url
+        detail: str = image_url.get("detail", "auto") if isinstance(image_url, dict) else "auto"
+        header, _, data = url.partition(",")
+        if not header.startswith("data:") or not data:
+            return DEFAULT_IMAGE_TOKENS
+        # only decode the beginning of the image, where its dimensions are
+        head = base64.b64decode(data[:IMAGE_HEADER_B64_CHARS])
+        is_jpeg = head.startswith(b"\xff\xd8")
+        if is_jpeg:
+            head = base64.b64decode(data[:JPEG_HEADER_B64_CHARS])
+        size = image_size(head)
+        if size is None and is_jpeg and len(data) > JPEG_HEADER_B64_CHARS:
+            # large metadata segments (e.g. EXIF or ICC profile) before the frame header
+            size = image_size(base64.b64decode(data))
+        if size is None:
+            return DEFAULT_IMAGE_TOKENS
+        return estimate_image_tokens(*size, detail=detail)
+
+    def count_message(self, message: dict[str, Any] | Any) -> int:
+        tokens = TOKENS_PER_MESSAGE
+        # litellm `Message` objects are pydantic models
+        fields: dict[str, Any] = message if isinstance(message, dict) else dict(message)  # pyright: ignore[reportUnknownVariableType]
+        for key, value in fields.items():
+            if value is None:
+                continue
+            if key == "content" and isinstance(value, list):
+                for block in value:  # pyright: ignore[reportUnknownVariableType]
+                    match block:
+                        case {"type": "text", "text": str(text)}:
+                            tokens += self.count(text)
+                        case {"type": "image_url", "image_url": image_url}:  # pyright: ignore[reportUnknownVariableType]
+                            tokens += self.count_image(image_url)  # pyright: ignore[reportUnknownArgumentType]
+                        case _:  # pyright: ignore[reportUnknownVariableType]
+                            tokens += self.count(json.dumps(block, default=str))
+            elif isinstance(value, str):
+                tokens += self.count(value)
+            else:
+                # e.g. tool calls
+                tokens += self.count(json.dumps(value, default=str))
+            if key == "name":
+                tokens += TOKENS_PER_NAME
+        return tokens
+
+    def count_messages(self, messages: list[Any]) -> int:
+        return sum(self.count_message(message) for message in messages) + TOKENS_REPLY_PRIMING
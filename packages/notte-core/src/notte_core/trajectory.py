@@ -9,6 +9,7 @@ from typing_extensions import override
 
 from notte_core.agent_types import AgentCompletion
 from notte_core.browser.observation import ExecutionResult, Observation
+from notte_core.trajectory_store import TrajectoryStore
 
 TrajectoryHoldee = ExecutionResult | Observation | AgentCompletion
 StepId: TypeAlias = int
@@ -40,6 +41,17 @@ class StepBundle:
         else:
             raise ValueError("invalid element")  # pyright: ignore [reportUnreachable]
 
+    @staticmethod
+    def get_type_key(element_type: type[TrajectoryHoldee]) -> ElementLiteral:
+        if issubclass(element_type, Observation):
+            return "observation"
+        elif issubclass(element_type, ExecutionResult):
+            return "execution_result"
+        elif issubclass(element_type, AgentCompletion):  # pyright: ignore [reportUnnecessaryIsInstance]
+            return "agent_completion"
+        else:
+            raise ValueError("invalid element type")  # pyright: ignore [reportUnreachable]
+
 
 class Trajectory:
     """Shared trajectory between agent and session
@@ -47,15 +59,20 @@ class Trajectory:
     Elements are observations, agent completions and execution results
     Steps are bundles of elements, typically for use in agent loops (observe -> completion -> execute)
     The trajectory helps you iterate on all kinds of elements, either by type, or by step
+
+    Elements are held by a `TrajectoryStore` shared with the views (cf. `trajectory_store` in the config
+    to spill older elements to disk): iterators load elements lazily, one at a time
     """
 
-    def __init__(self, elements: list[TrajectoryElement] | None = None):
+    def __init__(self, elements: list[TrajectoryElement] | TrajectoryStore[TrajectoryElement] | None = None):
         if elements is None:
-            elements = []
+            elements = TrajectoryStore.from_config()
+        elif isinstance(elements, list):
+            elements = TrajectoryStore(elements)
 
         self._step_starts: dict[StepId, int] = {}  # start steps
         self.__current_step: list[StepId | None] = [None]  # only a list because it needs to be a pointer
-        self._elements: list[TrajectoryElement] = elements  # underlying elements
+        self._elements: TrajectoryStore[TrajectoryElement] = elements  # underlying elements
         self._slice: slice | None = None  # note if main, slice of the elements list if a view
         self.main_trajectory: Trajectory | None = None  # none if main, point to the main trajectory if a view
         self.callbacks: dict[
@@ -83,6 +100,13 @@ class Trajectory:
     def _current_step(self, value: StepId | None) -> None:
         self.__current_step[0] = value
 
+    def _bounds(self) -> tuple[int, int]:
+        """[start, stop) of the view in the underlying elements"""
+        if self._slice is None:
+            return 0, len(self._elements)
+        start, stop, _ = self._slice.indices(len(self._elements))
+        return start, stop
+
     @property
     def step_starts(self) -> dict[StepId, int]:
         if self._slice is None:
@@ -126,9 +150,11 @@ class Trajectory:
             raise ValueError(f"Invalid step id {step_id}")
 
         step_start = self.step_starts[step_id]
+        # elements of a step are appended before the next step starts
+        step_stop = min((start for start in self._step_starts.values() if start > step_start), default=None)
         per_type_dict: dict[str, TrajectoryHoldee] = {}
 
-        for elem in self._elements[step_start:]:
+        for elem in self._elements.iter(step_start, step_stop):
             if elem.step_id == step_id:
                 key = StepBundle.get_element_key(elem.inner)
 
@@ -146,11 +172,17 @@ class Trajectory:
 
     @property
     def inner_elements(self) -> list[TrajectoryElement]:
-        return self._elements[self._slice] if self._slice else self._elements
+        """All the elements of the view (loads the spilled ones, prefer iterating over `elements`)"""
+        return list(self._elements.iter(*self._bounds()))
 
     @property
     def elements(self) -> Iterator[TrajectoryHoldee]:
-        return (element.inner for element in self.inner_elements)
+        return (element.inner for element in self._elements.iter(*self._bounds()))
+
+    def elements_from(self, start: int) -> Iterator[TrajectoryHoldee]:
+        """Elements of the view from index `start` (the elements before it are not loaded)"""
+        view_start, view_stop = self._bounds()
+        return (element.inner for element in self._elements.iter(min(view_start + start, view_stop), view_stop))
 
     def debug_log(self) -> None:
         for line in str(self).split("\n"):
@@ -169,10 +201,11 @@ class Trajectory:
         return iter(self.elements)
 
     def __getitem__(self, index: int) -> TrajectoryHoldee:
-        return self.inner_elements[index].inner
+        return self._elements[range(*self._bounds())[index]].inner
 
     def __len__(self) -> int:
-        return len(self.inner_elements)
+        start, stop = self._bounds()
+        return max(stop - start, 0)
 
     @overload
     def set_callback(
@@ -237,7 +270,7 @@ class Trajectory:
 
                     logger.trace(f"Running {cb_key} callback")
 
-            self._elements.append(TrajectoryElement(element, self._current_step))
+            self._elements.append(TrajectoryElement(element, self._current_step), tag=cb_key)
 
     @overload
     def filter_by_type(self, element_type: type[Observation]) -> Iterator[Observation]: ...
@@ -249,7 +282,9 @@ class Trajectory:
     def filter_by_type(self, element_type: type[AgentCompletion]) -> Iterator[AgentCompletion]: ...
 
     def filter_by_type(self, element_type: type[TrajectoryHoldee]) -> Iterator[TrajectoryHoldee]:
-        return (step for step in self.elements if isinstance(step, element_type))
+        # elements of other types are not loaded
+        elements = self._elements.iter(*self._bounds(), tag=StepBundle.get_type_key(element_type))
+        return (step.inner for step in elements if isinstance(step.inner, element_type))
 
     def observations(self) -> Iterator[Observation]:
         return self.filter_by_type(Observation)
@@ -270,7 +305,7 @@ class Trajectory:
     def last_element(self, element_type: type[AgentCompletion]) -> AgentCompletion | None: ...
 
     def last_element(self, element_type: type[TrajectoryHoldee]) -> TrajectoryHoldee | None:
-        for step in reversed(self.inner_elements):
+        for step in self._elements.iter_reversed(*self._bounds(), tag=StepBundle.get_type_key(element_type)):
             if isinstance(step.inner, element_type):
                 return step.inner
         return None
@@ -302,7 +337,7 @@ class Trajectory:
             current_start, _, _ = self._slice.indices(len(self._elements))
             # Calculate the new slice relative to the current view
             new_slice = slice(start, stop, 1)
-            new_start, new_stop, _ = new_slice.indices(len(self.inner_elements))
+            new_start, new_stop, _ = new_slice.indices(len(self))
 
             # Convert to absolute indices in the original list
             abs_start = current_start + new_start
@@ -345,7 +380,7 @@ class Trajectory:
         """Return a detailed string representation listing all elements briefly."""
         lines = [f"Trajectory with {len(self)} elements:"]
 
-        for inner_element in self.inner_elements:
+        for inner_element in self._elements.iter(*self._bounds()):
             element = inner_element.inner
             step_id_str = f", step={inner_element.step_id}" if inner_element.step_id is not None else ""
 
@@ -0,0 +1,330 @@
+import hashlib
+import io
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, Generic, TypeVar, overload
+
+from loguru import logger
+from typing_extensions import override
+
+from notte_core.common.config import TrajectoryStoreType, config
+
+T = TypeVar("T")
+
+
+class SpillBackend(ABC):
+    """
+    Cold storage of the trajectory elements spilled out of memory.
+
+    Elements are pickled records addressed by their index in the trajectory. Large byte strings (i.e. screenshots)
+    are stored once as blobs addressed by their content digest, so that identical screenshots share storage.
+    """
+
+    @abstractmethod
+    def put(self, index: int, data: bytes) -> None:
+        pass
+
+    @abstractmethod
+    def get(self, index: int) -> bytes:
+        pass
+
+    @abstractmethod
+    def put_blob(self, digest: str, data: bytes) -> None:
+        """Stores a blob (no-op if the digest is already stored)"""
+        pass
+
+    @abstractmethod
+    def get_blob(self, digest: str) -> bytes:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+
+class SegmentFileBackend(SpillBackend):
+    """Two append-only segment files (records and blobs), indexed in memory by (offset, length)"""
+
+    def __init__(self, directory: str | Path) -> None:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self._lock: threading.Lock = threading.Lock()
+        self._records_file: io.BufferedRandom = open(directory / "elements.seg", "w+b")
+        self._blobs_file: io.BufferedRandom = open(directory / "blobs.seg", "w+b")
+        self._records: dict[int, tuple[int, int]] = {}
+        self._blobs: dict[str, tuple[int, int]] = {}
+
+    @staticmethod
+    def _append(file: io.BufferedRandom, data: bytes) -> tuple[int, int]:
+        offset = file.seek(0, io.SEEK_END)
+        _ = file.write(data)
+        return offset, len(data)
+
+    @staticmethod
+    def _read(file: io.BufferedRandom, location: tuple[int, int]) -> bytes:
+        file.flush()
+        offset, length = location
+        _ = file.seek(offset)
+        return file.read(length)
+
+    @override
+    def put(self, index: int, data: bytes) -> None:
+        with self._lock:
+            self._records[index] = self._append(self._records_file, data)
+
+    @override
+    def get(self, index: int) -> bytes:
+        with self._lock:
+            return self._read(self._records_file, self._records[index])
+
+    @override
+    def put_blob(self, digest: str, data: bytes) -> None:
+        with self._lock:
+            if digest not in self._blobs:
+                self._blobs[digest] = self._append(self._blobs_file, data)
+
+    @override
+    def get_blob(self, digest: str) -> bytes:
+        with self._lock:
+            return self._read(self._blobs_file, self._blobs[digest])
+
+    @override
+    def close(self) -> None:
+        self._records_file.close()
+        self._blobs_file.close()
+
+
+class SqliteBackend(SpillBackend):
+    def __init__(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock: threading.Lock = threading.Lock()
+        self._db: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # spilled elements don't outlive the process: no need to sync to disk
+        _ = self._db.execute("PRAGMA journal_mode=WAL")
+        _ = self._db.execute("PRAGMA synchronous=OFF")
+        _ = self._db.execute("CREATE TABLE IF NOT EXISTS elements (idx INTEGER PRIMARY KEY, data BLOB NOT NULL)")
+        _ = self._db.execute("CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, data BLOB NOT NULL)")
+
+    @override
+    def put(self, index: int, data: bytes) -> None:
+        with self._lock:
+            _ = self._db.execute("INSERT OR REPLACE INTO elements (idx, data) VALUES (?, ?)", (index, data))
+
+    @override
+    def get(self, index: int) -> bytes:
+        with self._lock:
+            row = self._db.execute("SELECT data FROM elements WHERE idx = ?", (index,)).fetchone()
+        if row is None:
+            raise KeyError(index)
+        return row[0]
+
+    @override
+    def put_blob(self, digest: str, data: bytes) -> None:
+        with self._lock:
+            _ = self._db.execute("INSERT OR IGNORE INTO blobs (digest, data) VALUES (?, ?)", (digest, data))
+
+    @override
+    def get_blob(self, digest: str) -> bytes:
+        with self._lock:
+            row = self._db.execute("SELECT data FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        if row is None:
+            raise KeyError(digest)
+        return row[0]
+
+    @override
+    def close(self) -> None:
+        self._db.close()
+
+
+class TrajectoryStore(Generic[T]):
+    """
+    Append-only sequence of trajectory elements, shared by a trajectory and its views.
+
+    The base store keeps every element in memory, see `SpillingTrajectoryStore` to bound memory usage.
+    Elements can be appended with a tag (e.g. their type), so that iterating over a single kind of element
+    doesn't need to load the other ones (untagged elements are always yielded).
+    """
+
+    def __init__(self, elements: list[T] | None = None) -> None:
+        self._elements: list[T] = elements if elements is not None else []
+        self._tags: list[str | None] = [None] * len(self._elements)
+
+    @staticmethod
+    def from_config() -> "TrajectoryStore[Any]":
+        match config.trajectory_store:
+            case TrajectoryStoreType.MEMORY:
+                return TrajectoryStore()
+            case TrajectoryStoreType.SEGMENT | TrajectoryStoreType.SQLITE:
+                return SpillingTrajectoryStore.from_config()
+
+    def append(self, element: T, tag: str | None = None) -> None:
+        self._elements.append(element)
+        self._tags.append(tag)
+
+    def _load(self, index: int) -> T:
+        return self._elements[index]
+
+    def __len__(self) -> int:
+        return len(self._tags)
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[T]: ...
+
+    def __getitem__(self, index: int | slice) -> T | list[T]:
+        if isinstance(index, slice):
+            return list(self.iter(*index.indices(len(self))[:2]))
+        return self._load(range(len(self))[index])
+
+    def __iter__(self) -> Iterator[T]:
+        return self.iter()
+
+    def iter(self, start: int = 0, stop: int | None = None, tag: str | None = None) -> Iterator[T]:
+        """Lazily loads the elements in [start, stop), optionally only the ones appended with `tag`"""
+        stop = len(self) if stop is None else stop
+        for index in range(start, stop):
+            if tag is None or self._tags[index] in (tag, None):
+                yield self._load(index)
+
+    def iter_reversed(self, start: int = 0, stop: int | None = None, tag: str | None = None) -> Iterator[T]:
+        stop = len(self) if stop is None else stop
+        for index in range(stop - 1, start - 1, -1):
+            if tag is None or self._tags[index] in (tag, None):
+                yield self._load(index)
+
+    def close(self) -> None:
+        pass
+
+
+def _restore_store(elements: list[T], tags: list[str | None]) -> TrajectoryStore[T]:
+    store = TrajectoryStore(elements)
+    store._tags = tags  # pyright: ignore [reportPrivateUsage]
+    return store
+
+
+class SpillingTrajectoryStore(TrajectoryStore[T]):
+    """
+    Trajectory store keeping only the `hot_elements` most recent elements in memory.
+
+    Older elements are pickled to the spill backend and loaded back one at a time when accessed. Byte strings of at
+    least `min_blob_size` bytes (i.e. screenshots) are stored content-addressed. Elements that can't be pickled
+    back and forth (e.g. exceptions with a custom constructor) stay in memory.
+    """
+
+    def __init__(self, backend: SpillBackend, hot_elements: int, min_blob_size: int = 1024) -> None:
+        # the last elements (e.g. the last observation) must stay the same objects
+        if hot_elements < 1:
+            raise ValueError(f"hot_elements should be strictly positive, got {hot_elements}")
+        super().__init__()
+        self.backend: SpillBackend = backend
+        self.hot_elements: int = hot_elements
+        self.min_blob_size: int = min_blob_size
+        self._hot: deque[T] = deque()
+        # index of the first hot element
+        self._hot_start: int = 0
+        self._pinned: dict[int, T] = {}
+        self._blob_digests: set[str] = set()
+
+    @staticmethod
+    @override
+    def from_config() -> "SpillingTrajectoryStore[Any]":
+        # removed with the store: spilled elements are only valid for the lifetime of the trajectory
+        directory = Path(tempfile.mkdtemp(prefix="notte-trajectory-", dir=config.trajectory_spill_dir))
+        if config.trajectory_store == TrajectoryStoreType.SQLITE:
+            backend: SpillBackend = SqliteBackend(directory / "trajectory.sqlite")
+        else:
+            backend = SegmentFileBackend(directory)
+        store: SpillingTrajectoryStore[Any] = SpillingTrajectoryStore(backend, config.trajectory_hot_elements)
+        _ = weakref.finalize(store, SpillingTrajectoryStore._cleanup, backend, directory)
+        return store
+
+    @staticmethod
+    def _cleanup(backend: SpillBackend, directory: Path) -> None:
+        backend.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    @override
+    def append(self, element: T, tag: str | None = None) -> None:
+        self._hot.append(element)
+        self._tags.append(tag)
+        while len(self._hot) > self.hot_elements:
+            self._spill(self._hot_start, self._hot.popleft())
+            self._hot_start += 1
+
+    def _dumps(self, element: T) -> tuple[bytes, dict[str, bytes], bool]:
+        """Pickled element, its blobs, and whether it contains exceptions"""
+        blobs: dict[str, bytes] = {}
+        has_exceptions = False
+
+        def persistent_id(obj: Any) -> str | None:
+            nonlocal has_exceptions
+            if isinstance(obj, BaseException):
+                has_exceptions = True
+            elif type(obj) is bytes and len(obj) >= self.min_blob_size:
+                digest = hashlib.sha256(obj).hexdigest()
+                blobs[digest] = obj
+                return digest
+            return None
+
+        buffer = io.BytesIO()
+        pickler = pickle.Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = persistent_id
+        pickler.dump(element)
+        return buffer.getvalue(), blobs, has_exceptions
+
+    def _loads(self, data: bytes, blobs: dict[str, bytes] | None = None) -> T:
+        def persistent_load(digest: str) -> bytes:
+            return blobs[digest] if blobs is not None else self.backend.get_blob(digest)
+
+        unpickler = pickle.Unpickler(io.BytesIO(data))
+        unpickler.persistent_load = persistent_load
+        return unpickler.load()
+
+    def _spill(self, index: int, element: T) -> None:
+        try:
+            data, blobs, has_exceptions = self._dumps(element)
+            if has_exceptions:
+                # exceptions with a custom constructor are pickled fine but can't be unpickled
+                _ = self._loads(data, blobs)
+        except Exception as e:
+            logger.debug(f"Keeping trajectory element {index} in memory, failed to spill it: {str(e)[:200]}")
+            self._pinned[index] = element
+            return
+        for digest, blob in blobs.items():
+            if digest not in self._blob_digests:
+                self.backend.put_blob(digest, blob)
+                self._blob_digests.add(digest)
+        self.backend.put(index, data)
+
+    @override
+    def _load(self, index: int) -> T:
+        if index >= self._hot_start:
+            return self._hot[index - self._hot_start]
+        pinned = self._pinned.get(index)
+        if pinned is not None:
+            return pinned
+        return self._loads(self.backend.get(index))
+
+    @override
+    def __reduce__(self) -> tuple[Any, ...]:
+        # spill files are removed with the store: copies (e.g. to send a trajectory to another process) are in memory
+        return _restore_store, (list(self), list(self._tags))
+
+    @property
+    def nb_spilled(self) -> int:
+        return self._hot_start - len(self._pinned)
+
+    @override
+    def close(self) -> None:
+        self.backend.close()
@@ -17,6 +17,15 @@ def image_from_bytes(image_bytes: bytes) -> Image.Image | None:
     return image
 
 
+def image_mime_type(image_bytes: bytes) -> str:
+    """MIME type of a PNG, JPEG or WEBP image from its magic bytes (defaults to PNG)"""
+    if image_bytes.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/png"
+
+
 def construct_image_url(base_page_url: str, image_src: str) -> str:
     """
     Constructs absolute URL for image source, handling relative and absolute paths.
@@ -1,14 +1,20 @@
 import base64
 import io
+import itertools
 import math
+import struct
 import tempfile
 import textwrap
 from collections import Counter
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from functools import cache
 from pathlib import Path
-from typing import Any, final
+from typing import Any, BinaryIO, final
 
-from PIL import Image, ImageDraw, ImageFont
-from pydantic import BaseModel, model_validator
+from loguru import logger
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+from pydantic import BaseModel
 
 
 def extract_frame_from_webp(
@@ -145,43 +151,416 @@ class WebpReplay:
             image.show()
 
 
-class ScreenshotReplay(BaseModel):
-    class Config:
-        frozen: bool = True
+class AnimatedWebpWriter:
+    """
+    Animated WebP muxer writing the frames to `fp` as they come (cf. the WebP container specification).
 
-    b64_screenshots: list[str]
-    _pillow_images: list[Image.Image] = []
+    Frames are encoded independently as still WebP images, so that only the current frame is ever held in memory.
+    """
 
-    @model_validator(mode="after")
-    def process_images(self) -> "ScreenshotReplay":
-        """Process base64 screenshots into standardized PIL images after model initialization."""
-        if not self.b64_screenshots:
-            self._pillow_images = []
-            return self
+    # ANMF flags: don't blend the frame with the canvas, don't dispose it
+    NO_BLEND: int = 0b10
+    # VP8X flags
+    ANIMATION: int = 0b10
+    ALPHA: int = 0b10000
 
-        # Convert base64 to pillow images
-        images = [self.base64_to_pillow_image(screen) for screen in self.b64_screenshots]
+    def __init__(
+        self,
+        fp: BinaryIO,
+        size: tuple[int, int],
+        loop: int = 0,
+        background: tuple[int, int, int, int] = (255, 255, 255, 255),
+    ) -> None:
+        self.fp: BinaryIO = fp
+        self.size: tuple[int, int] = size
+        self.nb_frames: int = 0
+        # total size of the animation, once closed
+        self.nb_bytes: int = 0
+        self._start: int = fp.tell()
+        self._alpha: bool = False
+        width, height = size
+        _ = fp.write(b"RIFF\x00\x00\x00\x00WEBP")
+        # VP8X: animation flag + canvas size
+        self._write_chunk(
+            b"VP8X", bytes([self.ANIMATION, 0, 0, 0]) + self._uint24(width - 1) + self._uint24(height - 1)
+        )
+        red, green, blue, alpha = background
+        self._write_chunk(b"ANIM", bytes([blue, green, red, alpha]) + struct.pack("<H", loop))
+
+    @staticmethod
+    def _uint24(value: int) -> bytes:
+        return value.to_bytes(3, "little")
+
+    def _write_chunk(self, fourcc: bytes, payload: bytes) -> None:
+        _ = self.fp.write(fourcc + struct.pack("<I", len(payload)) + payload)
+        if len(payload) % 2 == 1:
+            _ = self.fp.write(b"\x00")
+
+    @staticmethod
+    def frame_data(webp: bytes) -> bytes:
+        """Image chunks (ALPH, VP8, VP8L) of a still WebP image"""
+        if webp[:4] != b"RIFF" or webp[8:12] != b"WEBP":
+            raise ValueError("Invalid WebP image")
+        data = bytearray()
+        offset = 12
+        while offset + 8 <= len(webp):
+            fourcc = webp[offset : offset + 4]
+            size = struct.unpack("<I", webp[offset + 4 : offset + 8])[0]
+            end = offset + 8 + size + (size % 2)
+            if fourcc in (b"ALPH", b"VP8 ", b"VP8L"):
+                data += webp[offset:end]
+            offset = end
+        return bytes(data)
+
+    def add(
+        self,
+        webp: bytes,
+        size: tuple[int, int],
+        duration_ms: int,
+        offset: tuple[int, int] = (0, 0),
+        blend: bool = False,
+    ) -> None:
+        """
+        Appends a still WebP image of `size` pixels, drawn at `offset` (even coordinates) of the canvas.
+
+        With `blend`, the image is alpha-blended over the canvas (i.e. its transparent pixels keep the previous frame).
+        """
+        (x, y), (width, height) = offset, size
+        if x % 2 == 1 or y % 2 == 1:
+            raise ValueError(f"Frame offsets must be even, got {offset}")
+        header = (
+            self._uint24(x // 2)
+            + self._uint24(y // 2)
+            + self._uint24(width - 1)
+            + self._uint24(height - 1)
+            + self._uint24(duration_ms)
+            + bytes([0 if blend else self.NO_BLEND])
+        )
+        data = self.frame_data(webp)
+        self._alpha = self._alpha or data.startswith(b"ALPH")
+        self._write_chunk(b"ANMF", header + data)
+        self.nb_frames += 1
+
+    def close(self) -> None:
+        end = self.fp.tell()
+        _ = self.fp.seek(self._start + 4)
+        _ = self.fp.write(struct.pack("<I", end - self._start - 8))
+        if self._alpha:
+            # RIFF header (12 bytes) + VP8X chunk header (8 bytes)
+            _ = self.fp.seek(self._start + 20)
+            _ = self.fp.write(bytes([self.ANIMATION | self.ALPHA]))
+        self.nb_bytes = end - self._start
+        _ = self.fp.seek(end)
+
+
+@cache
+def replay_font(size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    return ImageFont.load_default(size=size)
+
+
+@dataclass(frozen=True)
+class ReplayFrame:
+    """Everything needed to render a replay frame"""
+
+    index: int
+    # encoded screenshot, or None for the start frame
+    screenshot: bytes | None
+    size: tuple[int, int]
+    text: str | None = None
+
+
+def render_replay_frame(frame: ReplayFrame) -> Image.Image:
+    """Decodes, resizes and annotates a single frame with its step text (the frame number is drawn when written)"""
+    width, height = frame.size
+    min_len = max(min(width, height), 25)
+    if frame.screenshot is None:
+        image = Image.new("RGB", frame.size, color="white")
+        draw = ImageDraw.Draw(image)
+        draw.text(
+            (width // 2, height // 2),
+            "\n".join(textwrap.wrap(frame.text or "", width=30)),
+            fill="black",
+            anchor="mm",
+            font=replay_font(min_len // 20),
+        )
+        return image
+    with Image.open(io.BytesIO(frame.screenshot)) as screenshot:
+        image = screenshot.convert("RGB").resize(frame.size)  # pyright: ignore[reportUnknownMemberType]
+    if frame.text is not None:
+        ImageDraw.Draw(image).text(
+            (width // 2, 4 * height // 5),
+            "\n".join(textwrap.wrap(frame.text, width=30)),
+            fill="white",
+            anchor="mm",
+            font=replay_font(min_len // 25),
+            stroke_width=4,
+            stroke_fill="black",
+        )
+    return image
+
+
+def number_frame(image: Image.Image, index: int) -> Image.Image:
+    numbered = image.copy()
+    width, height = image.size
+    ImageDraw.Draw(numbered).text(
+        (width - 10, height - 10),
+        f"{index}",
+        fill="white",
+        anchor="rb",
+        font=replay_font(max(min(width, height), 25) // 15),
+        stroke_width=4,
+        stroke_fill="black",
+    )
+    return numbered
+
+
+def encode_webp(image: Image.Image, quality: int) -> bytes:
+    output = io.BytesIO()
+    image.save(output, format="WEBP", quality=quality, method=0)
+    return output.getvalue()
+
+
+@cache
+def _tolerance_lut(tolerance: int) -> list[int]:
+    # per pixel differences below the tolerance (e.g. compression noise) are ignored
+    return [0] * (tolerance + 1) + list(range(tolerance + 1, 256))
+
+
+# opaque where the (thresholded) difference is not null
+_CHANGED_LUT: list[int] = [0] + [255] * 255
+
+
+def changed_pixels(difference: Image.Image) -> int:
+    """Number of non-zero pixels of a grayscale difference"""
+    return difference.width * difference.height - difference.histogram()[0]
+
+
+def frame_difference(previous: Image.Image, current: Image.Image, tolerance: int) -> Image.Image:
+    """Grayscale absolute difference of two frames of the same size, ignoring differences below `tolerance`"""
+    return ImageChops.difference(previous, current).convert("L").point(_tolerance_lut(tolerance))  # pyright: ignore[reportUnknownMemberType]
+
+
+def image_size(screenshot: bytes) -> tuple[int, int]:
+    # only reads the image header, pixels are not decoded
+    with Image.open(io.BytesIO(screenshot)) as image:
+        return image.size
+
+
+def is_valid_size(size: tuple[int, int]) -> bool:
+    return size[0] > 1 and size[1] > 1
+
+
+def most_common_size(screenshots: Iterable[bytes]) -> tuple[int, int] | None:
+    """Most common size of the screenshots larger than 1x1 (only reads the image headers)"""
+    sizes = [image_size(screenshot) for screenshot in screenshots]
+    valid_sizes = [size for size in sizes if is_valid_size(size)]
+    if len(valid_sizes) > 0:
+        return Counter(valid_sizes).most_common(1)[0][0]
+    return sizes[0] if len(sizes) > 0 else None
+
+
+@dataclass
+class ReplayStats:
+    nb_screenshots: int = 0
+    # animation frames written: near-duplicate screenshots are collapsed into the previous frame
+    nb_frames: int = 0
+    nb_collapsed: int = 0
+    # frames only storing the region that changed since the previous frame
+    nb_partial: int = 0
+    input_bytes: int = 0
+    output_bytes: int = 0
+
+    @property
+    def compression_ratio(self) -> float:
+        """Size of the input screenshots over the size of the replay"""
+        return self.input_bytes / self.output_bytes if self.output_bytes > 0 else 0.0
+
+
+@dataclass
+class ReplayEncoder:
+    """
+    Streaming animated WebP encoder for screenshot replays.
+
+    Screenshots are decoded, resized, annotated and encoded one frame at a time,
+    so that memory stays bounded by a few frames whatever the length of the replay.
+
+    Near-duplicate screenshots (waits, failed clicks, scrolls that didn't move, ...) are collapsed into a longer
+    display of the previous frame, and frames that only partly changed only store the changed region.
+    """
+
+    scale_factor: float = 0.7
+    quality: int = 25
+    frametime_in_ms: int = 1000
+    start_text: str = "Start"
+    ignore_incorrect_size: bool = False
+    # number of changed pixels up to which a frame is a duplicate of the previous one (None: disabled)
+    duplicate_max_pixels: int | None = 0
+    # per pixel differences ignored when comparing frames
+    pixel_tolerance: int = 8
+    # frames whose changed region covers more than this fraction of the canvas are stored in full (0: disabled)
+    max_partial_area: float = 0.5
+
+    def frames(
+        self,
+        screenshots: Iterable[bytes],
+        step_text: Sequence[str] | None,
+        size: tuple[int, int],
+    ) -> Iterator[ReplayFrame]:
+        width, height = int(math.ceil(size[0] * self.scale_factor)), int(math.ceil(size[1] * self.scale_factor))
+        yield ReplayFrame(index=0, screenshot=None, size=(width, height), text=self.start_text)
+        index = 0
+        for screenshot in screenshots:
+            # if next images are of incorrect size, either ignore or reshape them
+            if self.ignore_incorrect_size and image_size(screenshot) != size:
+                continue
+            text = None
+            if step_text is not None:
+                if index >= len(step_text):
+                    raise ValueError(
+                        f"number of step text should match number of screenshots but got {len(step_text)=}"
+                    )
+                text = step_text[index]
+            index += 1
+            yield ReplayFrame(index=index, screenshot=screenshot, size=(width, height), text=text)
+        if step_text is not None and index != len(step_text):
+            raise ValueError(
+                f"number of step text should match number of screenshots but got {len(step_text)=} and {index=}"
+            )
+
+    def is_duplicate(self, previous: Image.Image, current: Image.Image) -> bool:
+        if self.duplicate_max_pixels is None:
+            return False
+        difference = frame_difference(previous, current, self.pixel_tolerance)
+        return changed_pixels(difference) <= self.duplicate_max_pixels
+
+    def changed_region(self, previous: Image.Image, current: Image.Image) -> tuple[tuple[int, int], Image.Image] | None:
+        """
+        Offset and changed pixels of `current` cropped to their bounding box, unchanged pixels being transparent.
+
+        Returns None if the frame should be stored in full.
+        """
+        difference = frame_difference(previous, current, self.pixel_tolerance)
+        bbox = difference.getbbox()
+        if bbox is None:
+            return None
+        left, top, right, bottom = bbox
+        # frame offsets are stored divided by 2
+        left, top = left - left % 2, top - top % 2
+        mask = difference.crop((left, top, right, bottom)).point(_CHANGED_LUT)  # pyright: ignore[reportUnknownMemberType]
+        if changed_pixels(mask) > self.max_partial_area * current.width * current.height:
+            return None
+        region = current.crop((left, top, right, bottom))
+        region.putalpha(mask)
+        return (left, top), region
+
+    def add_frame(
+        self, writer: AnimatedWebpWriter, image: Image.Image, offset: tuple[int, int], duration_ms: int
+    ) -> None:
+        # partial frames (with transparent unchanged pixels) are blended over the previous frame
+        blend = image.mode == "RGBA"
+        writer.add(encode_webp(image, self.quality), image.size, duration_ms=duration_ms, offset=offset, blend=blend)
+
+    def write(
+        self,
+        fp: BinaryIO,
+        screenshots: Iterable[bytes],
+        step_text: Sequence[str] | None = None,
+        size: tuple[int, int] | None = None,
+    ) -> ReplayStats:
+        """
+        Writes the replay of `screenshots` to `fp` (nothing is written if there are no screenshots).
+
+        Frames are resized to `size` (defaults to the most common size of the screenshots if they are a sequence,
+        to the size of the first one otherwise) scaled by `scale_factor`.
+        """
+        stats = ReplayStats()
+        if size is None and isinstance(screenshots, Sequence):
+            size = most_common_size(screenshots)
+        iterator = iter(screenshots)
+        head: list[bytes] = []
+        for screenshot in iterator:
+            head.append(screenshot)
+            # placeholder screenshots (e.g. 1x1 empty observations) don't size the replay
+            if size is not None or is_valid_size(image_size(screenshot)):
+                break
+        if len(head) == 0:
+            return stats
+        size = size or image_size(head[-1])
+        writer: AnimatedWebpWriter | None = None
+        # the last frame is only written once the next one differs, as its duration is stored with it
+        pending: tuple[Image.Image, tuple[int, int]] | None = None
+        duration = 0
+        # last written frame, without and with its frame number
+        reference: Image.Image | None = None
+        canvas: Image.Image | None = None
+        for frame in self.frames(itertools.chain(head, iterator), step_text, size):
+            image = render_replay_frame(frame)
+            if frame.screenshot is not None:
+                stats.nb_screenshots += 1
+                stats.input_bytes += len(frame.screenshot)
+            if reference is not None and self.is_duplicate(reference, image):
+                duration += self.frametime_in_ms
+                stats.nb_collapsed += 1
+                continue
+            if writer is None:
+                writer = AnimatedWebpWriter(fp, frame.size)
+            if pending is not None:
+                self.add_frame(writer, *pending, duration_ms=duration)
+            numbered = number_frame(image, frame.index)
+            region = None
+            if canvas is not None and self.max_partial_area > 0:
+                region = self.changed_region(canvas, numbered)
+            if region is None:
+                pending = (numbered, (0, 0))
+            else:
+                offset, partial = region
+                pending = (partial, offset)
+                stats.nb_partial += 1
+            duration = self.frametime_in_ms
+            reference, canvas = image, numbered
+        assert writer is not None and pending is not None
+        self.add_frame(writer, *pending, duration_ms=duration)
+        writer.close()
+        stats.nb_frames = writer.nb_frames
+        stats.output_bytes = writer.nb_bytes
+        logger.debug(
+            f"🎞️ Replay: {stats.nb_screenshots} screenshots -> {stats.nb_frames} frames "
+            + f"({stats.nb_collapsed} collapsed, {stats.nb_partial} partial), "
+            + f"{stats.compression_ratio:.1f}x smaller than the screenshots"
+        )
+        return stats
 
-        if not images:
-            self._pillow_images = []
-            return self
+    def encode(
+        self,
+        screenshots: Iterable[bytes],
+        step_text: Sequence[str] | None = None,
+        size: tuple[int, int] | None = None,
+    ) -> bytes:
+        buffer = io.BytesIO()
+        _ = self.write(buffer, screenshots, step_text=step_text, size=size)
+        return buffer.getvalue()
 
-        sizes = [img.size for img in images if img.size[0] > 1 and img.size[1] > 1]
-        most_common_size = Counter(sizes).most_common(1)[0][0] if sizes else images[0].size
 
-        # Standardize all images to the most common size
-        standardized_images: list[Image.Image] = []
-        for img in images:
-            if img.size != most_common_size:
-                img = img.resize(most_common_size)
-            standardized_images.append(img)
+class ScreenshotReplay(BaseModel):
+    class Config:
+        frozen: bool = True
 
-        self._pillow_images = standardized_images
-        return self
+    b64_screenshots: list[str]
 
     @property
     def pillow_images(self) -> list[Image.Image]:
-        return self._pillow_images
+        """Decoded screenshots standardized to the most common size (decodes all the screenshots at once)"""
+        images = [self.base64_to_pillow_image(screen) for screen in self.b64_screenshots]
+        size = self.most_common_size()
+        return [img if img.size == size else img.resize(size) for img in images]  # pyright: ignore[reportUnknownMemberType]
+
+    def screenshots(self) -> Iterator[bytes]:
+        """Lazily decoded screenshots"""
+        for screenshot in self.b64_screenshots:
+            yield base64.b64decode(screenshot)
+
+    def most_common_size(self) -> tuple[int, int] | None:
+        return most_common_size(self.screenshots())
 
     @classmethod
     def from_base64(cls, screenshots: list[str]):
@@ -197,6 +576,28 @@ class ScreenshotReplay(BaseModel):
         image_data = base64.b64decode(screenshot)
         return Image.open(io.BytesIO(image_data))
 
+    def write_webp(
+        self,
+        fp: BinaryIO,
+        scale_factor: float = 0.7,
+        quality: int = 25,
+        frametime_in_ms: int = 1000,
+        start_text: str = "Start",
+        ignore_incorrect_size: bool = False,
+        step_text: list[str] | None = None,
+        duplicate_max_pixels: int | None = 0,
+    ) -> ReplayStats:
+        """Streams the replay to `fp`, decoding the screenshots one at a time (cf. `ReplayEncoder`)"""
+        encoder = ReplayEncoder(
+            scale_factor=scale_factor,
+            quality=quality,
+            frametime_in_ms=frametime_in_ms,
+            start_text=start_text,
+            ignore_incorrect_size=ignore_incorrect_size,
+            duplicate_max_pixels=duplicate_max_pixels,
+        )
+        return encoder.write(fp, self.screenshots(), step_text=step_text, size=self.most_common_size())
+
     def build_webp(
         self,
         scale_factor: float = 0.7,
@@ -205,92 +606,21 @@ class ScreenshotReplay(BaseModel):
         start_text: str = "Start",
         ignore_incorrect_size: bool = False,
         step_text: list[str] | None = None,
+        duplicate_max_pixels: int | None = 0,
     ) -> bytes:
         if len(self.b64_screenshots) == 0:
             return b""
-
-        # resize images with scale factor
-        resized_screenshots: list[Image.Image] = []
-        prev_size = None
-
-        for im in self.pillow_images:
-            if prev_size is None:
-                prev_size = im.size
-            else:
-                # if next images are of incorrect size, either ignore or reshape them
-                if prev_size != im.size and ignore_incorrect_size:
-                    continue
-
-            (width, height) = (int(math.ceil(prev_size[0] * scale_factor)), int(math.ceil(prev_size[1] * scale_factor)))
-
-            resized_screenshots.append(im.resize((width, height)))
-
-        width, height = resized_screenshots[0].size
-
-        # fonts
-        min_len = max(min(width, height), 25)
-        small_font = ImageFont.load_default(size=min_len // 25)
-        medium_font = ImageFont.load_default(size=min_len // 20)
-        big_font = ImageFont.load_default(size=min_len // 15)
-
-        # first frame with start
-        start_image = Image.new("RGB", (width, height), color="white")
-        draw = ImageDraw.Draw(start_image)
-        draw.text(
-            (width // 2, height // 2),
-            "\n".join(textwrap.wrap(start_text, width=30)),
-            fill="black",
-            anchor="mm",
-            font=medium_font,
-        )
-
-        if step_text is not None and len(step_text) != len(resized_screenshots):
-            raise ValueError(
-                f"number of step text should match number of screenshots but got {len(step_text)=} and {len(resized_screenshots)=}"
-            )
-
-        resized_screenshots.insert(0, start_image)
-        if step_text is not None:
-            step_text.insert(0, "")
-
-        # Add frame numbers to each screenshot
-        for i, img in enumerate(resized_screenshots):
-            draw = ImageDraw.Draw(img)
-            frame_text = f"{i}"
-            draw.text(
-                (width - 10, height - 10),
-                frame_text,
-                fill="white",
-                anchor="rb",
-                font=big_font,
-                stroke_width=4,
-                stroke_fill="black",
-            )
-
-            if step_text is not None:
-                text = step_text[i]
-                draw.text(
-                    (width // 2, 4 * height // 5),
-                    "\n".join(textwrap.wrap(text, width=30)),
-                    fill="white",
-                    anchor="mm",
-                    font=small_font,
-                    stroke_width=4,
-                    stroke_fill="black",
-                )
-
-        # Save as animated WebP to bytes buffer
         buffer = io.BytesIO()
-        resized_screenshots[0].save(
+        _ = self.write_webp(
             buffer,
-            "WEBP",
-            save_all=True,
-            append_images=resized_screenshots[1:],
-            duration=frametime_in_ms,
+            scale_factor=scale_factor,
             quality=quality,
-            loop=0,
+            frametime_in_ms=frametime_in_ms,
+            start_text=start_text,
+            ignore_incorrect_size=ignore_incorrect_size,
+            step_text=step_text,
+            duplicate_max_pixels=duplicate_max_pixels,
         )
-        _ = buffer.seek(0)
         return buffer.getvalue()
 
     def get(self, **kwargs: dict[Any, Any]) -> WebpReplay:
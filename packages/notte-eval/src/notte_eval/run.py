@@ -312,8 +312,12 @@ def save_task(root_path: str | Path, task_res: TaskResult):
     with open(path / "results_no_screenshot.json", "w") as f:
         _ = f.write(task_res.model_dump_json(indent=2, exclude={"screenshots"}))
 
-    with open(path / "summary.webp", "wb") as f:
-        _ = f.write(task_res.screenshots.build_webp(start_text=task_res.task.question))
+    if len(task_res.screenshots.b64_screenshots) > 0:
+        # streamed to disk: screenshots are decoded and encoded one frame at a time
+        with open(path / "summary.webp", "wb") as f:
+            _ = task_res.screenshots.write_webp(f, start_text=task_res.task.question)
+    else:
+        (path / "summary.webp").touch()
 
 
 def load_data(input_stream: TextIO | None = None) -> dict[str, Any]:
@@ -0,0 +1,56 @@
+import pytest
+from litellm import AllMessageValues
+from notte_agent.common.conversation import Conversation
+
+
+@pytest.fixture
+def counted(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """One token per character, records the counted messages"""
+    counted: list[str] = []
+
+    def count_tokens(_: Conversation, content: AllMessageValues) -> int:
+        text = str(content["content"])
+        counted.append(text)
+        return len(text)
+
+    monkeypatch.setattr(Conversation, "count_tokens", count_tokens)
+    return counted
+
+
+@pytest.fixture
+def conv(counted: list[str]) -> Conversation:
+    return Conversation(autosize=True, max_tokens=100, conservative_factor=1.0)
+
+
+def contents(conv: Conversation) -> list[str]:
+    return [str(message["content"]) for message in conv.messages()]
+
+
+def test_trimming_keeps_init_messages_and_latest_messages(conv: Conversation, counted: list[str]):
+    conv.add_system_message("s" * 10)
+    conv.add_user_message("t" * 10)
+    for i in range(10):
+        conv.add_assistant_message(str(i) * 20)
+
+    # 100 tokens: 20 for the init messages + the 4 latest messages
+    assert contents(conv) == ["s" * 10, "t" * 10] + [str(i) * 20 for i in range(6, 10)]
+    assert conv.total_tokens() == 100
+    # every message is only counted once
+    assert len(counted) == 12
+
+
+def test_temporary_messages_are_removed(conv: Conversation):
+    conv.add_system_message("s" * 10)
+    conv.add_user_message("t" * 10)
+    for i in range(4):
+        conv.add_assistant_message(str(i) * 20)
+    before = contents(conv)
+
+    with conv.temporary_messages():
+        conv.add_user_message("o" * 50)
+        # older messages make room for the observation
+        assert contents(conv) == ["s" * 10, "t" * 10, "3" * 20, "o" * 50]
+
+    assert contents(conv) == before and conv.total_tokens() == 100
+    conv.add_assistant_message("4" * 20)
+    assert contents(conv) == ["s" * 10, "t" * 10] + [str(i) * 20 for i in range(1, 5)]
@@ -0,0 +1,183 @@
+import base64
+import json
+import sys
+from array import array
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import notte_browser.dom.parsing as parsing
+import pytest
+from notte_browser.dom.id_generation import generate_sequential_ids
+from notte_browser.dom.parsing import DOM_TREE_JS_CALL, ParseDomTreePipe, dom_tree_js_install_script
+from notte_browser.rendering.json import JsonDomNodeRenderingPipe
+from notte_browser.rendering.markdown import MarkdownDomNodeRenderingPipe
+from notte_browser.rendering.pipe import DomNodeRenderingPipe, DomNodeRenderingType
+from notte_core.common.config import config
+
+
+def fake_page(result: dict[str, Any]) -> MagicMock:
+    installed = False
+
+    async def evaluate(expression: str, arg: Any = None) -> Any:
+        nonlocal installed
+        if expression == dom_tree_js_install_script():
+            installed = True
+            return None
+        assert expression == DOM_TREE_JS_CALL
+        return result if installed else None
+
+    page = MagicMock()
+    page.evaluate = AsyncMock(side_effect=evaluate)
+    return page
+
+
+@pytest.mark.asyncio
+async def test_dom_tree_script_is_installed_once_per_document():
+    result = {"rootId": "0", "map": {}}
+    page = fake_page(result)
+    dom_config = {"highlight_elements": False}
+
+    assert await ParseDomTreePipe.evaluate_dom_tree(page, dom_config) == result
+    assert page.evaluate.await_count == 3
+
+    # subsequent snapshots only send the config payload
+    assert await ParseDomTreePipe.evaluate_dom_tree(page, dom_config) == result
+    assert page.evaluate.await_count == 4
+    assert page.evaluate.await_args.args == (DOM_TREE_JS_CALL, dom_config)
+
+
+@pytest.mark.asyncio
+async def test_incremental_snapshot_reuses_previous_tree(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(parsing, "config", config.model_copy(update={"incremental_snapshots": True}))
+    build = {
+        "rootId": "1",
+        "buildId": "build-1",
+        "map": {
+            "0": {"type": "TEXT_NODE", "text": "hello", "isVisible": True},
+            "1": {"tagName": "body", "attributes": {}, "xpath": "/body", "children": ["0"]},
+        },
+    }
+    page = MagicMock()
+    page.url = "https://example.com"
+    page.evaluate = AsyncMock(side_effect=[build, {"rootId": None, "unchanged": True, "buildId": "build-1"}])
+
+    first = await ParseDomTreePipe.parse_dom_tree(page)
+    second = await ParseDomTreePipe.parse_dom_tree(page)
+    assert second is first
+    assert page.evaluate.await_args.args[1]["previous_build_id"] == "build-1"
+
+
+def test_decode_columnar_dom_tree():
+    def encode(typecode: str, values: list[Any]) -> str:
+        return base64.b64encode(array(typecode, values).tobytes()).decode()
+
+    strings = ["hello", "body", "/body", "a", "/body/a", "href", "/home"]
+    # flags, tag, xpath, text, highlight, child_start, child_count, attr_start, attr_count, bbox
+    nodes = [
+        [3, -1, -1, 0, -1, 0, 0, 0, 0, -1],  # visible text node
+        [14, 3, 4, -1, 0, 0, 1, 1, 1, 0],  # interactive link with a bbox
+        [2, 1, 2, -1, -1, 3, 1, 4, 0, -1],  # body
+    ]
+    links = [0, 5, 6, 1]
+    columnar = {
+        "count": len(nodes),
+        "strings": strings,
+        "nodes": encode("i", [value for node in nodes for value in node]),
+        "links": encode("i", links),
+        "bboxes": encode("d", [float(i) for i in range(10)]),
+    }
+    root = ParseDomTreePipe.decode_columnar_dom_tree(columnar, "2")
+    assert root["tagName"] == "body"
+    [link] = root["children"]
+    assert link["tagName"] == "a"
+    assert link["attributes"] == {"href": "/home"}
+    assert link["highlightIndex"] == 0
+    assert link["isInteractive"] and link["isTopElement"] and not link["shadowRoot"]
+    assert link["bbox"] is not None and link["bbox"]["viewport_height"] == 9.0
+    assert link["children"] == [{"type": "TEXT_NODE", "text": "hello", "isVisible": True}]
+
+
+def test_parse_dom_tree_deeper_than_recursion_limit():
+    depth = 5 * sys.getrecursionlimit()
+    root: dict[str, Any] = {"tagName": "body", "xpath": "body", "attributes": {}, "children": []}
+    parent = root
+    for i in range(depth):
+        child = {"tagName": "div", "xpath": f"div[{i}]", "attributes": {}, "isVisible": True, "children": []}
+        parent["children"].append(child)
+        parent = child
+    parent["children"].append({"type": "TEXT_NODE", "text": "deep", "isVisible": True})
+    parent["children"].append({"tagName": None, "xpath": None, "attributes": {}, "children": []})
+
+    dom_tree = ParseDomTreePipe._parse_node(  # pyright: ignore[reportPrivateUsage]
+        root,  # pyright: ignore[reportArgumentType]
+        parent=None,
+        in_iframe=False,
+        in_shadow_root=False,
+        iframe_parent_css_paths=[],
+        notte_selector="",
+    )
+    assert dom_tree is not None
+    node = dom_tree.to_notte_domnode()
+    flat = node.flatten()
+    assert len(flat) == depth + 2
+    leaf = flat[-1]
+    assert leaf.text == "deep"
+    assert leaf.parent is flat[-2]
+    assert node.inner_text() == "deep"
+
+    filtered = node.subtree_filter(lambda _: True)
+    assert filtered is not None and len(filtered.flatten()) == depth + 2
+    # without the text leaf, the whole chain of empty containers is pruned
+    assert node.subtree_filter(lambda n: n.text != "deep") is None
+
+
+def test_render_dom_tree_deeper_than_recursion_limit():
+    depth = 5 * sys.getrecursionlimit()
+    bbox = {"x": 0.0, "y": 0.0, "width": 10.0, "height": 10.0, "scroll_x": 0.0, "scroll_y": 0.0}
+    bbox |= {"iframe_offset_x": 0.0, "iframe_offset_y": 0.0, "viewport_width": 1280.0, "viewport_height": 720.0}
+    root: dict[str, Any] = {"tagName": "body", "xpath": "body", "attributes": {}, "children": []}
+    parent = root
+    for i in range(depth):
+        child = {"tagName": "div", "xpath": f"div[{i}]", "attributes": {}, "isVisible": True, "children": []}
+        parent["children"].append(child)
+        parent = child
+    button = {
+        "tagName": "button",
+        "xpath": "button",
+        "attributes": {"aria-label": "Deep action"},
+        "isVisible": True,
+        "isInteractive": True,
+        "isTopElement": True,
+        "highlightIndex": 0,
+        "bbox": bbox,
+        "children": [{"type": "TEXT_NODE", "text": "Go", "isVisible": True}],
+    }
+    parent["children"].extend([button, {"type": "TEXT_NODE", "text": "deep", "isVisible": True}])
+
+    dom_tree = ParseDomTreePipe._parse_node(  # pyright: ignore[reportPrivateUsage]
+        root,  # pyright: ignore[reportArgumentType]
+        parent=None,
+        in_iframe=False,
+        in_shadow_root=False,
+        iframe_parent_css_paths=[],
+        notte_selector="",
+    )
+    assert dom_tree is not None
+    node = generate_sequential_ids(dom_tree).to_notte_domnode()
+    [inode] = node.interaction_nodes()
+
+    interaction_only = DomNodeRenderingPipe.forward(node, type=DomNodeRenderingType.INTERACTION_ONLY)
+    assert interaction_only.splitlines()[-2:] == [
+        f'{inode.id}[:]<button aria_label="Deep action">Go</button>',
+        "_[:]deep",
+    ]
+    # pruning folds the chain of containers: also render the unpruned tree
+    markdown = DomNodeRenderingPipe.forward(node, type=DomNodeRenderingType.MARKDOWN)
+    assert f'button {inode.id} "Deep action Go"' in markdown
+    markdown = MarkdownDomNodeRenderingPipe.forward(node, include_ids=True)
+    assert markdown.count("{") == markdown.count("}") == depth + 2 and f'button {inode.id} "Deep action" {{' in markdown
+    rendered_json = json.loads(DomNodeRenderingPipe.forward(node, type=DomNodeRenderingType.JSON))
+    assert rendered_json["children"][0]["id"] == inode.id
+    rendered_json = JsonDomNodeRenderingPipe.forward(node)
+    assert rendered_json.count('"children": [') == depth + 2 and f'"id": "{inode.id}"' in rendered_json
+    assert repr(node).count("\n") >= depth
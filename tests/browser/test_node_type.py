@@ -161,6 +161,44 @@ def test_notte_node_flatten():
     assert group not in interaction_nodes
 
 
+def test_notte_node_interaction_index_is_memoized():
+    buttons = [
+        DomNode(
+            id=f"B{i}",
+            role=NodeRole.BUTTON,
+            text=f"Button {i}",
+            type=NodeType.INTERACTION,
+            children=[],
+            attributes=None,
+            computed_attributes=ComputedDomAttributes(),
+        )
+        for i in range(3)
+    ]
+    group = DomNode(
+        id=None,
+        role=NodeRole.GROUP,
+        text="",
+        type=NodeType.OTHER,
+        children=buttons,
+        attributes=None,
+        computed_attributes=ComputedDomAttributes(),
+    )
+
+    inodes = group.interaction_nodes()
+    assert [inode.id for inode in inodes] == ["B0", "B1", "B2"]
+    # computed once, then served from the cache
+    assert group.interaction_nodes() is inodes
+    assert group.find("B1") is inodes[1]
+    assert group.interaction_node("B2") is inodes[2]
+    assert group.interaction_node("B3") is None
+
+    # filtered trees are new trees with their own index
+    filtered = group.subtree_filter(lambda node: node.id != "B1")
+    assert filtered is not None
+    assert [inode.id for inode in filtered.interaction_nodes()] == ["B0", "B2"]
+    assert filtered.find("B1") is None
+
+
 def test_html_selector():
     selector = NodeSelectors(
         playwright_selector="button[name='Submit']",
@@ -0,0 +1,146 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import notte_browser.playwright as notte_playwright
+import pytest
+from notte_browser.playwright import PooledPlaywrightManager, SharedPlaywrightManager
+from notte_browser.playwright_async_api import Browser, Page, Playwright
+from notte_browser.window import BrowserResource, BrowserWindowOptions
+from notte_sdk.types import SessionStartRequest
+
+
+def fake_browser() -> MagicMock:
+    browser = MagicMock(spec=Browser)
+    browser.is_connected.return_value = True
+    browser.close = AsyncMock()
+    return browser
+
+
+def fake_resource(options: BrowserWindowOptions) -> BrowserResource:
+    page = MagicMock(spec=Page)
+    page.context.close = AsyncMock()
+    page.context.pages = []
+    return BrowserResource(page=page, options=options)
+
+
+@pytest.fixture
+def manager() -> PooledPlaywrightManager:
+    options = BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+    manager = PooledPlaywrightManager(pool_size=2, options=options)
+    playwright = MagicMock()
+    playwright.stop = AsyncMock()
+    manager.set_playwright(playwright)
+    manager.create_playwright_browser = AsyncMock(side_effect=lambda _: fake_browser())  # type: ignore[method-assign]
+    manager.get_browser_resource = AsyncMock(side_effect=lambda options, _: fake_resource(options))  # type: ignore[method-assign]
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_pool_hands_out_warm_contexts_and_recycles(manager: PooledPlaywrightManager):
+    await manager.fill_pool()
+    assert manager.create_playwright_browser.await_count == 2  # type: ignore[attr-defined]
+    assert len(manager.stats.launch_latencies) == 2
+
+    window = await manager.new_window()
+    assert manager.stats.hits == 1
+    assert manager.stats.warm_context_hits == 1
+    assert manager.idle.qsize() == 1
+
+    await window.close()
+    window.page.context.close.assert_awaited_once()  # type: ignore[attr-defined]
+    # browser went back to the pool with a freshly warmed context and no new launch
+    assert manager.idle.qsize() == 2
+    assert manager.create_playwright_browser.await_count == 2  # type: ignore[attr-defined]
+
+
+@pytest.mark.asyncio
+async def test_pool_falls_back_to_dedicated_browser(manager: PooledPlaywrightManager):
+    await manager.fill_pool()
+    windows = [await manager.new_window() for _ in range(3)]
+    assert manager.stats.hits == 2
+    assert manager.stats.misses == 1
+    assert manager.create_playwright_browser.await_count == 3  # type: ignore[attr-defined]
+
+    cdp_options = manager.options.model_copy(update={"cdp_url": "ws://localhost:9222"})
+    assert not manager.is_poolable(cdp_options)
+
+    for window in windows:
+        await window.close()
+    assert manager.idle.qsize() == 2
+    await manager.astop()
+    assert not manager.is_started()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_starts_and_refills_launch_the_pool_once(
+    manager: PooledPlaywrightManager, monkeypatch: pytest.MonkeyPatch
+):
+    async def launch(_: BrowserWindowOptions) -> MagicMock:
+        await asyncio.sleep(0.01)
+        return fake_browser()
+
+    manager.create_playwright_browser = AsyncMock(side_effect=launch)  # type: ignore[method-assign]
+    await manager.astop()
+    starter = MagicMock()
+    starter.start = AsyncMock(return_value=MagicMock(stop=AsyncMock()))
+    monkeypatch.setattr(notte_playwright, "async_playwright", lambda: starter)
+
+    _ = await asyncio.gather(manager.new_window(), manager.new_window())
+    starter.start.assert_awaited_once()
+    assert manager.create_playwright_browser.await_count == 2  # type: ignore[attr-defined]
+    _ = await asyncio.gather(manager.fill_pool(), manager.fill_pool())
+    # both pooled browsers are in use: refilling doesn't launch more than the pool size
+    assert manager.create_playwright_browser.await_count == 2  # type: ignore[attr-defined]
+
+
+@pytest.fixture
+def shared_playwright(monkeypatch: pytest.MonkeyPatch) -> MagicMock:
+    playwright = MagicMock(spec=Playwright)
+    playwright.stop = AsyncMock()
+    playwright.chromium.launch = AsyncMock(side_effect=lambda **_: fake_browser())
+    starter = MagicMock()
+    starter.start = AsyncMock(return_value=playwright)
+    monkeypatch.setattr(notte_playwright, "async_playwright", lambda: starter)
+    monkeypatch.setattr(
+        SharedPlaywrightManager,
+        "get_browser_resource",
+        AsyncMock(side_effect=lambda options, _: fake_resource(options)),
+    )
+    return starter
+
+
+@pytest.mark.asyncio
+async def test_shared_driver_is_started_once_and_refcounted(shared_playwright: MagicMock):
+    managers = [SharedPlaywrightManager(), SharedPlaywrightManager()]
+    for manager in managers:
+        await manager.astart()
+    shared_playwright.start.assert_awaited_once()
+    assert managers[0].playwright is managers[1].playwright
+
+    options = BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+    windows = [await manager.new_window(options) for manager in managers]
+    # one browser process, one context per window
+    managers[0].playwright.chromium.launch.assert_awaited_once()  # type: ignore[attr-defined]
+    assert windows[0].page is not windows[1].page
+
+    for window in windows:
+        await window.close()
+        window.page.context.close.assert_awaited_once()  # type: ignore[attr-defined]
+
+    await managers[0].astop()
+    shared_playwright.start.return_value.stop.assert_not_awaited()
+    await managers[1].astop()
+    shared_playwright.start.return_value.stop.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_shared_driver_limits_concurrent_windows(shared_playwright: MagicMock):
+    options = BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+    async with SharedPlaywrightManager(max_concurrent_windows=1) as manager:
+        window = await manager.new_window(options)
+        with pytest.raises(TimeoutError):
+            async with asyncio.timeout(0.1):
+                _ = await manager.new_window(options)
+        await window.close()
+        other = await manager.new_window(options)
+        await other.close()
@@ -0,0 +1,78 @@
+import io
+import pickle
+from unittest.mock import patch
+
+import pytest
+from notte_core.browser.highlighter import BoundingBox
+from notte_core.browser.observation import Screenshot, ScreenshotOptions
+from notte_core.common.config import ScreenshotFormat
+from notte_core.utils.image import image_mime_type
+from PIL import Image
+
+
+def png(width: int = 1280, height: int = 720) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), color="#2B2BF7").save(output, format="PNG")
+    return output.getvalue()
+
+
+def bbox(notte_id: str) -> BoundingBox:
+    return BoundingBox(
+        x=10,
+        y=10,
+        width=100,
+        height=40,
+        scroll_x=0,
+        scroll_y=0,
+        viewport_width=1280,
+        viewport_height=720,
+        notte_id=notte_id,
+    )
+
+
+@pytest.mark.parametrize("format", [ScreenshotFormat.JPEG, ScreenshotFormat.WEBP])
+def test_screenshot_variants_are_encoded_with_the_options(format: ScreenshotFormat):
+    screenshot = Screenshot(raw=png(), bboxes=[bbox("B1")])
+    options = ScreenshotOptions(format=format, quality=50, max_width=640, clip=(0, 0, 1280, 360), grayscale=True)
+    data = screenshot.bytes("full", options)
+
+    assert image_mime_type(data) == options.mime_type
+    image = Image.open(io.BytesIO(data))
+    assert image.size == options.encoded_size((1280, 720)) == (640, 180)
+    # WEBP has no grayscale mode: grayscale images are decoded as RGB
+    red, green, blue = image.convert("RGB").getpixel((320, 150))  # pyright: ignore[reportGeneralTypeIssues]
+    assert red == green == blue
+    assert len(data) < len(screenshot.bytes("full", ScreenshotOptions()))
+
+
+def test_screenshot_variants_are_cached():
+    screenshot = Screenshot(raw=png())
+    jpeg = ScreenshotOptions(format=ScreenshotFormat.JPEG)
+    data = screenshot.bytes("raw", jpeg)
+    with patch.object(ScreenshotOptions, "encode") as encode:
+        assert screenshot.bytes("raw", ScreenshotOptions(format=ScreenshotFormat.JPEG)) == data
+        # PNG screenshots are returned as is with the default options
+        assert screenshot.bytes("raw", ScreenshotOptions()) == screenshot.raw
+        encode.assert_not_called()
+
+
+def test_highlighted_screenshots_are_rendered_once():
+    screenshot = Screenshot(raw=png(), bboxes=[bbox(f"B{i}") for i in range(600)], last_action_id="B1")
+    full = screenshot.bytes("full", ScreenshotOptions())
+    last_action = screenshot.bytes("last_action", ScreenshotOptions())
+    assert full != screenshot.raw and last_action not in (full, screenshot.raw)
+    with patch("notte_core.browser.observation.ScreenshotHighlighter.forward") as forward:
+        for _ in range(3):
+            assert screenshot.bytes("full", ScreenshotOptions()) == full
+            assert screenshot.bytes("last_action", ScreenshotOptions()) == last_action
+        forward.assert_not_called()
+
+
+def test_only_the_last_variants_are_cached():
+    screenshot = Screenshot(raw=png(), bboxes=[bbox("B1")], last_action_id="B1")
+    jpeg = ScreenshotOptions(format=ScreenshotFormat.JPEG)
+    _ = screenshot.bytes("full", jpeg)
+    _ = screenshot.bytes("last_action", jpeg)
+    assert list(screenshot._variants) == [("last_action", "B1", None), ("last_action", "B1", jpeg)]  # pyright: ignore [reportPrivateUsage]
+    # not pickled with the screenshot
+    assert len(pickle.loads(pickle.dumps(screenshot))._variants) == 0  # pyright: ignore [reportPrivateUsage]
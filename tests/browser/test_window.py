@@ -0,0 +1,84 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import notte_browser.window as notte_window
+import pytest
+from notte_browser.playwright_async_api import Page
+from notte_browser.window import SNAPSHOT_METADATA_JS, BrowserResource, BrowserWindow, BrowserWindowOptions
+from notte_core.browser.dom_tree import ComputedDomAttributes, DomNode
+from notte_core.browser.node_type import NodeRole, NodeType
+from notte_core.browser.snapshot import SnapshotCapturePlan
+from notte_sdk.types import SessionStartRequest
+
+METADATA = {
+    "title": "Example",
+    "scroll_x": 0,
+    "scroll_y": 120.5,
+    "viewport_width": 1280,
+    "viewport_height": 720,
+    "total_width": 1280,
+    "total_height": 4000,
+}
+
+
+def fake_window(page: MagicMock) -> BrowserWindow:
+    options = BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+    return BrowserWindow(resource=BrowserResource(page=page, options=options))
+
+
+def fake_tab(url: str, title: str) -> MagicMock:
+    tab = MagicMock(spec=Page)
+    tab.url = url
+    tab.title = AsyncMock(return_value=title)
+    return tab
+
+
+@pytest.mark.asyncio
+async def test_snapshot_metadata_uses_a_single_evaluate():
+    page = fake_tab("https://example.com", "Example")
+    page.evaluate = AsyncMock(return_value=METADATA)
+    other = fake_tab("https://notte.cc", "Notte")
+    page.context.pages = [other, page]
+
+    metadata = await fake_window(page).snapshot_metadata()
+
+    page.evaluate.assert_awaited_once_with(SNAPSHOT_METADATA_JS)
+    page.title.assert_not_awaited()
+    other.title.assert_awaited_once()
+    assert metadata.title == "Example"
+    assert metadata.viewport.scroll_y == 120
+    assert metadata.viewport.pixels_below == 4000 - 120 - 720
+    assert [(tab.tab_id, tab.title, tab.url) for tab in metadata.tabs] == [
+        (0, "Notte", "https://notte.cc"),
+        (1, "Example", "https://example.com"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_only_captures_planned_artifacts(monkeypatch: pytest.MonkeyPatch):
+    dom_node = DomNode(
+        id=None,
+        type=NodeType.OTHER,
+        role=NodeRole.WEBAREA,
+        text="",
+        children=[],
+        attributes=None,
+        computed_attributes=ComputedDomAttributes(),
+    )
+    dom_pipe = MagicMock()
+    dom_pipe.forward = AsyncMock(return_value=dom_node)
+    monkeypatch.setitem(notte_window.dom_tree_parsers, "default", dom_pipe)
+    page = fake_tab("https://example.com", "Example")
+    page.evaluate = AsyncMock(return_value=METADATA)
+    page.context.pages = [page]
+    page.content = AsyncMock(return_value="<html></html>")
+    page.screenshot = AsyncMock(return_value=b"png")
+    window = fake_window(page)
+
+    snapshot = await window.snapshot(capture=SnapshotCapturePlan(html=False, screenshot=False))
+    page.content.assert_not_awaited()
+    page.screenshot.assert_not_awaited()
+    assert snapshot.html_content == "" and snapshot.screenshot == b"" and snapshot.a11y_tree is None
+    assert snapshot.dom_node is dom_node and snapshot.metadata.title == "Example"
+
+    snapshot = await window.snapshot()
+    assert snapshot.html_content == "<html></html>" and snapshot.screenshot == b"png"
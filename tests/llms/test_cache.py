@@ -0,0 +1,90 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from litellm import ModelResponse
+from notte_core.common.tracer import LlmUsageDictTracer
+from notte_core.llms.cache import LRUCompletionCache, SqliteCompletionCache, TieredCompletionCache
+from notte_core.llms.engine import LLMEngine
+from pydantic import BaseModel
+
+
+class Answer(BaseModel):
+    answer: str
+
+
+def model_response(content: str) -> ModelResponse:
+    return ModelResponse(
+        id="mock-id",
+        choices=[{"message": {"content": content, "role": "assistant"}, "index": 0, "finish_reason": "stop"}],
+        created=1234567890,
+        model="mock-model",
+        usage={"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    )
+
+
+def test_cache_key_depends_on_every_parameter():
+    messages = [{"role": "user", "content": "Hello"}]
+    key = LRUCompletionCache.key("gpt-4o", messages, None, 0.0)  # type: ignore[arg-type]
+    assert key == LRUCompletionCache.key("gpt-4o", [dict(m) for m in messages], None, 0.0)  # type: ignore[arg-type]
+    assert key != LRUCompletionCache.key("gpt-4o-mini", messages, None, 0.0)  # type: ignore[arg-type]
+    assert key != LRUCompletionCache.key("gpt-4o", messages, Answer, 0.0)  # type: ignore[arg-type]
+    assert key != LRUCompletionCache.key("gpt-4o", messages, None, 0.5)  # type: ignore[arg-type]
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCompletionCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats.hits == 3 and cache.stats.misses == 1
+
+
+def test_sqlite_cache_ttl_and_size(tmp_path: Path):
+    cache = SqliteCompletionCache(tmp_path / "cache.db", ttl_seconds=60, max_entries=2)
+    with patch("notte_core.llms.cache.time.time", return_value=1000.0):
+        cache.set("a", "1")
+    with patch("notte_core.llms.cache.time.time", return_value=1001.0):
+        cache.set("b", "2")
+        assert cache.get("a") == "1"
+    with patch("notte_core.llms.cache.time.time", return_value=1002.0):
+        cache.set("c", "3")
+        # 'b' is the least recently used entry
+        assert len(cache) == 2 and cache.get("b") is None
+    with patch("notte_core.llms.cache.time.time", return_value=1061.0):
+        assert cache.get("a") is None
+        assert cache.get("c") == "3"
+
+        # entries are shared with other processes through the database file
+        other = SqliteCompletionCache(tmp_path / "cache.db", ttl_seconds=60)
+        assert other.get("c") == "3"
+
+
+def test_tiered_cache_backfills_memory(tmp_path: Path):
+    memory = LRUCompletionCache()
+    disk = SqliteCompletionCache(tmp_path / "cache.db")
+    disk.set("a", "1")
+    cache = TieredCompletionCache([memory, disk])
+    assert cache.get("a") == "1"
+    assert memory.get("a") == "1"
+
+
+@pytest.mark.asyncio
+async def test_engine_serves_repeated_completions_from_cache():
+    tracer = LlmUsageDictTracer()
+    engine = LLMEngine(tracer=tracer, cache=LRUCompletionCache())
+    messages = [{"role": "user", "content": "Hello"}]
+
+    with patch("litellm.acompletion", return_value=model_response("Hello there!")) as acompletion:
+        first = await engine.completion(messages=messages, model="gpt-4o")  # type: ignore[arg-type]
+        second = await engine.completion(messages=messages, model="gpt-4o")  # type: ignore[arg-type]
+
+    acompletion.assert_called_once()
+    assert second.choices[0].message.content == first.choices[0].message.content  # type: ignore[union-attr]
+    assert second.usage.total_tokens == 0  # type: ignore[attr-defined]
+    metadata = [step.metadata or {} for step in tracer.usage]
+    assert [m["completion_cache"]["hit"] for m in metadata] == [False, True]
+    assert metadata[-1]["completion_cache"]["hit_rate"] == 0.5
@@ -1,14 +1,19 @@
+import asyncio
+from typing import Any
 from unittest.mock import Mock, patch
 
+import notte_core.llms.engine as engine_module
 import pytest
-from litellm import Message
+from litellm import Message, ModelResponse
+from notte_core.common.tracer import LlmUsageDictTracer
 from notte_core.errors.base import ErrorConfig
 from notte_core.llms.engine import LLMEngine, StructuredContent
+from notte_core.llms.service import LLMService
 
 
 @pytest.fixture
 def llm_engine() -> LLMEngine:
-    return LLMEngine()
+    return LLMEngine(tracer=LlmUsageDictTracer())
 
 
 @pytest.mark.asyncio
@@ -95,3 +100,69 @@ Step 4: Process relevant elements.
         )
         text = sc.extract(response_text)
         assert text == "# Before you continue to Google"
+
+
+@pytest.mark.asyncio
+async def test_completion_concurrency_is_bounded() -> None:
+    engine = LLMEngine(max_concurrent_calls=2, tracer=LlmUsageDictTracer())
+    in_flight, max_in_flight = 0, 0
+
+    async def acompletion(*args: Any, **kwargs: Any) -> Mock:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return Mock(choices=[Mock(message=Mock(content="ok"))])
+
+    with patch("litellm.acompletion", side_effect=acompletion):
+        _ = await asyncio.gather(
+            *[engine.completion(messages=[Message(role="user", content="Hello")]) for _ in range(6)]
+        )
+    assert max_in_flight == 2
+
+
+def test_service_reuses_one_engine_and_tracer(monkeypatch: pytest.MonkeyPatch) -> None:
+    tracer = LlmUsageDictTracer()
+    # don't write to the traces directory
+    monkeypatch.setattr(engine_module, "default_llm_tracer", lambda: tracer)
+    service = LLMService(base_model="openai/gpt-4o")
+    assert service.engine.model == "openai/gpt-4o"
+    assert service.engine.tracer is LLMEngine().tracer is tracer
+
+
+@pytest.mark.asyncio
+async def test_prompt_caching_marks_the_stable_prefix() -> None:
+    engine = LLMEngine(tracer=LlmUsageDictTracer())
+    messages: list[Any] = [
+        {"role": "system", "content": "You are a browser agent. " * 1000},
+        {"role": "user", "content": "Find the latest news about AI"},
+        {"role": "assistant", "content": '{"action": {"type": "goto"}}'},
+        {"role": "user", "content": [{"type": "text", "text": "Current page"}]},
+    ]
+    response = ModelResponse(
+        choices=[{"message": {"content": "ok", "role": "assistant"}, "index": 0, "finish_reason": "stop"}],
+        usage={"prompt_tokens": 6000, "completion_tokens": 5, "total_tokens": 6005},
+    )
+    response.usage.prompt_tokens_details = Mock(cached_tokens=5000)  # pyright: ignore[reportAttributeAccessIssue]
+
+    with patch("litellm.acompletion", return_value=response) as acompletion:
+        _ = await engine.completion(messages=messages, model="anthropic/claude-3-5-sonnet-20241022")
+        sent = acompletion.call_args.args[1]
+        assert [isinstance(m["content"], list) and "cache_control" in m["content"][-1] for m in sent] == [
+            True,
+            True,
+            True,
+            False,
+        ]
+        # the conversation itself is not modified
+        assert isinstance(messages[0]["content"], str)
+
+        # openai caches prefixes automatically, small prefixes can't be cached
+        _ = await engine.completion(messages=messages, model="openai/gpt-4o")
+        assert acompletion.call_args.args[1] == messages
+        _ = await engine.completion(messages=messages[1:], model="anthropic/claude-3-5-sonnet-20241022")
+        assert acompletion.call_args.args[1] == messages[1:]
+
+    usage = engine.tracer.summary()  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType, reportUnknownVariableType]
+    assert usage.aggregated_usage.cached_tokens == 3 * 5000  # pyright: ignore[reportUnknownMemberType]
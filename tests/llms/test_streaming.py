@@ -0,0 +1,129 @@
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from litellm import ModelResponseStream
+from notte_core.actions import ClickAction
+from notte_core.agent_types import AgentCompletion
+from notte_core.common.tracer import LlmUsageDictTracer
+from notte_core.errors.llm import LLMStreamAbortedError
+from notte_core.llms.engine import LLMEngine
+from notte_core.llms.streaming import MAX_PREAMBLE_CHARS, IncrementalJsonParser
+from pydantic import BaseModel
+
+COMPLETION = {
+    "state": {
+        "previous_goal_status": "success",
+        "previous_goal_eval": 'Opened the page {with braces} and "quotes"',
+        "page_summary": "Home page",
+        "relevant_interactions": [{"id": "B1", "reason": "login"}],
+        "memory": "",
+        "next_goal": "Click on login",
+    },
+    "action": {"type": "click", "id": "B1"},
+}
+
+
+class Point(BaseModel):
+    x: int
+    y: int
+
+
+def chunked(text: str, size: int = 7) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def test_parser_emits_fields_as_soon_as_they_are_complete():
+    fields: list[str] = []
+    parser = IncrementalJsonParser(AgentCompletion, on_field=lambda name, _: fields.append(name))
+    text = "```json\n" + json.dumps(COMPLETION, indent=2) + "\n```"
+    action_start = text.index('"action"')
+    parser.feed(text[:action_start])
+    assert fields == ["state"] and not parser.done
+    parser.feed(text[action_start:])
+    assert fields == ["state", "action"] and parser.done
+    assert isinstance(parser.fields["action"], ClickAction)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "I cannot answer in JSON. " * (MAX_PREAMBLE_CHARS // 10),
+        '{"x": 1, "y": "not a number"}',
+        '{"x": [1}',
+        '{"x" 1}',
+    ],
+)
+def test_parser_aborts_on_malformed_output(text: str):
+    parser = IncrementalJsonParser(Point)
+    with pytest.raises(LLMStreamAbortedError):
+        for chunk in chunked(text, size=3):
+            parser.feed(chunk)
+
+
+def test_parser_skips_preamble_before_the_object():
+    parser = IncrementalJsonParser(Point)
+    for chunk in chunked('Sure, here is the answer:\n```\n{"x": 1, "y": 2}\n```', size=3):
+        parser.feed(chunk)
+    assert parser.done and parser.fields == {"x": 1, "y": 2}
+
+
+def test_parser_skips_wrapped_objects():
+    parser = IncrementalJsonParser(Point)
+    parser.feed('{"json": {"x": 1, "y": 2}}')
+    assert parser.done and parser.fields == {}
+
+
+def stream(text: str) -> AsyncIterator[ModelResponseStream]:
+    async def chunks() -> AsyncIterator[ModelResponseStream]:
+        for chunk in chunked(text):
+            yield ModelResponseStream(choices=[{"delta": {"content": chunk, "role": "assistant"}, "index": 0}])
+
+    return chunks()
+
+
+class ClosableStream:
+    def __init__(self, text: str) -> None:
+        self.chunks: AsyncIterator[ModelResponseStream] = stream(text)
+        self.closed: bool = False
+
+    def __aiter__(self) -> AsyncIterator[ModelResponseStream]:
+        return self.chunks
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_aborted_streams_are_closed():
+    aborted = ClosableStream('{"x": [1}' + " " * 1000)
+
+    def on_delta(_: str) -> None:
+        raise LLMStreamAbortedError("aborted")
+
+    with pytest.raises(LLMStreamAbortedError):
+        _ = await LLMEngine._collect_stream(aborted, [], on_delta)  # pyright: ignore [reportPrivateUsage, reportArgumentType]
+    assert aborted.closed
+
+
+@pytest.mark.asyncio
+async def test_streamed_structured_completion_retries_early_on_malformed_output():
+    engine = LLMEngine(tracer=LlmUsageDictTracer())
+    fields: dict[str, Any] = {}
+    responses = [stream("I cannot answer in JSON " * 50), stream(json.dumps(COMPLETION))]
+
+    with patch("litellm.acompletion", side_effect=responses) as acompletion:
+        completion = await engine.structured_completion(
+            [{"role": "user", "content": "Hello"}],
+            response_format=AgentCompletion,
+            use_strict_response_format=False,
+            stream=True,
+            on_field=fields.__setitem__,
+        )
+
+    assert acompletion.call_count == 2
+    assert acompletion.call_args.kwargs["stream"] is True
+    assert isinstance(completion.action, ClickAction) and completion.action.id == "B1"
+    assert fields["action"] == completion.action and fields["state"] == completion.state
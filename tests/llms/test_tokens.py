@@ -0,0 +1,62 @@
+import base64
+import io
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from litellm.utils import token_counter
+from notte_core.llms.tokens import TokenCounter, encoding_name, estimate_image_tokens, image_size
+from PIL import Image
+
+
+def image_bytes(width: int, height: int, format: str, mode: str = "RGB", **params: Any) -> bytes:
+    buffer = io.BytesIO()
+    Image.new(mode, (width, height)).save(buffer, format=format, **params)
+    return buffer.getvalue()
+
+
+def test_counters_are_shared_per_tokenizer_family():
+    assert encoding_name("openai/gpt-4o-mini") == "o200k_base"
+    assert encoding_name("gemini/gemini-2.0-flash") == "cl100k_base"
+    assert TokenCounter.for_model("gemini/gemini-2.0-flash") is TokenCounter.for_model("groq/llama-3.3-70b-versatile")
+
+
+def test_text_counts_are_memoized():
+    counter = TokenCounter()
+    text = "Find the cheapest flight from Paris to London. " * 50
+    count = counter.count(text)
+    with patch.object(TokenCounter, "encode") as encode:
+        assert counter.count(text) == count
+        encode.assert_not_called()
+
+
+def test_message_count_matches_litellm():
+    counter = TokenCounter.for_model("gemini/gemini-2.0-flash")
+    messages = [
+        {"role": "system", "content": "You are a browser agent."},
+        {"role": "user", "content": [{"type": "text", "text": "Find the latest news about AI"}]},
+    ]
+    for message in messages:
+        assert counter.count_messages([message]) == token_counter(model="gemini/gemini-2.0-flash", messages=[message])
+
+
+@pytest.mark.parametrize(
+    "format,mode,params",
+    [
+        ("PNG", "RGB", {}),
+        ("JPEG", "RGB", {}),
+        # large metadata segment before the JPEG frame header
+        ("JPEG", "RGB", {"icc_profile": bytes(20_000)}),
+        # lossy (VP8), lossless (VP8L) and extended (VP8X, with an alpha channel) WEBP
+        ("WEBP", "RGB", {}),
+        ("WEBP", "RGB", {"lossless": True}),
+        ("WEBP", "RGBA", {}),
+    ],
+)
+def test_image_tokens_are_estimated_from_the_header(format: str, mode: str, params: dict[str, Any]):
+    data = image_bytes(1280, 720, format, mode, **params)
+    assert image_size(data) == (1280, 720)
+    url = f"data:image/{format.lower()};base64,{base64.b64encode(data).decode()}"
+    # resized to 1365x768: 3x2 tiles of 512px
+    assert TokenCounter().count_image({"url": url}) == estimate_image_tokens(1280, 720) == 85 + 6 * 170
+    assert TokenCounter().count_image({"url": url, "detail": "low"}) == 85
@@ -0,0 +1,89 @@
+import base64
+import gzip
+import json
+import threading
+from pathlib import Path
+from typing import Any
+
+import notte_core.common.tracer as tracer
+import pytest
+from notte_core.common.config import TraceImageMode, config
+from notte_core.common.tracer import JsonlFileWriter, LlmUsageFileTracer, jsonl_writer
+
+PNG = base64.b64encode(b"\x89PNG fake image").decode()
+
+
+def messages() -> list[Any]:
+    image = {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{PNG}"}}
+    return [
+        {"role": "system", "content": "You are a browser agent"},
+        {"role": "user", "content": [{"type": "text", "text": "What is on the page?"}, image]},
+    ]
+
+
+def trace(file_tracer: LlmUsageFileTracer) -> None:
+    file_tracer.trace(
+        timestamp="2025-01-01T00:00:00",
+        model="gpt-4o",
+        messages=messages(),  # pyright: ignore[reportArgumentType]
+        completion="A login form",
+        usage={"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    )
+
+
+@pytest.mark.parametrize("mode", [TraceImageMode.KEEP, TraceImageMode.STRIP, TraceImageMode.HASH])
+def test_llm_usage_traces_are_written_in_background(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, mode: TraceImageMode
+):
+    monkeypatch.setattr(tracer, "config", config.model_copy(update={"trace_images": mode}))
+    monkeypatch.setattr(LlmUsageFileTracer, "file_path", tmp_path / "llm_usage.jsonl")
+    file_tracer = LlmUsageFileTracer()
+    trace(file_tracer)
+    trace(file_tracer)
+    writer = jsonl_writer(LlmUsageFileTracer.file_path, tracer.prepare_llm_trace)
+    writer.flush()
+
+    records = [json.loads(line) for line in (tmp_path / "llm_usage.jsonl").read_text().splitlines()]
+    assert len(records) == 2 and records[0]["completion"] == "A login form"
+    blocks = records[0]["messages"][1]["content"]
+    match mode:
+        case TraceImageMode.KEEP:
+            assert blocks == messages()[1]["content"]
+        case TraceImageMode.STRIP:
+            assert blocks == [{"type": "text", "text": "What is on the page?"}]
+        case TraceImageMode.HASH:
+            path = blocks[1]["image_url"]["url"]
+            assert path.startswith("images/") and path.endswith(".png")
+            # images are stored once per content
+            assert [p.name for p in (tmp_path / "images").iterdir()] == [Path(path).name]
+            assert (tmp_path / path).read_bytes() == base64.b64decode(PNG)
+
+
+def test_writer_compresses_batches(tmp_path: Path):
+    writer = JsonlFileWriter(tmp_path / "traces.jsonl", batch_size=4, compress=True)
+    for i in range(10):
+        writer.write({"i": i})
+    writer.flush()
+    assert writer.file_path.name == "traces.jsonl.gz"
+    with gzip.open(writer.file_path, "rt") as f:
+        assert [json.loads(line)["i"] for line in f] == list(range(10))
+
+
+def test_writer_drops_records_when_the_queue_is_full(tmp_path: Path):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_prepare(record: dict[str, Any], _: Path) -> dict[str, Any]:
+        started.set()
+        _ = release.wait(timeout=5)
+        return record
+
+    writer = JsonlFileWriter(tmp_path / "traces.jsonl", max_queue_size=1, prepare=slow_prepare)
+    writer.write({"i": 0})
+    assert started.wait(timeout=5)
+    # the writer thread is busy: the queue holds a single record, the next one is dropped
+    writer.write({"i": 1})
+    writer.write({"i": 2})
+    assert writer.dropped == 1
+    release.set()
+    writer.flush()
+    assert [json.loads(line)["i"] for line in writer.file_path.read_text().splitlines()] == [0, 1]
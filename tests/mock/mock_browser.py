@@ -4,7 +4,13 @@ from typing import Any, final
 from loguru import logger
 from notte_core.browser.dom_tree import ComputedDomAttributes, DomNode
 from notte_core.browser.node_type import NodeType
-from notte_core.browser.snapshot import BrowserSnapshot, SnapshotMetadata, TabsData, ViewportData
+from notte_core.browser.snapshot import (
+    BrowserSnapshot,
+    SnapshotCapturePlan,
+    SnapshotMetadata,
+    TabsData,
+    ViewportData,
+)
 from notte_core.common.resource import AsyncResource
 from typing_extensions import TypedDict, override
 
@@ -201,5 +207,5 @@ class MockBrowserDriver(AsyncResource):
     def page(self) -> MockBrowserPage:
         return MockBrowserPage(url=self.url)
 
-    async def snapshot(self) -> BrowserSnapshot:
+    async def snapshot(self, capture: SnapshotCapturePlan | None = None) -> BrowserSnapshot:  # pyright: ignore[reportUnusedParameter]
         return self._mock_snapshot
@@ -1,10 +1,10 @@
 from typing import Any, final
 
 import pytest
-import tiktoken
 from litellm import Message, ModelResponse
 from notte_core.llms.engine import LlmModel
 from notte_core.llms.service import LLMService
+from notte_core.llms.tokens import TokenCounter
 from typing_extensions import override
 
 
@@ -14,8 +14,8 @@ class MockLLMService(LLMService):
         self.mock_response: str = mock_response
         self.last_messages: list[Message] = []
         self.last_model: str | None = None
-        self.tokenizer = tiktoken.encoding_for_model("gpt-4o")
         self.base_model: str = LlmModel.default()
+        self.token_counter = TokenCounter.for_model(self.base_model)
 
     @override
     async def completion(
@@ -0,0 +1,53 @@
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from notte_browser.tagging.action.cache import ActionSpaceCache
+from notte_browser.tagging.action.llm_taging.pipe import LlmActionSpacePipe
+from notte_browser.tagging.action.pipe import MainActionSpacePipe
+from notte_core.common.config import PerceptionType
+from notte_core.llms.cache import LRUCompletionCache, SqliteCompletionCache
+from notte_core.space import ActionSpace, SpaceCategory
+from notte_sdk.types import PaginationParams
+
+from tests.mock.mock_service import MockLLMService
+from tests.pipe.action.test_main import context_from_ids, interaction_actions_from_ids
+
+
+def space_from_ids(ids: list[str]) -> ActionSpace:
+    return ActionSpace(
+        description="A page",
+        interaction_actions=interaction_actions_from_ids(ids),
+        category=SpaceCategory.HOMEPAGE,
+    )
+
+
+@pytest.mark.asyncio
+async def test_unchanged_pages_are_observed_without_llm_calls() -> None:
+    pipe = MainActionSpacePipe(llmserve=MockLLMService(mock_response=""))
+    pipe.cache = ActionSpaceCache(LRUCompletionCache(max_entries=8))
+    forward = AsyncMock(side_effect=lambda snapshot, *_: space_from_ids([n.id for n in snapshot.interaction_nodes()]))
+
+    with patch.object(LlmActionSpacePipe, "forward", forward):
+        for _ in range(3):
+            space = await pipe.forward(context_from_ids(["B1", "L1"]), None, PaginationParams())
+            assert [a.id for a in space.interaction_actions] == ["B1", "L1"]
+            assert space.category == SpaceCategory.HOMEPAGE
+        assert forward.await_count == 1
+
+        # new interaction node
+        _ = await pipe.forward(context_from_ids(["B1", "L1", "L2"]), None, PaginationParams())
+        # other pagination
+        _ = await pipe.forward(context_from_ids(["B1", "L1"]), None, PaginationParams(max_nb_actions=1))
+        assert forward.await_count == 3
+
+
+def test_action_spaces_are_shared_across_sessions_on_disk(tmp_path: Path) -> None:
+    snapshot = context_from_ids(["B1", "L1"])
+    pagination = PaginationParams()
+    writer = ActionSpaceCache(SqliteCompletionCache(tmp_path / "spaces.db"))
+    writer.set(snapshot, PerceptionType.DEEP, pagination, space_from_ids(["B1", "L1"]))
+
+    reader = ActionSpaceCache(SqliteCompletionCache(tmp_path / "spaces.db"))
+    assert reader.get(context_from_ids(["B1", "L1"]), PerceptionType.DEEP, pagination) == space_from_ids(["B1", "L1"])
+    assert reader.get(snapshot, PerceptionType.FAST, pagination) is None
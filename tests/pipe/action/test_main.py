@@ -1,15 +1,19 @@
+from collections import OrderedDict
 from collections.abc import Sequence
 from typing import Callable
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
+import notte_browser.tagging.action.llm_taging.pipe as pipe_module
 import pytest
 from notte_browser.tagging.action.llm_taging.pipe import LlmActionSpacePipe
+from notte_browser.tagging.page import MAX_AUTH_INTERACTIONS, PageCategoryPipe, heuristic_category
 from notte_browser.tagging.type import PossibleAction, PossibleActionSpace
 from notte_core.actions import ClickAction, InteractionAction
-from notte_core.browser.dom_tree import A11yTree, ComputedDomAttributes, DomNode
+from notte_core.browser.dom_tree import A11yTree, ComputedDomAttributes, DomAttributes, DomNode
 from notte_core.browser.node_type import NodeRole, NodeType
 from notte_core.browser.snapshot import BrowserSnapshot, SnapshotMetadata, ViewportData
-from notte_core.space import ActionSpace
+from notte_core.common.config import config
+from notte_core.space import ActionSpace, SpaceCategory
 from notte_sdk.types import PaginationParams
 
 from tests.mock.mock_service import MockLLMService
@@ -238,3 +242,72 @@ async def test_context_inodes_empty_previous_returns_llms(listing_config, patch_
     ):
         space = await pipe.forward(context, previous_actions, pagination=PaginationParams())
         assert space_to_ids(space) == ["B1"]
+
+
+@pytest.mark.asyncio
+async def test_parallel_listing_lists_chunks_concurrently(monkeypatch: pytest.MonkeyPatch) -> None:
+    # context[B0..B119] + previous[B0..B9] => 110 uncovered nodes listed by 3 concurrent prompts
+    monkeypatch.setattr(pipe_module, "config", config.model_copy(update={"perception_parallel_listing": True}))
+    ids = [f"B{i}" for i in range(120)]
+    previous_actions = interaction_actions_from_ids(ids[:10])
+    listed: list[list[str]] = []
+
+    def list_chunk(context: BrowserSnapshot, previous_action_list: Sequence[InteractionAction]) -> PossibleActionSpace:
+        chunk_ids = [node.id for node in context.interaction_nodes()]
+        listed.append(chunk_ids)
+        return llm_patch_from_ids(chunk_ids)(context, previous_action_list)
+
+    with (
+        patch.object(LlmActionSpacePipe, "doc_categorisation", False),
+        patch(
+            "notte_browser.tagging.action.llm_taging.listing.ActionListingPipe.forward",
+            side_effect=list_chunk,
+        ),
+    ):
+        pipe = LlmActionSpacePipe(llmserve=MockLLMService(mock_response=""))
+        space = await pipe.forward(context_from_ids(ids), previous_actions, pagination=PaginationParams())
+
+    assert listed == [ids[10:60], ids[60:110], ids[110:]]
+    assert sorted(space_to_ids(space)) == sorted(ids)
+
+
+@pytest.mark.asyncio
+async def test_page_category_is_cached_per_page_structure(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(PageCategoryPipe, "_cache", OrderedDict())
+    llm_category = AsyncMock(return_value=SpaceCategory.HOMEPAGE)
+    monkeypatch.setattr(PageCategoryPipe, "llm_category", llm_category)
+    llm_patch = llm_patch_from_ids(["B1", "B2"])
+    with (
+        patch.object(LlmActionSpacePipe, "required_action_coverage", 0.0),
+        patch(
+            "notte_browser.tagging.action.llm_taging.listing.ActionListingPipe.forward",
+            side_effect=llm_patch,
+        ),
+    ):
+        pipe = LlmActionSpacePipe(llmserve=MockLLMService(mock_response=""))
+        for _ in range(2):
+            space = await pipe.forward(context_from_ids(["B1", "B2"]), None, pagination=PaginationParams())
+            assert space.category == SpaceCategory.HOMEPAGE
+        assert llm_category.await_count == 1
+        # the categorisation doesn't wait for the action listing description
+        assert llm_category.await_args.args[1] is None
+
+        # same page with a different structure
+        space = await pipe.forward(context_from_ids(["B1", "B2", "B3"]), None, pagination=PaginationParams())
+        assert llm_category.await_count == 2
+
+
+@pytest.mark.parametrize("nb_links,category", [(2, SpaceCategory.AUTH), (MAX_AUTH_INTERACTIONS, None)])
+def test_password_fields_only_make_small_pages_auth_pages(nb_links: int, category: SpaceCategory | None) -> None:
+    snapshot = context_from_ids([f"L{i}" for i in range(nb_links)])
+    password = DomNode(
+        id="I1",
+        role=NodeRole.TEXTBOX,
+        text="",
+        type=NodeType.INTERACTION,
+        children=[],
+        attributes=DomAttributes.safe_init(tag_name="input", type="password"),
+        computed_attributes=ComputedDomAttributes(),
+    )
+    snapshot.dom_node.children.append(password)
+    assert heuristic_category(snapshot) == category
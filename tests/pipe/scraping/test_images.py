@@ -0,0 +1,109 @@
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from notte_browser.scraping.images import ImageMetadata, ImageScrapingPipe
+from notte_core.browser.dom_tree import A11yTree, ComputedDomAttributes, DomNode, NodeSelectors
+from notte_core.browser.node_type import NodeRole, NodeType
+from notte_core.browser.snapshot import BrowserSnapshot, SnapshotMetadata, ViewportData
+from notte_core.data.space import ImageCategory
+
+
+def image_node(index: int, in_iframe: bool = False) -> DomNode:
+    return DomNode(
+        id=None,
+        role=NodeRole.IMG,
+        text="",
+        type=NodeType.OTHER,
+        children=[],
+        attributes=None,
+        computed_attributes=ComputedDomAttributes(
+            selectors=NodeSelectors(
+                css_selector=f"img:nth-of-type({index})",
+                xpath_selector=f"html/body/img[{index}]",
+                notte_selector="",
+                in_iframe=in_iframe,
+                in_shadow_root=False,
+                iframe_parent_css_selectors=["iframe"] if in_iframe else [],
+            )
+        ),
+    )
+
+
+def metadata(src: str, width: int = 400, tag_name: str = "img", **attrs: Any) -> ImageMetadata:
+    return ImageMetadata(
+        tag_name=tag_name,
+        role=attrs.get("role"),
+        aria_hidden=None,
+        aria_label=None,
+        alt=attrs.get("alt", "A picture"),
+        classes=attrs.get("classes", ""),
+        src=src,
+        width=width,
+        height=width,
+        svg_content=attrs.get("svg_content"),
+    )
+
+
+def snapshot(nodes: list[DomNode]) -> BrowserSnapshot:
+    return BrowserSnapshot(
+        metadata=SnapshotMetadata(
+            title="",
+            url="https://example.com",
+            viewport=ViewportData(
+                viewport_width=1000,
+                viewport_height=1000,
+                scroll_x=0,
+                scroll_y=0,
+                total_width=1000,
+                total_height=1000,
+            ),
+            tabs=[],
+        ),
+        html_content="",
+        a11y_tree=A11yTree(raw={}, simple={}),
+        dom_node=DomNode(
+            id=None,
+            role=NodeRole.WEBAREA,
+            text="Root Webarea",
+            type=NodeType.OTHER,
+            attributes=None,
+            computed_attributes=ComputedDomAttributes(),
+            children=nodes,
+        ),
+        screenshot=b"",
+    )
+
+
+@pytest.mark.asyncio
+async def test_images_metadata_is_collected_in_one_evaluation():
+    window = MagicMock()
+    window.page.evaluate = AsyncMock(
+        return_value=[
+            metadata("/images/cat.png"),
+            metadata("icon.png", width=32),
+            metadata("", tag_name="svg", width=800, svg_content="<svg></svg>"),
+            None,
+        ]
+    )
+    # images that can't be located by xpath are resolved one by one
+    locator = MagicMock()
+    locator.evaluate = AsyncMock(return_value=metadata("https://cdn.example.com/frame.png", alt=""))
+    nodes = [image_node(1), image_node(2), image_node(3), image_node(1, in_iframe=True)]
+
+    with patch(
+        "notte_browser.scraping.images.resolve_image_conflict", new=AsyncMock(return_value=locator)
+    ) as resolve_image_conflict:
+        images = await ImageScrapingPipe().forward(window, snapshot(nodes))
+
+    window.page.evaluate.assert_awaited_once()
+    xpaths = window.page.evaluate.await_args.args[1]
+    assert xpaths == ["html/body/img[1]", "html/body/img[2]", "html/body/img[3]", None]
+    assert resolve_image_conflict.await_count == 1
+    assert [(image.category, image.url) for image in images] == [
+        (ImageCategory.FAVICON, "https://example.com/favicon.ico"),
+        (ImageCategory.CONTENT_IMAGE, "https://example.com/images/cat.png"),
+        (ImageCategory.ICON, "https://example.com/icon.png"),
+        (ImageCategory.SVG_CONTENT, "<svg></svg>"),
+        (ImageCategory.DECORATIVE, "https://cdn.example.com/frame.png"),
+    ]
@@ -0,0 +1,120 @@
+import io
+import pickle
+from collections.abc import Iterator
+from pathlib import Path
+
+import notte_core.trajectory_store as trajectory_store
+import pytest
+from notte_core.actions import ClickAction
+from notte_core.agent_types import AgentCompletion
+from notte_core.browser.observation import ExecutionResult, Observation, Screenshot
+from notte_core.common.config import TrajectoryStoreType, config
+from notte_core.trajectory import Trajectory, TrajectoryElement
+from notte_core.trajectory_store import SegmentFileBackend, SpillingTrajectoryStore, TrajectoryStore
+from PIL import Image
+
+
+def png(color: str) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (64, 64), color=color).save(output, format="PNG")
+    return output.getvalue()
+
+
+def observation(url: str, screenshot: bytes) -> Observation:
+    empty = Observation.empty()
+    return empty.model_copy(
+        update={"metadata": empty.metadata.model_copy(update={"url": url}), "screenshot": Screenshot(raw=screenshot)}
+    )
+
+
+@pytest.fixture(params=list(TrajectoryStoreType))
+def store_type(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Iterator[str]:
+    update = {"trajectory_store": request.param, "trajectory_hot_elements": 1, "trajectory_spill_dir": str(tmp_path)}
+    monkeypatch.setattr(trajectory_store, "config", config.model_copy(update=update))
+    yield request.param
+
+
+def test_trajectory_views_and_steps(store_type: str):
+    trajectory = Trajectory()
+    original_view = trajectory.view()
+
+    _ = original_view.start_step()
+    original_view.append(observation("https://a.com", png("red")), force=True)
+    original_view.append(AgentCompletion.initial(url="https://a.com"), force=True)
+    _ = original_view.stop_step()
+
+    second_view = trajectory.view()
+
+    _ = original_view.start_step()
+    original_view.append(ExecutionResult(action=ClickAction(id="B1"), success=True, message="clicked"), force=True)
+    original_view.append(observation("https://b.com", png("red")), force=True)
+    _ = original_view.stop_step()
+
+    assert (trajectory.num_steps, second_view.num_steps) == (2, 1)
+    assert (len(trajectory), len(second_view)) == (4, 2)
+    assert [obs.metadata.url for obs in trajectory.observations()] == ["https://a.com", "https://b.com"]
+    assert [obs.metadata.url for obs in second_view.observations()] == ["https://b.com"]
+    assert len(list(second_view.agent_completions())) == 0
+    assert isinstance(trajectory[0], Observation) and isinstance(second_view[-1], Observation)
+    bundles = list(trajectory.step_iterator())
+    assert bundles[0].agent_completion is not None and bundles[0].execution_result is None
+    assert bundles[1].execution_result is not None and bundles[1].observation is not None
+    assert bundles[1].observation.screenshot.raw == png("red")
+    assert trajectory.last_observation is not None and trajectory.last_observation.metadata.url == "https://b.com"
+    assert isinstance(trajectory._elements, SpillingTrajectoryStore) == (store_type != TrajectoryStoreType.MEMORY)  # pyright: ignore [reportPrivateUsage]
+
+
+def test_spilled_screenshots_are_content_addressed(tmp_path: Path):
+    backend = SegmentFileBackend(tmp_path)
+    store: SpillingTrajectoryStore[Observation] = SpillingTrajectoryStore(backend, hot_elements=2, min_blob_size=64)
+    colors = ["red", "green", "blue"]
+    for i in range(30):
+        store.append(observation(f"https://{i}.com", png(colors[i % 3])), tag="observation")
+
+    assert store.nb_spilled == 28 and len(store) == 30
+    # one blob per distinct screenshot
+    assert len(backend._blobs) == 3  # pyright: ignore [reportPrivateUsage]
+    assert [obs.metadata.url for obs in store.iter(tag="observation")] == [f"https://{i}.com" for i in range(30)]
+    copy = pickle.loads(pickle.dumps(store))
+    assert type(copy) is TrajectoryStore and [obs.metadata.url for obs in copy] == [obs.metadata.url for obs in store]
+    assert store[4].screenshot.raw == png("green") and store[-1].screenshot.raw == png("blue")
+    assert len(list(store.iter(tag="execution_result"))) == 0
+
+
+class CustomError(Exception):
+    def __init__(self, code: int, reason: str) -> None:
+        super().__init__(f"{code}: {reason}")
+
+
+def test_elements_that_cannot_be_unpickled_stay_in_memory(tmp_path: Path):
+    store: TrajectoryStore[ExecutionResult] = SpillingTrajectoryStore(SegmentFileBackend(tmp_path), hot_elements=1)
+    result = ExecutionResult(
+        action=ClickAction(id="B1"), success=False, message="failed", exception=CustomError(1, "x")
+    )
+    store.append(result)
+    store.append(ExecutionResult(action=ClickAction(id="B2"), success=True, message="clicked"))
+    store.append(ExecutionResult(action=ClickAction(id="B3"), success=True, message="clicked"))
+    assert store[0] is result
+    assert store[1].message == "clicked" and store[1] is not store[1]
+    with pytest.raises(ValueError):
+        _ = SpillingTrajectoryStore(SegmentFileBackend(tmp_path), hot_elements=0)
+
+
+def test_elements_from_only_loads_the_requested_elements(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    store: SpillingTrajectoryStore[TrajectoryElement] = SpillingTrajectoryStore(
+        SegmentFileBackend(tmp_path), hot_elements=4
+    )
+    trajectory = Trajectory(store)
+    for i in range(50):
+        trajectory.append(ExecutionResult(action=ClickAction(id=f"B{i}"), success=True, message=str(i)))
+    loads: list[bytes] = []
+    original = SpillingTrajectoryStore._loads  # pyright: ignore [reportPrivateUsage]
+
+    def tracked_loads(self: SpillingTrajectoryStore[TrajectoryElement], data: bytes, blobs: None = None):
+        loads.append(data)
+        return original(self, data, blobs)
+
+    monkeypatch.setattr(SpillingTrajectoryStore, "_loads", tracked_loads)
+    assert [result.message for result in trajectory.elements_from(44)] == [str(i) for i in range(44, 50)]  # pyright: ignore
+    # 2 spilled elements, the 4 others are in memory
+    assert len(loads) == 2
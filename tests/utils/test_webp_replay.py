@@ -0,0 +1,105 @@
+import io
+from pathlib import Path
+from unittest.mock import patch
+
+import notte_core.utils.webp_replay as webp_replay
+import pytest
+from notte_core.utils.webp_replay import ReplayEncoder, ScreenshotReplay, WebpReplay
+from PIL import Image, ImageDraw
+
+
+def png(color: str, size: tuple[int, int] = (1280, 720)) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", size, color=color).save(output, format="PNG")
+    return output.getvalue()
+
+
+COLORS = ["red", "green", "blue", "yellow"]
+
+
+def test_replay_frames_are_decoded_one_at_a_time():
+    replay = ScreenshotReplay.from_bytes([png(color) for color in COLORS] + [png("black", (640, 360))])
+    decoded: list[int] = []
+    render = webp_replay.render_replay_frame
+
+    def tracked_render(frame: webp_replay.ReplayFrame):
+        decoded.append(frame.index)
+        # the next frame is only decoded once the previous one has been written
+        assert decoded == list(range(frame.index + 1))
+        return render(frame)
+
+    with patch.object(webp_replay, "render_replay_frame", side_effect=tracked_render):
+        data = replay.build_webp(step_text=[f"step {i}" for i in range(5)])
+
+    animation = Image.open(io.BytesIO(data))
+    # start frame + one frame per screenshot, resized to the most common size
+    assert animation.n_frames == 6 and animation.size == (896, 504)
+    for i, color in enumerate(COLORS + ["black"]):
+        animation.seek(i + 1)
+        pixel = animation.convert("RGB").getpixel((100, 100))
+        expected = Image.new("RGB", (1, 1), color=color).getpixel((0, 0))
+        assert all(abs(a - b) < 16 for a, b in zip(pixel, expected))  # pyright: ignore
+    assert WebpReplay(data).frame(-1).size == (896, 504)
+
+
+def test_replay_encoder_streams_to_file(tmp_path: Path):
+    path = tmp_path / "replay.webp"
+    with open(path, "wb") as f:
+        stats = ReplayEncoder().write(f, (png(color) for color in COLORS))
+    assert stats.nb_frames == 5 and stats.output_bytes == path.stat().st_size
+    assert Image.open(path).n_frames == 5
+
+
+def test_placeholder_screenshots_dont_size_streamed_replays():
+    screenshots = [png("white", (1, 1))] + [png(color) for color in COLORS]
+    streamed = Image.open(io.BytesIO(ReplayEncoder().encode(iter(screenshots))))
+    assert streamed.size == Image.open(io.BytesIO(ReplayEncoder().encode(screenshots))).size == (896, 504)
+    assert webp_replay.most_common_size(iter(screenshots)) == (1280, 720)
+
+
+def test_replay_step_texts_must_match_screenshots():
+    with pytest.raises(ValueError):
+        _ = ReplayEncoder().encode([png(color) for color in COLORS], step_text=["a", "b"])
+    assert ReplayEncoder().encode([]) == b""
+
+
+def test_near_duplicate_frames_are_collapsed_and_partial_changes_stored_as_regions():
+    image = Image.new("RGB", (1280, 720), color="red")
+    ImageDraw.Draw(image).rectangle((200, 200, 300, 260), fill="blue")
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    screenshots = [png("red"), png("red"), png("red"), output.getvalue(), png("green")]
+
+    buffer = io.BytesIO()
+    stats = ReplayEncoder().write(buffer, screenshots)
+    assert (stats.nb_screenshots, stats.nb_frames, stats.nb_collapsed, stats.nb_partial) == (5, 4, 2, 1)
+    assert stats.compression_ratio > 1
+
+    animation = Image.open(io.BytesIO(buffer.getvalue()))
+    assert animation.n_frames == 4
+    animation.seek(1)
+    animation.load()
+    # the 3 identical screenshots are displayed for 3 frame times
+    assert animation.info["duration"] == 3000
+    animation.seek(2)
+    frame = animation.convert("RGB")
+    # the partial frame is drawn over the previous one
+    for position, color in [((175, 175), "blue"), ((50, 50), "red"), ((800, 400), "red")]:
+        expected = Image.new("RGB", (1, 1), color=color).getpixel((0, 0))
+        assert all(abs(a - b) < 32 for a, b in zip(frame.getpixel(position), expected))  # pyright: ignore
+
+    # without deduplication, every screenshot is a frame
+    unique = ReplayEncoder(duplicate_max_pixels=None, max_partial_area=0).write(io.BytesIO(), screenshots)
+    assert (unique.nb_frames, unique.nb_collapsed, unique.nb_partial) == (6, 0, 0)
+    assert unique.output_bytes > stats.output_bytes
+
+
+def test_small_changes_are_not_collapsed():
+    checkbox = Image.new("RGB", (1280, 720), color="white")
+    ImageDraw.Draw(checkbox).rectangle((600, 300, 613, 313), fill="black")
+    output = io.BytesIO()
+    checkbox.save(output, format="PNG")
+    # a 14px checkbox being ticked, then the same page again
+    stats = ReplayEncoder().write(io.BytesIO(), [png("white"), output.getvalue(), output.getvalue()])
+    # the blank page and the checkbox only differ from the previous frame in a region
+    assert (stats.nb_frames, stats.nb_collapsed, stats.nb_partial) == (3, 1, 2)